@@ -0,0 +1,71 @@
+"""store property values as arrays
+
+Revision ID: 5a5fc8a8954b
+Revises: 0415bd61311d
+Create Date: 2026-10-19 10:12:41.503217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5a5fc8a8954b'
+down_revision = '0415bd61311d'
+branch_labels = None
+depends_on = None
+
+# (array table, one row per value table, owner id column)
+TABLES = [
+    (
+        'csst_experiment_property_arrays',
+        'csst_experiment_property_multiple_values',
+        'csst_experiment_id',
+    ),
+    (
+        'csst_reactor_property_arrays',
+        'csst_reactor_property_multiple_values',
+        'csst_reactor_id',
+    ),
+]
+
+
+def upgrade() -> None:
+    op.create_table('csst_experiment_property_arrays',
+    sa.Column('csst_property_id', sa.Integer(), nullable=False),
+    sa.Column('csst_experiment_id', sa.Integer(), nullable=False),
+    sa.Column('values', postgresql.ARRAY(postgresql.DOUBLE_PRECISION(), dimensions=1), nullable=False),
+    sa.ForeignKeyConstraint(['csst_experiment_id'], ['csst_experiments.id'], ),
+    sa.ForeignKeyConstraint(['csst_property_id'], ['csst_properties.id'], ),
+    sa.PrimaryKeyConstraint('csst_property_id', 'csst_experiment_id')
+    )
+    op.create_table('csst_reactor_property_arrays',
+    sa.Column('csst_property_id', sa.Integer(), nullable=False),
+    sa.Column('csst_reactor_id', sa.Integer(), nullable=False),
+    sa.Column('values', postgresql.ARRAY(postgresql.DOUBLE_PRECISION(), dimensions=1), nullable=False),
+    sa.ForeignKeyConstraint(['csst_property_id'], ['csst_properties.id'], ),
+    sa.ForeignKeyConstraint(['csst_reactor_id'], ['csst_reactors.id'], ),
+    sa.PrimaryKeyConstraint('csst_property_id', 'csst_reactor_id')
+    )
+    # backfill one array per property and owner in array_index order, then remove
+    # the rows that were moved
+    for array_table, values_table, owner in TABLES:
+        op.execute(
+            f'INSERT INTO {array_table} (csst_property_id, {owner}, "values") '
+            f'SELECT csst_property_id, {owner}, array_agg(value ORDER BY array_index) '
+            f'FROM {values_table} GROUP BY csst_property_id, {owner}'
+        )
+        op.execute(f'DELETE FROM {values_table}')
+
+
+def downgrade() -> None:
+    # move the arrays back to one row per value
+    for array_table, values_table, owner in TABLES:
+        op.execute(
+            f'INSERT INTO {values_table} '
+            f'(csst_property_id, {owner}, array_index, value) '
+            f'SELECT a.csst_property_id, a.{owner}, v.ordinality - 1, v.value '
+            f'FROM {array_table} a, unnest(a."values") WITH ORDINALITY AS v(value, ordinality)'
+        )
+    op.drop_table('csst_reactor_property_arrays')
+    op.drop_table('csst_experiment_property_arrays')
@@ -0,0 +1,96 @@
+"""Import time of the csst packages
+
+Each module is imported in a fresh interpreter with python -X importtime, and the
+cumulative import time of the module (including every dependency it imports) is the
+fastest of several runs. The script exits with a non-zero status if a module with a
+budget in BUDGETS takes longer than its budget.
+
+Typical usage example (run from the repository root):
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --modules csst.experiment --runs 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+# import time budgets in seconds. Heavy dependencies (pandas, scipy, matplotlib,
+# SQLAlchemy) are imported on first use, so these only cover numpy and pydantic.
+BUDGETS = {
+    "csst": 0.05,
+    "csst.experiment": 0.5,
+}
+MODULES = ["csst", "csst.experiment", "csst.processor", "csst.analyzer", "csst.db"]
+
+
+def import_time(module: str, runs: int = 5) -> float:
+    """Fastest cumulative import time of module in seconds over runs fresh
+    interpreters"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(ROOT)] + [p for p in [env.get("PYTHONPATH")] if p]
+    )
+    times = []
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            env=env,
+            check=True,
+        )
+        times.append(_cumulative_seconds(process.stderr, module))
+    return min(times)
+
+
+def _cumulative_seconds(importtime: str, module: str) -> float:
+    """Cumulative time of module in -X importtime output. Lines are
+    'import time: self [us] | cumulative | imported package'."""
+    for line in importtime.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+    raise LookupError(f"{module} not in the import time output")
+
+
+def check(times: Dict[str, float], budgets: Dict[str, float]) -> List[str]:
+    """Descriptions of every module over its budget"""
+    return [
+        f"{module} took {seconds:.3f} s to import, budget {budgets[module]:.3f} s"
+        for module, seconds in times.items()
+        if module in budgets and seconds > budgets[module]
+    ]
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument(
+        "--runs", type=int, default=5, help="fresh interpreters per module"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    times = {}
+    for module in args.modules:
+        times[module] = import_time(module, args.runs)
+        budget = BUDGETS.get(module)
+        budget = "" if budget is None else f"(budget {budget:.3f} s)"
+        print(f"{module:20s} {times[module]:8.3f} s {budget}", flush=True)
+    over = check(times, BUDGETS)
+    if over:
+        print("Over budget:")
+        for description in over:
+            print(f"  {description}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
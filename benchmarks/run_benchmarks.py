@@ -0,0 +1,348 @@
+"""Benchmarks of the csst hot paths
+
+Each benchmark case writes a synthetic Crystal16 report (see
+csst.experiment.synthetic) with a number of samples and
+reactors, then times and measures the peak memory of each stage:
+
+- load_from_file: Experiment.load_from_file (includes ramp state and filtering)
+- create_ramp_state: Experiment.create_ramp_state of the actual temperatures
+- filter_transmission: Experiment.filter_transmission of every reactor
+- process_reactor: csst.processor.process_reactor of every reactor
+- analyzer_add_reactor: Analyzer.add_reactor of every reactor and building the
+  analyzer dataframes
+- plot_experiment: csst.analyzer.plotter.plot_experiment rendered with Agg
+- plot_experiment_decimated: plot_experiment with max_points=PLOT_MAX_POINTS
+- plot_experiment_update: updating and drawing the lines of an already built
+  csst.analyzer.plotter.ExperimentPlot with max_points=PLOT_MAX_POINTS
+
+Results are saved as json and compared to a stored baseline. The script exits with a
+non-zero status if any stage is slower or uses more memory than the baseline allows.
+
+Typical usage example (run from the repository root):
+
+    python benchmarks/run_benchmarks.py --samples 1000 100000 --reactors 4 16
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+import argparse
+import gc
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from csst.experiment import Experiment  # noqa: E402
+from csst.processor import process_reactor  # noqa: E402
+from csst.analyzer import Analyzer  # noqa: E402
+from csst.analyzer.plotter import ExperimentPlot, plot_experiment  # noqa: E402
+from csst.experiment.synthetic import (  # noqa: E402
+    default_reactors,
+    write_synthetic_report,
+)
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+STAGES = [
+    "load_from_file",
+    "create_ramp_state",
+    "filter_transmission",
+    "process_reactor",
+    "analyzer_add_reactor",
+    "plot_experiment",
+    "plot_experiment_decimated",
+    "plot_experiment_update",
+]
+# max_points of the plot_experiment_decimated and plot_experiment_update stages
+PLOT_MAX_POINTS = 2000
+# stages are repeated until this many seconds have been spent on them and the
+# fastest run is reported
+MIN_TOTAL_SECONDS = 1
+
+
+def measure(func: Callable, repeat: int, memory: bool = True) -> Dict[str, float]:
+    """Time func and measure its peak memory
+
+    The time is the fastest of up to repeat runs (fewer if a run is slow). The peak
+    memory is measured in a separate run as tracemalloc slows python down.
+
+    Args:
+        func: function to measure
+        repeat: maximum number of timed runs
+        memory: if the peak memory should be measured
+    """
+    times = []
+    while len(times) < repeat and (len(times) == 0 or sum(times) < MIN_TOTAL_SECONDS):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    result = {"seconds": min(times), "runs": len(times)}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result["peak_memory_bytes"] = peak
+    return result
+
+
+def analyze(experiment: Experiment):
+    """Add the experiment to an analyzer and build its dataframes"""
+    analyzer = Analyzer()
+    analyzer.add_experiment_reactors(experiment)
+    return analyzer.df, analyzer.unprocessed_df
+
+
+def render(experiment: Experiment, max_points: Optional[int] = None):
+    """Render the experiment plot like saving it to a file would"""
+    fig = plot_experiment(experiment, max_points=max_points)
+    fig.savefig(io.BytesIO(), format="png")
+    plt.close(fig)
+
+
+def update(plot: ExperimentPlot, experiment: Experiment):
+    """Refresh an experiment plot with the experiment data and draw it"""
+    plot.update(experiment)
+    plot.draw()
+
+
+def run_case(
+    path: Path, samples: int, reactors: int, stages: List[str], args
+) -> List[dict]:
+    """Run the benchmarks of one report file"""
+    experiment = Experiment.load_from_file(path)
+    temps = experiment.actual_temperature.values
+    dt = experiment.get_timestep_of_experiment()
+    plot = None
+    if "plot_experiment_update" in stages:
+        fig = plt.figure(figsize=(8, 6), tight_layout=True)
+        plot = ExperimentPlot(fig, experiment, PLOT_MAX_POINTS)
+        plot.draw()
+    funcs = {
+        "load_from_file": lambda: Experiment.load_from_file(path),
+        "create_ramp_state": lambda: experiment.create_ramp_state(temps, dt),
+        "filter_transmission": lambda: [
+            experiment.filter_transmission(reactor.transmission.values, dt)
+            for reactor in experiment.reactors
+        ],
+        "process_reactor": lambda: [
+            process_reactor(reactor) for reactor in experiment.reactors
+        ],
+        "analyzer_add_reactor": lambda: analyze(experiment),
+        "plot_experiment": lambda: render(experiment),
+        "plot_experiment_decimated": lambda: render(experiment, PLOT_MAX_POINTS),
+        "plot_experiment_update": lambda: update(plot, experiment),
+    }
+    results = []
+    for stage in stages:
+        result = measure(funcs[stage], args.repeat, not args.no_memory)
+        result = {"stage": stage, "samples": samples, "reactors": reactors, **result}
+        print(format_result(result), flush=True)
+        results.append(result)
+    if plot is not None:
+        plt.close(plot.fig)
+    return results
+
+
+def key(result: dict) -> str:
+    """Key of a result in the baseline"""
+    return f"{result['stage']}/{result['samples']}/{result['reactors']}"
+
+
+def format_result(result: dict) -> str:
+    memory = result.get("peak_memory_bytes")
+    memory = "" if memory is None else f"{memory / 2**20:10.1f} MiB"
+    return f"{key(result):40s} {result['seconds']:10.4f} s {memory}"
+
+
+def compare(
+    results: List[dict],
+    baseline: Dict[str, dict],
+    time_tolerance: float,
+    memory_tolerance: float,
+    min_seconds: float,
+    min_bytes: int,
+) -> List[str]:
+    """Compare results to the baseline
+
+    A stage regresses if it exceeds the baseline by more than the relative tolerance
+    and by more than the absolute minimum, so tiny stages do not fail from noise.
+
+    Returns:
+        Descriptions of every regression found
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(key(result))
+        if base is None:
+            print(f"{key(result):40s} no baseline")
+            continue
+        seconds, base_seconds = result["seconds"], base["seconds"]
+        if (
+            seconds > base_seconds * (1 + time_tolerance)
+            and seconds - base_seconds > min_seconds
+        ):
+            regressions.append(
+                f"{key(result)} took {seconds:.4f} s, baseline {base_seconds:.4f} s"
+            )
+        memory = result.get("peak_memory_bytes")
+        base_memory = base.get("peak_memory_bytes")
+        if (
+            memory is not None
+            and base_memory is not None
+            and memory > base_memory * (1 + memory_tolerance)
+            and memory - base_memory > min_bytes
+        ):
+            regressions.append(
+                f"{key(result)} peak memory {memory / 2**20:.1f} MiB, "
+                + f"baseline {base_memory / 2**20:.1f} MiB"
+            )
+    return regressions
+
+
+def metadata() -> dict:
+    """Environment the benchmarks ran in"""
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--samples", type=int, nargs="+", default=[1_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--reactors", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="maximum timed runs of each stage"
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip peak memory measurements"
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=None,
+        help="folder to write and reuse generated reports in. Default a temporary "
+        + "folder",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=BENCHMARK_DIR / "results.json",
+        help="file to save the results to",
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="merge the results into the baseline instead of comparing to it",
+    )
+    parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        default=0.5,
+        help="allowed relative slowdown before failing",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=0.25,
+        help="allowed relative peak memory increase before failing",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.05,
+        help="slowdowns smaller than this never fail",
+    )
+    parser.add_argument(
+        "--min-bytes",
+        type=int,
+        default=2**20,
+        help="peak memory increases smaller than this never fail",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir if args.data_dir is not None else Path(tmp)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        results = []
+        for samples in args.samples:
+            for reactors in args.reactors:
+                path = data_dir / f"benchmark_{samples}_{reactors}.csv"
+                if not path.exists():
+                    write_synthetic_report(
+                        path, reactors=default_reactors(reactors), samples=samples
+                    )
+                results += run_case(path, samples, reactors, args.stages, args)
+
+    output = {"metadata": metadata(), "results": results}
+    args.output.write_text(json.dumps(output, indent=2) + "\n")
+    print(f"Saved results to {args.output}")
+
+    if args.update_baseline:
+        baseline = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text())
+        baseline.setdefault("results", {})
+        baseline["metadata"] = metadata()
+        for result in results:
+            baseline["results"][key(result)] = {
+                k: v for k, v in result.items() if k in ["seconds", "peak_memory_bytes"]
+            }
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Updated baseline {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --update-baseline")
+        return 0
+    baseline = json.loads(args.baseline.read_text())["results"]
+    regressions = compare(
+        results,
+        baseline,
+        args.time_tolerance,
+        args.memory_tolerance,
+        args.min_seconds,
+        args.min_bytes,
+    )
+    if len(regressions) > 0:
+        print(f"\n{len(regressions)} REGRESSIONS:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+"""Loading, processing, analyzing and storing Crystal16 solubility experiments
+
+Subpackages are imported the first time they are accessed (e.g., csst.analyzer), so
+importing csst costs nothing and each subpackage only loads the dependencies it
+needs.
+"""
+import importlib
+
+SUBPACKAGES = ["analyzer", "db", "experiment", "instrumentation", "processor"]
+
+
+def __getattr__(name: str):
+    if name in SUBPACKAGES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + SUBPACKAGES)
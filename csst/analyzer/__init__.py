@@ -1,20 +1,62 @@
 import logging
+import shutil
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from csst.processor import process_reactor
-from csst.processor.models import ProcessedTemperature
+from csst.processor.transitions import find_transition_temperatures
+from csst.processor.models import ProcessedReactor, ProcessedTemperature
 from csst.experiment.models import Reactor
 from csst.experiment import Experiment
+from csst.instrumentation import span
+from csst.analyzer.schema import (
+    PROCESSED_SCHEMA,
+    UNPROCESSED_SCHEMA,
+    SAMPLE_SCHEMA,
+    TRANSMISSION_SCHEMA,
+    apply_schema,
+    concat_frames,
+    empty_frame,
+)
+from csst.analyzer import storage
+from csst.analyzer.index import PositionIndex
+from csst.analyzer.retention import ProcessedReactors
+from csst.analyzer import phase
 
 logger = logging.getLogger(__name__)
 
+# number of values sampled from each array to fingerprint experiments and reactors
+# (see reactor_key)
+KEY_SAMPLES = 64
+
 
 class Analyzer:
     """Crystal 16 Dissolition/Solubility Data Analyzer
 
+    Reactors are processed as they are added, but their rows are kept in per-reactor
+    column buffers. The dataframes are built from the buffers the first time they are
+    accessed after reactors were added, so adding N reactors copies the data once
+    instead of once per reactor.
+
+    Out-of-core analyzers (created with a store directory) write the buffered rows to
+    Parquet datasets in the store (see csst.analyzer.storage) every time chunk_rows
+    rows are buffered, so only one chunk of rows is held in memory while reactors are
+    added. Their df and unprocessed_df are read from the store on every access, and
+    select, iter_frames and query read only the requested rows and columns.
+
+    Reactors can be added from several threads at once. Each reactor is processed
+    outside the analyzer's lock and only appending its rows to the buffers, and
+    building the dataframes from them, is serialized.
+
     Attributes:
-        processed_reactors (List[ProcessedReactor]): List of processed reactors.
+        processed_reactors (ProcessedReactors): Sequence of processed reactors. How
+            much of their raw data is kept is set by the retention policy (see
+            csst.analyzer.retention).
         unprocessed_df (pd.DataFrame): Pandas dataframe of all unprocessed reactor data.
             Columns are 'reactor', 'polymer', 'solvent',
             'concentration', 'concentration_unit', 'set_temperature', 'temperature',
@@ -24,60 +66,419 @@ class Analyzer:
         df (pd.DataFrame): Processed reactor dataframe. Columns are 'reactor', 'polymer',
             'solvent', 'concentration', 'concentration_unit', 'temperature_unit', and
             all attributes in csst.processor.models.ProcessedTemperature.
+        dtype_backend (str): 'numpy' or 'pyarrow'. Column types of both dataframes
+            are set by csst.analyzer.schema for this backend.
+        layout (str): 'long' or 'normalized'. The long layout stores unprocessed_df.
+            The normalized layout stores experiment_samples and
+            reactor_transmissions instead, and joins them into unprocessed_df when
+            it is accessed. The joined dataframe is not stored, but it is reused
+            while the caller holds a reference to it and no reactors were added, so
+            keep it rather than accessing unprocessed_df repeatedly.
+        experiment_samples (pd.DataFrame): Normalized layout only. One row per
+            sample of each experiment with the columns of unprocessed_df shared by
+            the experiment's reactors (temperatures, time, stir rates, ramp state),
+            keyed by 'experiment' and 'sample_index'. Experiments are numbered from 0
+            in the order they are added.
+        reactor_transmissions (pd.DataFrame): Normalized layout only. One row per
+            sample of each reactor with the reactor labels, 'transmission',
+            'filtered_transmission' and 'transmission_unit', keyed by 'experiment',
+            'reactor' and 'sample_index'.
+        store (Optional[Path]): Directory the rows of an out-of-core analyzer are
+            written to. None for in-memory analyzers.
+        chunk_rows (int): Number of buffered rows written to the store at once.
     """
 
-    def __init__(self):
-        self.processed_reactors = []
-        columns = [
-            "reactor",
-            "polymer",
-            "solvent",
-            "concentration",
-            "concentration_unit",
-            "temperature_unit",
-        ]
-        unproc_columns = [
-            "temperature",
-            "transmission",
-            "filtered_transmission",
-            "set_temperature",
-            "time",
-            "time_unit",
-            "stir_rate",
-            "stir_rate_unit",
-            "bottom_stir_rate",
-            "bottom_stir_rate_unit",
-            "top_stir_rate",
-            "top_stir_rate_unit",
-            "ramp_state",
+    def __init__(
+        self,
+        dtype_backend: str = "numpy",
+        layout: str = "long",
+        store: Optional[Union[str, Path]] = None,
+        chunk_rows: int = 1_000_000,
+        retention: Optional[str] = None,
+        raw_budget_bytes: Optional[int] = None,
+        session=None,
+    ):
+        """Create an empty analyzer
+
+        Args:
+            dtype_backend: 'numpy' to store the dataframe columns in numpy backed
+                types (categoricals for labels) or 'pyarrow' for Arrow backed types.
+                See csst.analyzer.schema. Default 'numpy'.
+            layout: 'long' to store the unprocessed data in unprocessed_df, or
+                'normalized' to store the samples shared by an experiment's reactors
+                once (see experiment_samples and reactor_transmissions). Default
+                'long'.
+            store: directory to write the rows to, creating an out-of-core analyzer.
+                Must not contain rows of another analyzer. Only the long layout is
+                supported. Defaults to None, keeping the rows in memory.
+            chunk_rows: number of buffered unprocessed rows written to the store at
+                once. Default 1,000,000.
+            retention: 'all' to keep the raw data of every processed reactor,
+                'processed' to only keep their processed temperatures or 'lru' to
+                keep the raw data of the most recently used experiments within
+                raw_budget_bytes. Released raw data is reloaded from its file or
+                database id when a processed reactor is accessed. Only
+                processed_reactors is covered: unprocessed_df keeps every raw sample
+                unless the analyzer has a store. Defaults to
+                'processed' for out-of-core analyzers, so they run in bounded
+                memory, and 'all' otherwise.
+            raw_budget_bytes: byte budget of the 'lru' retention policy
+            session: database session used to reload raw data of experiments loaded
+                from the database
+        """
+        if layout not in ["long", "normalized"]:
+            msg = f"layout must be 'long' or 'normalized', not {layout}"
+            logger.warning(msg)
+            raise ValueError(msg)
+        if store is not None:
+            storage.check_pyarrow()
+            store = Path(store)
+            if layout != "long":
+                msg = "Out-of-core analyzers only support the long layout"
+                logger.warning(msg)
+                raise ValueError(msg)
+            if any(
+                (store / d).exists()
+                for d in [storage.PROCESSED_DIR, storage.UNPROCESSED_DIR]
+            ):
+                msg = f"Analyzer results were previously saved to {store}"
+                logger.warning(msg)
+                raise FileExistsError(msg)
+        if retention is None:
+            retention = "all" if store is None else "processed"
+        elif retention == "all" and store is not None:
+            logger.warning(
+                "Out-of-core analyzers with the 'all' retention policy keep the raw "
+                "data of every experiment in memory"
+            )
+        self.store = store
+        self.chunk_rows = chunk_rows
+        # guards the buffers, dataframes and the state derived from them
+        self._lock = threading.RLock()
+        # chunks written to the store and unprocessed rows buffered since
+        self._n_chunks = 0
+        self._buffered_rows = 0
+        loader = None
+        if session is not None:
+
+            def loader(experiment_id: int) -> Experiment:
+                from csst.db.getter import get_experiment_by_id
+
+                return get_experiment_by_id(experiment_id, session)
+
+        self.processed_reactors = ProcessedReactors(retention, raw_budget_bytes, loader)
+        self.dtype_backend = dtype_backend
+        self.layout = layout
+        self._df = empty_frame(PROCESSED_SCHEMA, dtype_backend)
+        # row ranges of df by polymer, solvent and concentration for query
+        self._index = PositionIndex()
+        # phase diagrams by (threshold, filtered), cleared when reactors are added
+        self._phase_diagrams = {}
+        self._unprocessed_df = empty_frame(UNPROCESSED_SCHEMA, dtype_backend)
+        self._samples = empty_frame(SAMPLE_SCHEMA, dtype_backend)
+        self._transmissions = empty_frame(TRANSMISSION_SCHEMA, dtype_backend)
+        self._samples_buffer = []
+        self._transmissions_buffer = []
+        # weak reference to the unprocessed_df last joined from the normalized
+        # layout. Cleared when reactors are added.
+        self._joined = None
+        # experiment number of each experiment key, the experiment_samples row each
+        # experiment starts at and the number of experiment_samples rows
+        self._experiment_numbers = {}
+        self._experiment_offsets = []
+        self._n_samples = 0
+        # per-reactor column buffers not yet added to the dataframes
+        self._df_buffer = []
+        self._unprocessed_df_buffer = []
+        # keys of the reactors added (see reactor_key)
+        self._reactor_keys = set()
+
+    @property
+    def df(self) -> pd.DataFrame:
+        if self.store is not None:
+            return self.select()
+        with self._lock:
+            if len(self._df_buffer) > 0:
+                self._df = self._concat_buffer(
+                    self._df, self._df_buffer, PROCESSED_SCHEMA
+                )
+                self._df_buffer = []
+            return self._df
+
+    @df.setter
+    def df(self, df: pd.DataFrame):
+        self._check_in_memory("df")
+        df = apply_schema(df, PROCESSED_SCHEMA, self.dtype_backend)
+        index = PositionIndex.from_frame(df)
+        with self._lock:
+            self._df = df
+            self._df_buffer = []
+            self._index = index
+            self._phase_diagrams = {}
+
+    @property
+    def unprocessed_df(self) -> pd.DataFrame:
+        if self.store is not None:
+            return self.select(unprocessed=True)
+        with self._lock:
+            if self.layout == "normalized":
+                df = self._joined() if self._joined is not None else None
+                if df is None:
+                    df = self._join_samples(self.reactor_transmissions)
+                    self._joined = weakref.ref(df)
+                return df
+            if len(self._unprocessed_df_buffer) > 0:
+                self._unprocessed_df = self._concat_buffer(
+                    self._unprocessed_df,
+                    self._unprocessed_df_buffer,
+                    UNPROCESSED_SCHEMA,
+                )
+                self._unprocessed_df_buffer = []
+            return self._unprocessed_df
+
+    @unprocessed_df.setter
+    def unprocessed_df(self, df: pd.DataFrame):
+        if self.layout == "normalized":
+            msg = "unprocessed_df can not be set with the normalized layout"
+            logger.warning(msg)
+            raise ValueError(msg)
+        self._check_in_memory("unprocessed_df")
+        df = apply_schema(df, UNPROCESSED_SCHEMA, self.dtype_backend)
+        with self._lock:
+            self._unprocessed_df = df
+            self._unprocessed_df_buffer = []
+
+    @property
+    def experiment_samples(self) -> pd.DataFrame:
+        self._check_normalized("experiment_samples")
+        with self._lock:
+            if len(self._samples_buffer) > 0:
+                self._samples = self._concat_buffer(
+                    self._samples, self._samples_buffer, SAMPLE_SCHEMA
+                )
+                self._samples_buffer = []
+            return self._samples
+
+    @property
+    def reactor_transmissions(self) -> pd.DataFrame:
+        self._check_normalized("reactor_transmissions")
+        with self._lock:
+            if len(self._transmissions_buffer) > 0:
+                self._transmissions = self._concat_buffer(
+                    self._transmissions,
+                    self._transmissions_buffer,
+                    TRANSMISSION_SCHEMA,
+                )
+                self._transmissions_buffer = []
+            return self._transmissions
+
+    def _check_in_memory(self, attribute: str):
+        if self.store is not None:
+            msg = f"{attribute} can not be set for out-of-core analyzers"
+            logger.warning(msg)
+            raise ValueError(msg)
+
+    def _check_out_of_core(self, attribute: str):
+        if self.store is None:
+            msg = f"{attribute} is only available for out-of-core analyzers"
+            logger.warning(msg)
+            raise ValueError(msg)
+
+    def _spill(self):
+        """Write the buffered rows to the store as a new chunk"""
+        for schema, buffer, directory in [
+            (PROCESSED_SCHEMA, self._df_buffer, storage.PROCESSED_DIR),
+            (UNPROCESSED_SCHEMA, self._unprocessed_df_buffer, storage.UNPROCESSED_DIR),
+        ]:
+            df = self._concat_buffer(
+                empty_frame(schema, self.dtype_backend), buffer, schema
+            )
+            storage.write_frame(df, self.store / directory, chunk=self._n_chunks)
+        self._n_chunks += 1
+        self._df_buffer = []
+        self._unprocessed_df_buffer = []
+        self._buffered_rows = 0
+
+    def select(
+        self,
+        polymer: Optional[Union[str, List[str]]] = None,
+        solvent: Optional[Union[str, List[str]]] = None,
+        filters: Optional[List[tuple]] = None,
+        columns: Optional[List[str]] = None,
+        unprocessed: bool = False,
+    ) -> pd.DataFrame:
+        """Read rows of an out-of-core analyzer from its store
+
+        Rows are grouped by polymer and solvent. Arguments are the same as
+        Analyzer.load.
+
+        Args:
+            unprocessed: if rows of unprocessed_df are read instead of df
+        """
+        self._check_out_of_core("select")
+        directory, schema = self._store_dataset(unprocessed)
+        return storage.read_frame(
+            directory,
+            schema,
+            filters=storage.to_filters(polymer, solvent, filters),
+            columns=columns,
+            dtype_backend=self.dtype_backend,
+        )
+
+    def iter_frames(
+        self,
+        polymer: Optional[Union[str, List[str]]] = None,
+        solvent: Optional[Union[str, List[str]]] = None,
+        filters: Optional[List[tuple]] = None,
+        columns: Optional[List[str]] = None,
+        unprocessed: bool = False,
+        batch_rows: int = 1_000_000,
+    ) -> Iterator[pd.DataFrame]:
+        """Stream rows of an out-of-core analyzer from its store in batches of at
+        most batch_rows rows, so they can be aggregated with bounded memory
+
+        Arguments are the same as Analyzer.select.
+        """
+        self._check_out_of_core("iter_frames")
+        directory, schema = self._store_dataset(unprocessed)
+        return storage.iter_frames(
+            directory,
+            schema,
+            filters=storage.to_filters(polymer, solvent, filters),
+            columns=columns,
+            dtype_backend=self.dtype_backend,
+            batch_rows=batch_rows,
+        )
+
+    def _store_dataset(self, unprocessed: bool) -> Tuple[Path, Dict[str, str]]:
+        """Store directory and schema of df or unprocessed_df. Writes buffered rows
+        first."""
+        with self._lock:
+            if len(self._df_buffer) > 0 or len(self._unprocessed_df_buffer) > 0:
+                self._spill()
+        if unprocessed:
+            return self.store / storage.UNPROCESSED_DIR, UNPROCESSED_SCHEMA
+        return self.store / storage.PROCESSED_DIR, PROCESSED_SCHEMA
+
+    def _check_normalized(self, attribute: str):
+        if self.layout != "normalized":
+            msg = f"{attribute} is only available with the normalized layout"
+            logger.warning(msg)
+            raise ValueError(msg)
+
+    def _join_samples(self, transmissions: pd.DataFrame) -> pd.DataFrame:
+        """Long format of reactor transmission rows joined with their experiment
+        samples
+
+        Each experiment's samples are stored contiguously in sample order, so the
+        sample row of every transmission row is found by position rather than by a
+        merge.
+        """
+        samples = self.experiment_samples
+        offsets = np.asarray(self._experiment_offsets, dtype=np.int64)
+        experiments = np.asarray(transmissions["experiment"], dtype=np.int64)
+        sample_index = np.asarray(transmissions["sample_index"], dtype=np.int64)
+        shared = samples.drop(columns=["experiment", "sample_index"]).iloc[
+            offsets[experiments] + sample_index
         ]
-        self.unprocessed_df = pd.DataFrame(columns=columns + unproc_columns)
-        proc_columns = list(ProcessedTemperature.__fields__.keys())
-        self.df = pd.DataFrame(columns=columns + proc_columns)
+        df = pd.concat(
+            [
+                transmissions.drop(columns=["experiment", "sample_index"]).reset_index(
+                    drop=True
+                ),
+                shared.reset_index(drop=True),
+            ],
+            axis=1,
+        )
+        df.index = sample_index
+        return df[[col for col in UNPROCESSED_SCHEMA if col in df.columns]]
+
+    def _concat_buffer(
+        self, df: pd.DataFrame, buffer: List[dict], schema: Dict[str, str]
+    ) -> pd.DataFrame:
+        """Append the buffered per-reactor columns to the dataframe with one concat
+
+        Scalar labels are broadcast as categoricals with a single category, so no
+        per-row strings are created.
+        """
+        frames = [df]
+        for columns in buffer:
+            n = next((len(v) for v in columns.values() if np.ndim(v) > 0), 0)
+            data = {}
+            for col, value in columns.items():
+                if (
+                    self.dtype_backend == "numpy"
+                    and schema.get(col) == "category"
+                    and np.ndim(value) == 0
+                    and value is not None
+                ):
+                    value = pd.Categorical.from_codes(
+                        np.zeros(n, dtype=np.int8), categories=[value]
+                    )
+                data[col] = value
+            frames.append(pd.DataFrame(data))
+        return concat_frames(frames, schema, self.dtype_backend)
 
     def add_experiment_reactors(self, experiment: Experiment, temp_range=1):
         """Adds experiment reactors to Analyzer.reactors list and extends
         Analyzer.df with the new reactor data
         """
-        for reactor in experiment.reactors:
+        self.add_reactors(experiment.reactors, temp_range)
+
+    def add_experiments(self, experiments: List[Experiment], temp_range=1):
+        """Adds the reactors of every experiment (see add_reactors)"""
+        self.add_reactors(
+            [reactor for experiment in experiments for reactor in experiment.reactors],
+            temp_range,
+        )
+
+    def add_reactors(self, reactors: List[Reactor], temp_range=1):
+        """Adds reactors to Analyzer.reactors list and buffers their data for
+        Analyzer.df and Analyzer.unprocessed_df
+
+        Reactors previously added, or repeated in reactors, are skipped.
+        """
+        for reactor in reactors:
             self.add_reactor(reactor, temp_range)
 
     def add_reactor(self, reactor: Reactor, temp_range=1):
         """Adds reactor to Analyzer.reactors list and extends
         Analyzer.df with the new reactor data
         """
-        if reactor in [
-            reactor.unprocessed_reactor for reactor in self.processed_reactors
-        ]:
-            logger.warning(
-                f"Analyzer is not adding the reactor {str(reactor)} because it was previously added"
-            )
-            return
-        reactor = process_reactor(reactor, temp_range)
-        self.processed_reactors.append(reactor)
-        # add processed data
-        rows = []
-        row = {
+        with span("analyzer.add_reactor", rows=len(reactor.transmission.values)):
+            self._add_reactor(reactor, temp_range)
+
+    def _add_reactor(self, reactor: Reactor, temp_range=1):
+        """Adds the reactor (see add_reactor)
+
+        The reactor is processed outside the lock, so only appending its rows to the
+        buffers is serialized between threads.
+        """
+        key = reactor_key(reactor)
+        with self._lock:
+            if key in self._reactor_keys:
+                logger.warning(
+                    f"Analyzer is not adding the reactor {str(reactor)} because it was previously added"
+                )
+                return
+            # reserve the key so a reactor added from several threads is processed
+            # once
+            self._reactor_keys.add(key)
+        try:
+            reactor = process_reactor(reactor, temp_range)
+            columns = self._processed_columns(reactor)
+            unprocessed_columns = self._unprocessed_columns(reactor)
+        except Exception:
+            with self._lock:
+                self._reactor_keys.discard(key)
+            raise
+        with self._lock:
+            self._append(key, reactor, columns, unprocessed_columns)
+
+    @staticmethod
+    def _processed_columns(reactor: ProcessedReactor) -> dict:
+        """Buffer columns of the processed data of the reactor"""
+        columns = {
             "polymer": reactor.unprocessed_reactor.polymer,
             "solvent": reactor.unprocessed_reactor.solvent,
             "concentration": reactor.unprocessed_reactor.conc.value,
@@ -86,62 +487,358 @@ class Analyzer:
             "transmission_unit": reactor.unprocessed_reactor.transmission.unit,
             "reactor": str(reactor.unprocessed_reactor),
         }
-        for temp in reactor.temperatures:
-            for field in temp.__fields__:
-                row[field] = getattr(temp, field)
-            rows.append(row.copy())
-        df = pd.DataFrame(rows)
-        self.df = pd.concat([self.df, df])
-        self.df["filtered"] = self.df["filtered"].astype(bool)
-
-        # add unprocessed data
-        rows = []
-        row = {
-            "polymer": reactor.unprocessed_reactor.polymer,
-            "solvent": reactor.unprocessed_reactor.solvent,
-            "concentration": reactor.unprocessed_reactor.conc.value,
-            "concentration_unit": reactor.unprocessed_reactor.conc.unit,
-            "temperature_unit": reactor.unprocessed_reactor.experiment.actual_temperature.unit,
-            "time_unit": reactor.unprocessed_reactor.experiment.time_since_experiment_start.unit,
-            "reactor": str(reactor.unprocessed_reactor),
-            "stir_rate_unit": reactor.unprocessed_reactor.experiment.stir_rates.unit,
-            "transmission_unit": reactor.unprocessed_reactor.transmission.unit,
+        for field in ProcessedTemperature.__fields__:
+            columns[field] = [getattr(temp, field) for temp in reactor.temperatures]
+        return columns
+
+    @staticmethod
+    def _unprocessed_columns(reactor: ProcessedReactor) -> dict:
+        """Buffer columns of the unprocessed data of the reactor. Arrays are used as
+        columns directly and scalars are broadcast when the dataframe is built."""
+        unprocessed = reactor.unprocessed_reactor
+        experiment = unprocessed.experiment
+        columns = {
+            "polymer": unprocessed.polymer,
+            "solvent": unprocessed.solvent,
+            "concentration": unprocessed.conc.value,
+            "concentration_unit": unprocessed.conc.unit,
+            "temperature_unit": experiment.actual_temperature.unit,
+            "time_unit": experiment.time_since_experiment_start.unit,
+            "reactor": str(unprocessed),
+            "stir_rate_unit": experiment.stir_rates.unit,
+            "transmission_unit": unprocessed.transmission.unit,
+            "temperature": np.asarray(experiment.actual_temperature.values),
+            "transmission": np.asarray(unprocessed.transmission.values),
+            "filtered_transmission": np.asarray(
+                unprocessed.filtered_transmission.values
+            ),
+            "time": np.asarray(experiment.time_since_experiment_start.values),
+            "set_temperature": np.asarray(experiment.set_temperature.values),
+            "stir_rate": np.asarray(experiment.stir_rates.values),
+            "ramp_state": np.asarray(experiment.ramp_state, dtype=object),
         }
-        if reactor.unprocessed_reactor.experiment.bottom_stir_rate is not None:
-            row[
-                "bottom_stir_rate"
-            ] = reactor.unprocessed_reactor.experiment.bottom_stir_rate.value
-            row[
-                "bottom_stir_rate_unit"
-            ] = reactor.unprocessed_reactor.experiment.bottom_stir_rate.unit
-        if reactor.unprocessed_reactor.experiment.top_stir_rate is not None:
-            row["top_stir_rate"] = reactor.unprocessed_reactor.experiment.top_stir_rate
-            row[
-                "top_stir_rate_unit"
-            ] = reactor.unprocessed_reactor.experiment.top_stir_rate.unit
-
-        for i in range(
-            len(reactor.unprocessed_reactor.experiment.actual_temperature.values)
-        ):
-            row[
-                "temperature"
-            ] = reactor.unprocessed_reactor.experiment.actual_temperature.values[i]
-            row["transmission"] = reactor.unprocessed_reactor.transmission.values[i]
-            row[
-                "filtered_transmission"
-            ] = reactor.unprocessed_reactor.filtered_transmission.values[i]
-            row[
-                "time"
-            ] = reactor.unprocessed_reactor.experiment.time_since_experiment_start.values[
-                i
-            ]
-            row[
-                "set_temperature"
-            ] = reactor.unprocessed_reactor.experiment.set_temperature.values[i]
-            row["stir_rate"] = reactor.unprocessed_reactor.experiment.stir_rates.values[
-                i
-            ]
-            row["ramp_state"] = reactor.unprocessed_reactor.experiment.ramp_state[i]
-            rows.append(row.copy())
-        df = pd.DataFrame(rows)
-        self.unprocessed_df = pd.concat([self.unprocessed_df, df])
+        if experiment.bottom_stir_rate is not None:
+            columns["bottom_stir_rate"] = experiment.bottom_stir_rate.value
+            columns["bottom_stir_rate_unit"] = experiment.bottom_stir_rate.unit
+        if experiment.top_stir_rate is not None:
+            columns["top_stir_rate"] = experiment.top_stir_rate.value
+            columns["top_stir_rate_unit"] = experiment.top_stir_rate.unit
+        return columns
+
+    def _append(
+        self,
+        key: tuple,
+        reactor: ProcessedReactor,
+        columns: dict,
+        unprocessed_columns: dict,
+    ):
+        """Append a processed reactor and its buffer columns. Called with the lock
+        held."""
+        self.processed_reactors.append(reactor, key)
+        self._df_buffer.append(columns)
+        self._phase_diagrams = {}
+        self._index.append(
+            columns["polymer"],
+            columns["solvent"],
+            columns["concentration"],
+            len(reactor.temperatures),
+        )
+
+        columns = unprocessed_columns
+        if self.layout == "long":
+            self._unprocessed_df_buffer.append(columns)
+            if self.store is not None:
+                self._buffered_rows += len(columns["temperature"])
+                if self._buffered_rows >= self.chunk_rows:
+                    self._spill()
+            return
+
+        # split the columns into the experiment samples, added once per experiment,
+        # and the reactor transmissions
+        self._joined = None
+        experiment_key = key[0]
+        number = self._experiment_numbers.get(experiment_key)
+        n = len(columns["temperature"])
+        columns["sample_index"] = np.arange(n, dtype=np.int32)
+        new_experiment = number is None
+        if new_experiment:
+            number = len(self._experiment_numbers)
+            self._experiment_numbers[experiment_key] = number
+        columns["experiment"] = number
+        if new_experiment:
+            self._experiment_offsets.append(self._n_samples)
+            self._n_samples += n
+            self._samples_buffer.append(
+                {col: columns[col] for col in SAMPLE_SCHEMA if col in columns}
+            )
+        self._transmissions_buffer.append(
+            {col: columns[col] for col in TRANSMISSION_SCHEMA if col in columns}
+        )
+
+    def query(
+        self,
+        polymer: Optional[str] = None,
+        solvent: Optional[str] = None,
+        conc_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        state: Optional[str] = None,
+        filtered: Optional[bool] = None,
+    ) -> pd.DataFrame:
+        """Rows of Analyzer.df matching the selection
+
+        Rows are looked up in an index of the reactors' row ranges kept up to date
+        as reactors are added (see csst.analyzer.index), so only the selected rows
+        are read. Out-of-core analyzers push the selection down to the store.
+
+        Args:
+            polymer: polymer of the rows. Defaults to all polymers.
+            solvent: solvent of the rows. Defaults to all solvents.
+            conc_range: (low, high) concentrations, both inclusive. Either can be None
+                to leave that side open. Defaults to all concentrations.
+            state: 'heating', 'cooling' or 'holding' to only select rows in that
+                state. Defaults to all states.
+            filtered: if only filtered (True) or unfiltered (False) rows are
+                selected. Defaults to both.
+        """
+        if state is not None and state not in ["heating", "cooling", "holding"]:
+            msg = f"state must be 'heating', 'cooling' or 'holding', not {state}"
+            logger.warning(msg)
+            raise ValueError(msg)
+        if self.store is not None:
+            # filters are pushed down to the store
+            filters = []
+            if conc_range is not None and conc_range[0] is not None:
+                filters.append(("concentration", ">=", conc_range[0]))
+            if conc_range is not None and conc_range[1] is not None:
+                filters.append(("concentration", "<=", conc_range[1]))
+            if state is not None:
+                filters.append((state, "=", 1))
+            if filtered is not None:
+                filters.append(("filtered", "=", filtered))
+            return self.select(polymer, solvent, filters=filters)
+        with self._lock:
+            df = self.df
+            positions = self._index.positions(polymer, solvent, conc_range)
+        if state is not None:
+            positions = positions[df[state].to_numpy()[positions] == 1]
+        if filtered is not None:
+            positions = positions[df.filtered.to_numpy()[positions] == filtered]
+        return df.iloc[positions]
+
+    def phase_diagram(
+        self,
+        polymer: Optional[str] = None,
+        solvent: Optional[str] = None,
+        threshold: float = 50,
+        filtered: bool = True,
+    ) -> pd.DataFrame:
+        """Transition temperature against concentration of each polymer and solvent
+
+        The clear and cloud points of every reactor are found from the processed
+        heating and cooling curves in df and grouped by polymer, solvent,
+        concentration and transition (see csst.analyzer.phase). The phase diagram of
+        all pairs is computed once and reused until reactors are added.
+
+        Args:
+            polymer: polymer to select. Defaults to all polymers.
+            solvent: solvent to select. Defaults to all solvents.
+            threshold: transmission that marks the transition
+            filtered: if the processed filtered transmission is used
+
+        Returns:
+            Dataframe with 'polymer', 'solvent', 'concentration',
+            'concentration_unit', 'transition', 'temperature_unit', 'count',
+            'temperature', 'temperature_std', 'temperature_min' and
+            'temperature_max' columns.
+        """
+        key = (threshold, filtered)
+        with self._lock:
+            # adding reactors replaces the cache, so a diagram computed while
+            # reactors are added is not cached for the new reactors
+            cache = self._phase_diagrams
+            diagram = cache.get(key)
+            if diagram is None and self.store is None:
+                df = self.df
+        if diagram is None:
+            if self.store is not None:
+                df = self.select(columns=phase.COLUMNS)
+            diagram = phase.phase_diagram(
+                phase.transition_points(df, threshold, filtered)
+            )
+            cache[key] = diagram
+        if polymer is not None:
+            diagram = diagram[diagram.polymer == polymer]
+        if solvent is not None:
+            diagram = diagram[diagram.solvent == solvent]
+        return diagram.reset_index(drop=True)
+
+    def get_transition_temperatures(
+        self, threshold: float = 50, filtered: bool = True
+    ) -> pd.DataFrame:
+        """Cloud and clear points of every reactor added to the analyzer
+
+        Reactors are processed one experiment at a time, so with a retention policy
+        that releases raw data only one reloaded experiment is held at once. See
+        csst.processor.transitions.find_transition_temperatures
+        """
+        dfs = []
+        reactors = []
+        for processed in self.processed_reactors:
+            reactor = processed.unprocessed_reactor
+            if len(reactors) > 0 and reactor.experiment is not reactors[0].experiment:
+                dfs.append(
+                    find_transition_temperatures(
+                        reactors, threshold=threshold, filtered=filtered
+                    )
+                )
+                reactors = []
+            reactors.append(reactor)
+        dfs.append(
+            find_transition_temperatures(
+                reactors, threshold=threshold, filtered=filtered
+            )
+        )
+        if len(dfs) == 1:
+            return dfs[0]
+        return pd.concat(dfs, ignore_index=True)
+
+    def save(self, path: Union[str, Path], overwrite: bool = False):
+        """Save df and unprocessed_df as Parquet datasets partitioned by polymer and
+        solvent (see csst.analyzer.storage)
+
+        The datasets are written to the 'processed' and 'unprocessed' directories in
+        path. processed_reactors are not saved. The store of an out-of-core analyzer
+        is copied.
+
+        Args:
+            path: directory to save the analyzer to
+            overwrite: if datasets previously saved to path are replaced. Otherwise
+                a FileExistsError is raised if they exist.
+        """
+        path = Path(path)
+        if self.store is not None and path.resolve() == self.store.resolve():
+            with self._lock:
+                self._spill()
+            return
+        dirs = [path / storage.PROCESSED_DIR, path / storage.UNPROCESSED_DIR]
+        existing = [d for d in dirs if d.exists()]
+        if len(existing) > 0:
+            if not overwrite:
+                msg = f"Analyzer results were previously saved to {path}"
+                logger.warning(msg)
+                raise FileExistsError(msg)
+            for d in existing:
+                shutil.rmtree(d)
+        if self.store is not None:
+            with self._lock:
+                self._spill()
+            shutil.copytree(self.store / storage.PROCESSED_DIR, dirs[0])
+            shutil.copytree(self.store / storage.UNPROCESSED_DIR, dirs[1])
+            return
+        storage.write_frame(self.df, dirs[0])
+        storage.write_frame(self.unprocessed_df, dirs[1])
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        polymer: Optional[Union[str, List[str]]] = None,
+        solvent: Optional[Union[str, List[str]]] = None,
+        filters: Optional[List[tuple]] = None,
+        columns: Optional[List[str]] = None,
+        unprocessed: bool = True,
+        dtype_backend: str = "numpy",
+    ) -> "Analyzer":
+        """Load an analyzer saved with Analyzer.save
+
+        Only the files of the selected polymers and solvents are read. Rows are
+        grouped by polymer and solvent and processed_reactors is empty.
+
+        Args:
+            path: directory the analyzer was saved to
+            polymer: polymer or polymers to load. Defaults to all polymers.
+            solvent: solvent or solvents to load. Defaults to all solvents.
+            filters: other pyarrow filters applied to both dataframes, e.g.
+                [('concentration', '>=', 5)]
+            columns: columns to load. Columns not in a dataframe are ignored.
+                Defaults to all columns.
+            unprocessed: if unprocessed_df is loaded. Otherwise it is empty.
+            dtype_backend: see Analyzer
+        """
+        path = Path(path)
+        if not path.is_dir():
+            msg = f"No analyzer results were saved to {path}"
+            logger.warning(msg)
+            raise LookupError(msg)
+        filters = storage.to_filters(polymer, solvent, filters)
+        analyzer = cls(dtype_backend=dtype_backend)
+        analyzer.df = storage.read_frame(
+            path / storage.PROCESSED_DIR,
+            PROCESSED_SCHEMA,
+            filters=filters,
+            columns=columns,
+            dtype_backend=dtype_backend,
+        )
+        if unprocessed:
+            analyzer.unprocessed_df = storage.read_frame(
+                path / storage.UNPROCESSED_DIR,
+                UNPROCESSED_SCHEMA,
+                filters=filters,
+                columns=columns,
+                dtype_backend=dtype_backend,
+            )
+        return analyzer
+
+
+def experiment_key(experiment: Experiment) -> tuple:
+    """Key identifying an experiment. Experiments with the same key are duplicates.
+
+    The key is made of the experiment file name, start and number, and fingerprints
+    of its time, actual temperature, set temperature and reactor transmission values
+    (see KEY_SAMPLES), so experiments without a file name, start or number (e.g.,
+    created in code) are still told apart by their data.
+    """
+    return (
+        getattr(experiment, "file_name", None),
+        getattr(experiment, "start_of_experiment", None),
+        getattr(experiment, "experiment_number", None),
+        _fingerprint(experiment.time_since_experiment_start),
+        _fingerprint(experiment.actual_temperature),
+        _fingerprint(experiment.set_temperature),
+        tuple(_fingerprint(reactor.transmission) for reactor in experiment.reactors),
+    )
+
+
+def reactor_key(reactor: Reactor) -> tuple:
+    """Key identifying a reactor. Reactors with the same key are duplicates.
+
+    The key is made of the experiment key (see experiment_key), the reactor number,
+    polymer, solvent and concentration and a fingerprint of the reactor
+    transmission, so it is cheap to compute and hash compared to comparing reactors
+    and their transmission arrays.
+    """
+    return (
+        experiment_key(reactor.experiment),
+        reactor.reactor_number,
+        reactor.polymer,
+        reactor.solvent,
+        reactor.conc.value,
+        reactor.conc.unit,
+        _fingerprint(reactor.transmission),
+    )
+
+
+def _fingerprint(values) -> tuple:
+    """Number of values and hash of up to KEY_SAMPLES evenly spaced values,
+    including the first and last, of PropertyValues"""
+    values = getattr(values, "values", None)
+    if values is None:
+        return (0, None)
+    n = len(values)
+    if n == 0:
+        return (0, None)
+    step = max(n // KEY_SAMPLES, 1)
+    positions = list(range(0, n, step))
+    if positions[-1] != n - 1:
+        positions.append(n - 1)
+    sampled = np.asarray([values[i] for i in positions], dtype=np.float64)
+    return (n, hash(sampled.tobytes()))
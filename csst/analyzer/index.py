@@ -0,0 +1,154 @@
+"""Position index of the rows of Analyzer.df
+
+The rows of each reactor are contiguous in Analyzer.df, so the index stores one
+(concentration, start, stop) row range per reactor, grouped by polymer and solvent.
+Looking up a polymer, solvent and concentration range costs a dictionary lookup and a
+binary search over the reactors of that polymer and solvent instead of a scan over
+every row of the dataframe.
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class _Ranges:
+    """Row ranges of the reactors of one polymer and solvent"""
+
+    __slots__ = ("concentrations", "starts", "stops", "_sorted")
+
+    def __init__(self):
+        self.concentrations = []
+        self.starts = []
+        self.stops = []
+        self._sorted = None
+
+    def add(self, concentration: float, start: int, stop: int):
+        self.concentrations.append(concentration)
+        self.starts.append(start)
+        self.stops.append(stop)
+        self._sorted = None
+
+    def sorted(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Concentrations, starts and stops sorted by concentration"""
+        if self._sorted is None:
+            concentrations = np.asarray(self.concentrations, dtype=float)
+            order = np.argsort(concentrations, kind="stable")
+            self._sorted = (
+                concentrations[order],
+                np.asarray(self.starts, dtype=np.int64)[order],
+                np.asarray(self.stops, dtype=np.int64)[order],
+            )
+        return self._sorted
+
+
+class PositionIndex:
+    """Row ranges of Analyzer.df by polymer, solvent and concentration
+
+    Attributes:
+        n_rows (int): number of rows indexed
+    """
+
+    def __init__(self):
+        self._ranges: Dict[Tuple[str, str], _Ranges] = {}
+        self.n_rows = 0
+
+    def append(self, polymer: str, solvent: str, concentration: float, n_rows: int):
+        """Index the next n_rows rows as rows of one reactor"""
+        ranges = self._ranges.get((polymer, solvent))
+        if ranges is None:
+            ranges = self._ranges[(polymer, solvent)] = _Ranges()
+        ranges.add(concentration, self.n_rows, self.n_rows + n_rows)
+        self.n_rows += n_rows
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PositionIndex":
+        """Index of a dataframe with 'reactor', 'polymer', 'solvent' and
+        'concentration' columns
+
+        Each run of consecutive rows with the same values is indexed as one range.
+        Missing columns (e.g., of a dataframe loaded with a subset of the columns)
+        are indexed as None.
+        """
+        index = cls()
+        n = len(df)
+        if n == 0:
+            return index
+        columns = {
+            col: np.asarray(df[col].astype(object))
+            if col in df.columns
+            else np.full(n, None, dtype=object)
+            for col in ["reactor", "polymer", "solvent", "concentration"]
+        }
+        changed = np.zeros(n, dtype=bool)
+        changed[0] = True
+        for values in columns.values():
+            changed[1:] |= values[1:] != values[:-1]
+        starts = np.flatnonzero(changed)
+        stops = np.append(starts[1:], n)
+        polymers = columns["polymer"][starts]
+        solvents = columns["solvent"][starts]
+        concentrations = columns["concentration"][starts].astype(float)
+        for polymer, solvent, concentration, start, stop in zip(
+            polymers, solvents, concentrations, starts, stops
+        ):
+            index.append(polymer, solvent, concentration, stop - start)
+        return index
+
+    def positions(
+        self,
+        polymer: Optional[str] = None,
+        solvent: Optional[str] = None,
+        conc_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+    ) -> np.ndarray:
+        """Sorted positions of the rows matching the selection
+
+        Args:
+            polymer: polymer of the rows. Defaults to all polymers.
+            solvent: solvent of the rows. Defaults to all solvents.
+            conc_range: (low, high) concentrations, both inclusive. Either can be None
+                to leave that side open. Defaults to all concentrations.
+        """
+        if polymer is not None and solvent is not None:
+            keys = [(polymer, solvent)] if (polymer, solvent) in self._ranges else []
+        else:
+            keys = [
+                key
+                for key in self._ranges
+                if (polymer is None or key[0] == polymer)
+                and (solvent is None or key[1] == solvent)
+            ]
+        low, high = conc_range if conc_range is not None else (None, None)
+        starts: List[np.ndarray] = []
+        stops: List[np.ndarray] = []
+        for key in keys:
+            concentrations, key_starts, key_stops = self._ranges[key].sorted()
+            first = 0
+            last = len(concentrations)
+            if low is not None:
+                first = np.searchsorted(concentrations, low, side="left")
+            if high is not None:
+                last = np.searchsorted(concentrations, high, side="right")
+            starts.append(key_starts[first:last])
+            stops.append(key_stops[first:last])
+        if len(starts) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return _expand_ranges(np.concatenate(starts), np.concatenate(stops))
+
+
+def _expand_ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Sorted positions in the [start, stop) ranges"""
+    order = np.argsort(starts, kind="stable")
+    starts, stops = starts[order], stops[order]
+    lengths = stops - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    # each position is its range's start plus its offset in the range
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    return np.repeat(starts, lengths) + offsets
@@ -0,0 +1,148 @@
+"""Phase diagrams of polymer/solvent pairs from processed reactor data
+
+The clear point of a reactor is the temperature its processed heating curve
+(average transmission against temperature) rises above a transmission threshold,
+and the cloud point the temperature its processed cooling curve falls below it.
+Transition points of every reactor are found in one vectorized pass over the
+processed rows, then grouped by polymer, solvent, concentration and transition into
+a phase diagram with the number of reactors and the spread of their temperatures.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# processed columns used to find transition points
+COLUMNS = [
+    "reactor",
+    "polymer",
+    "solvent",
+    "concentration",
+    "concentration_unit",
+    "temperature_unit",
+    "average_temperature",
+    "average_transmission",
+    "heating",
+    "cooling",
+    "filtered",
+]
+GROUP_COLUMNS = [
+    "polymer",
+    "solvent",
+    "concentration",
+    "concentration_unit",
+    "transition",
+    "temperature_unit",
+]
+
+
+def reactor_runs(df: pd.DataFrame) -> np.ndarray:
+    """Number of the reactor of each row of processed data, counting from 0
+
+    Each reactor's rows are contiguous and ordered by temperature (see
+    Analyzer.df), so a reactor starts where the reactor label changes or the
+    temperature decreases. Reactor labels repeat across experiments, so reactors are
+    told apart by these runs rather than by their labels.
+
+    Args:
+        df: processed data with 'reactor' and 'average_temperature' columns
+    """
+    n = len(df)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    reactors = np.asarray(df["reactor"].astype(object))
+    temps = df["average_temperature"].to_numpy(dtype=np.float64)
+    new_reactor = np.ones(n, dtype=bool)
+    new_reactor[1:] = (reactors[1:] != reactors[:-1]) | (temps[1:] < temps[:-1])
+    return np.cumsum(new_reactor) - 1
+
+
+def transition_points(
+    df: pd.DataFrame, threshold: float = 50, filtered: bool = True
+) -> pd.DataFrame:
+    """Clear and cloud point of each reactor in the processed data
+
+    Reactors are told apart by reactor_runs. Temperatures are linearly interpolated
+    between the processed temperatures on either side of the threshold. Reactors
+    whose curve does not cross the threshold have no transition point.
+
+    Args:
+        df: processed data with COLUMNS
+        threshold: transmission that marks the transition
+        filtered: if the processed filtered transmission is used instead of the raw
+            transmission
+
+    Returns:
+        Dataframe with 'polymer', 'solvent', 'concentration', 'concentration_unit',
+        'reactor', 'transition' ('clear' or 'cloud'), 'temperature' and
+        'temperature_unit' columns and one row per transition point.
+    """
+    labels = ["polymer", "solvent", "concentration", "concentration_unit", "reactor"]
+    columns = labels + ["transition", "temperature", "temperature_unit"]
+    n = len(df)
+    if n == 0:
+        return pd.DataFrame(columns=columns)
+    temps = df["average_temperature"].to_numpy(dtype=np.float64)
+    runs = reactor_runs(df)
+
+    heating = df["heating"].to_numpy() == 1
+    cooling = df["cooling"].to_numpy() == 1
+    rows = np.flatnonzero((df["filtered"].to_numpy() == filtered) & (heating | cooling))
+    # curve of each row: 2 per reactor, heating then cooling. The stable sort keeps
+    # each curve in temperature order.
+    curves = 2 * runs[rows] + cooling[rows]
+    rows = rows[np.argsort(curves, kind="stable")]
+    curves = 2 * runs[rows] + cooling[rows]
+    x = temps[rows]
+    y = df["average_transmission"].to_numpy(dtype=np.float64)[rows]
+
+    # crossings from below to above the threshold as temperature increases. The
+    # clear point is the first while heating, the cloud point the last while cooling
+    # as that is the first crossing the reactor sees while the temperature falls.
+    crossed = np.flatnonzero(
+        (curves[:-1] == curves[1:]) & (y[:-1] < threshold) & (y[1:] >= threshold)
+    )
+    is_cooling = (curves[crossed] % 2) == 1
+    _, first = np.unique(curves[crossed], return_index=True)
+    _, last = np.unique(curves[crossed][::-1], return_index=True)
+    last = len(crossed) - 1 - last
+    crossed = np.sort(np.where(is_cooling[first], crossed[last], crossed[first]))
+
+    frac = (threshold - y[crossed]) / (y[crossed + 1] - y[crossed])
+    points = df.iloc[rows[crossed]][labels + ["temperature_unit"]].reset_index(
+        drop=True
+    )
+    points["transition"] = np.where(curves[crossed] % 2 == 1, "cloud", "clear")
+    points["temperature"] = x[crossed] + frac * (x[crossed + 1] - x[crossed])
+    return points[columns]
+
+
+def phase_diagram(points: pd.DataFrame) -> pd.DataFrame:
+    """Phase diagram of the transition points of transition_points
+
+    Returns:
+        Dataframe with one row per polymer, solvent, concentration and transition,
+        sorted by them, with the number of reactors ('count') and the mean
+        ('temperature'), standard deviation ('temperature_std'), minimum and maximum
+        of their transition temperatures.
+    """
+    columns = GROUP_COLUMNS + [
+        "count",
+        "temperature",
+        "temperature_std",
+        "temperature_min",
+        "temperature_max",
+    ]
+    if len(points) == 0:
+        return pd.DataFrame(columns=columns)
+    # categoricals would group every combination of categories
+    grouped = points.astype(
+        {col: object for col in GROUP_COLUMNS if points[col].dtype == "category"}
+    )
+    grouped = grouped.groupby(GROUP_COLUMNS, sort=True).temperature.agg(
+        ["count", "mean", "std", "min", "max"]
+    )
+    grouped.columns = columns[len(GROUP_COLUMNS) :]
+    return grouped.reset_index()[columns]
@@ -1,68 +1,424 @@
+import logging
+from typing import List, Optional, Tuple
+
 import matplotlib
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.collections import LineCollection, PolyCollection
 from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 
 from csst.experiment import Experiment
+from csst.analyzer.phase import reactor_runs
 
 __version__ = "0.1.0"
 
+logger = logging.getLogger(__name__)
+
 # Colorblind friendly colors
 cmap = ["#2D3142", "#E1DAAE", "#058ED9", "#848FA2"]
 tempc = "#CC2D35"
+FONT = {"size": 18}
+RAMPS = ["heating", "cooling", "holding"]
+# line styles of the ramp states drawn on the same axes
+RAMP_LINESTYLES = {"heating": "solid", "cooling": "dashed", "holding": "dotted"}
+
+
+def decimate(
+    x: np.ndarray, ys: np.ndarray, max_points: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Min/max envelope of several series sharing x with at most max_points points
+    per series
+
+    The samples are split into max_points // 2 bins and the minimum and maximum of
+    each series in each bin are kept in sample order, so every spike is still drawn
+    at screen resolution. All series are decimated at once.
+
+    Args:
+        x: x values of the samples, shape (n,)
+        ys: y values of each series, shape (n_series, n)
+        max_points: maximum number of points kept per series. At least 2.
+
+    Returns:
+        x and y values of the kept points of each series, both shaped
+        (n_series, n_kept). Series with at most max_points samples are returned
+        unchanged.
+    """
+    if max_points < 2:
+        msg = f"max_points must be at least 2, not {max_points}"
+        logger.warning(msg)
+        raise ValueError(msg)
+    x = np.asarray(x, dtype=np.float64)
+    ys = np.atleast_2d(np.asarray(ys, dtype=np.float64))
+    n = ys.shape[1]
+    if n <= max_points:
+        return np.broadcast_to(x, ys.shape), ys
+    size = int(np.ceil(n / (max_points // 2)))
+    n_bins = int(np.ceil(n / size))
+    # pad to whole bins with values never picked as a minimum or maximum
+    padded = np.full((ys.shape[0], n_bins * size), np.nan)
+    padded[:, :n] = ys
+    bins = padded.reshape(ys.shape[0], n_bins, size)
+    mins = np.argmin(np.where(np.isnan(bins), np.inf, bins), axis=2)
+    maxs = np.argmax(np.where(np.isnan(bins), -np.inf, bins), axis=2)
+    starts = np.arange(n_bins) * size
+    inds = np.empty((ys.shape[0], 2 * n_bins), dtype=np.int64)
+    inds[:, 0::2] = starts + np.minimum(mins, maxs)
+    inds[:, 1::2] = starts + np.maximum(mins, maxs)
+    inds = np.minimum(inds, n - 1)
+    return x[inds], np.take_along_axis(ys, inds, axis=1)
 
 
-def plot_experiment(experiment: Experiment, figsize=(8, 6)) -> Figure:
-    """Plots transmission vs time and temperature vs time for one experiment"""
+def reactor_colors(n: int) -> List[str]:
+    """Colors of n reactor lines
+
+    The colorblind friendly cmap is used for up to len(cmap) reactors. More reactors
+    (e.g., 16 reactor experiments) use the tab20 colormap so every line has its own
+    color.
+    """
+    if n <= len(cmap):
+        return cmap[:n]
+    colors = matplotlib.colormaps["tab20"].colors[:: 20 // min(n, 20)]
+    colors = [matplotlib.colors.to_hex(color) for color in colors]
+    return [colors[i % len(colors)] for i in range(n)]
+
+
+def plot_experiment(
+    experiment: Experiment, figsize=(8, 6), max_points: Optional[int] = None
+) -> Figure:
+    """Plots transmission vs time and temperature vs time for one experiment
+
+    Sets the matplotlib font size and creates the figure with pyplot. Use
+    draw_experiment to draw on a figure without pyplot (see csst.analyzer.render).
+
+    Args:
+        experiment: experiment to plot
+        figsize: size of the figure in inches
+        max_points: maximum number of points drawn per line. Longer lines are
+            reduced to their min/max envelope (see decimate), so render time does not
+            grow with the length of the experiment. Defaults to drawing every sample.
+    """
     # Change parameters for plot
-    font = {"size": 18}
+    matplotlib.rc("font", **FONT)
+
+    fig = plt.figure(figsize=figsize, tight_layout=True)
+    draw_experiment(fig, experiment, max_points)
+    return fig
+
+
+def draw_experiment(
+    fig: Figure, experiment: Experiment, max_points: Optional[int] = None
+) -> "ExperimentPlot":
+    """Draws transmission vs time and temperature vs time for one experiment on fig
+
+    Text sizes come from the current matplotlib rc parameters. Arguments are the same
+    as plot_experiment.
+
+    Returns:
+        plot of the experiment, which can be updated with new experiment data
+    """
+    return ExperimentPlot(fig, experiment, max_points)
+
+
+class ExperimentPlot:
+    """Transmission and temperature vs time plot whose lines are updated in place
+
+    The axes, labels and legend are built once. update only replaces the data of the
+    lines and the axis limits, so refreshing the plot of a live experiment costs the
+    data update and the draw instead of building a new figure. The layout is rebuilt
+    if the reactors of the experiment change.
+
+    Typical usage example:
+
+        plot = ExperimentPlot(plt.figure(figsize=(8, 6)), experiment, max_points=2000)
+        while running:
+            plot.update(Experiment.load_from_file(path))
+            plot.draw()
+
+    Attributes:
+        fig (Figure): figure of the plot
+        max_points (Optional[int]): see plot_experiment
+    """
+
+    def __init__(
+        self, fig: Figure, experiment: Experiment, max_points: Optional[int] = None
+    ):
+        """
+        Args:
+            fig: empty figure to draw on
+            experiment: experiment to plot
+            max_points: see plot_experiment
+        """
+        self.fig = fig
+        self.max_points = max_points
+        self._layout_engine = fig.get_layout_engine()
+        self._build(experiment)
 
-    matplotlib.rc("font", **font)
+    def update(self, experiment: Experiment):
+        """Replace the plotted data with the data of experiment
 
+        Call draw (or save the figure) to render the new data.
+        """
+        if [str(reactor) for reactor in experiment.reactors] != self._labels:
+            self.fig.clear()
+            self._build(experiment)
+            return
+        temp_times, temps, reactor_times, transmissions = self._line_data(experiment)
+        self._temperature_line.set_data(temp_times, temps)
+        for line, reactor_time, transmission in zip(
+            self._reactor_lines, reactor_times, transmissions
+        ):
+            line.set_data(reactor_time, transmission)
+        self._set_limits(experiment)
+
+    def draw(self):
+        """Render the figure on its canvas
+
+        The layout of the figure (e.g., tight_layout) is computed by the first draw
+        after the plot is built and kept by later draws.
+        """
+        self.fig.canvas.draw()
+        if not self._layout_kept:
+            self.fig.set_layout_engine("none")
+            self._layout_kept = True
+
+    def _line_data(self, experiment: Experiment):
+        """Temperature times and values and reactor times and transmissions"""
+        times = experiment.time_since_experiment_start.values
+        temps = experiment.actual_temperature.values
+        transmissions = [reactor.transmission.values for reactor in experiment.reactors]
+        reactor_times = [times] * len(transmissions)
+        if self.max_points is None:
+            return times, temps, reactor_times, transmissions
+        temp_times, temps = decimate(times, temps, self.max_points)
+        if len(transmissions) > 0:
+            reactor_times, transmissions = decimate(
+                times, np.vstack(transmissions), self.max_points
+            )
+        return temp_times[0], temps[0], reactor_times, transmissions
+
+    def _set_limits(self, experiment: Experiment):
+        self._ax1.set_xlim([0, max(experiment.time_since_experiment_start.values)])
+        for ax in [self._ax1, self._ax2]:
+            ax.relim()
+            ax.autoscale_view(scalex=False)
+
+    def _build(self, experiment: Experiment):
+        """Build the axes, lines and legend of the plot"""
+        self.fig.set_layout_engine(self._layout_engine)
+        self._layout_kept = False
+        ax1 = self.fig.add_subplot(111)
+        # Make ax2
+        ax2 = ax1.twinx()
+        self._ax1, self._ax2 = ax1, ax2
+        ylabel = f"{experiment.actual_temperature.name} ({experiment.actual_temperature.unit})"
+        ax2.set_ylabel(ylabel.capitalize(), color=tempc)
+        ax2.tick_params(axis="y", labelcolor=tempc)
+        temp_times, temps, reactor_times, transmissions = self._line_data(experiment)
+        (self._temperature_line,) = ax2.plot(
+            temp_times,
+            temps,
+            color=tempc,
+            linestyle="dashed",
+            alpha=0.5,
+        )
+
+        # plot ax1
+        xlabel = f"{experiment.time_since_experiment_start.name} ({experiment.time_since_experiment_start.unit})"
+        ylabel = f"{experiment.reactors[0].transmission.name} ({experiment.reactors[0].transmission.unit})"
+        ax1.set_xlabel(xlabel.capitalize())
+        ax1.set_ylabel(ylabel.capitalize())
+
+        ax1.tick_params(axis="y", labelcolor="black")
+        self._labels = [str(reactor) for reactor in experiment.reactors]
+        colors = reactor_colors(len(experiment.reactors))
+        self._reactor_lines = []
+        for label, reactor_time, transmission, color in zip(
+            self._labels, reactor_times, transmissions, colors
+        ):
+            (line,) = ax1.plot(
+                reactor_time,
+                transmission,
+                color=color,
+                linewidth=2.5,
+                label=label,
+            )
+            self._reactor_lines.append(line)
+        self._set_limits(experiment)
+        fs = 8
+        if len(experiment.reactors) > 2:
+            offset = -0.425
+        else:
+            offset = -0.35
+        ax1.legend(
+            bbox_to_anchor=(0, offset, 1, 0.1),
+            loc="lower left",
+            mode="expand",
+            ncol=2,
+            fontsize=fs,
+        )
+
+
+def plot_processed(
+    df: pd.DataFrame,
+    y: str = "average_transmission",
+    error: Optional[str] = "transmission_std",
+    ramps: Optional[List[str]] = None,
+    facet_ramps: bool = True,
+    filtered: Optional[bool] = False,
+    legend: bool = True,
+    figsize: Optional[Tuple[float, float]] = None,
+) -> Figure:
+    """Plots processed transmission vs temperature of every reactor
+
+    Plots the precomputed columns of Analyzer.df as they are. Nothing is aggregated,
+    so unlike seaborn.lineplot no confidence intervals are bootstrapped. Each axes
+    draws all of its curves as one LineCollection and all of its error bands as one
+    PolyCollection, so hundreds of reactors render quickly.
+
+    Each reactor's rows must be contiguous and ordered by temperature, as they are in
+    Analyzer.df and its selections, so reactors with the same label in different
+    experiments are drawn as separate curves.
+
+    Args:
+        df: processed data (Analyzer.df or a selection of it)
+        y: column plotted against average_temperature (e.g., 'average_transmission'
+            or 'median_transmission')
+        error: column of the half width of the band drawn around y (e.g.,
+            'transmission_std'). None draws no bands.
+        ramps: ramp states to plot ('heating', 'cooling' and/or 'holding'). Defaults
+            to heating and cooling.
+        facet_ramps: if each ramp state is plotted on its own axes (one column per
+            ramp state). Otherwise they are plotted on the same axes with the line
+            styles of RAMP_LINESTYLES.
+        filtered: if the filtered or unfiltered transmissions are plotted. None plots
+            both, unfiltered in the first row of axes and filtered in the second.
+        legend: if a legend of the reactors is drawn on the first row of axes
+        figsize: size of the figure in inches. Defaults to 6.4 by 4.8 inches per axes.
+
+    Returns:
+        Figure with a row of axes per filtered value and a column per ramp state
+    """
+    ramps = ["heating", "cooling"] if ramps is None else list(ramps)
+    for ramp in ramps:
+        if ramp not in RAMPS:
+            msg = f"ramps must be in {RAMPS}, not {ramp}"
+            logger.warning(msg)
+            raise ValueError(msg)
+    row_values = [False, True] if filtered is None else [filtered]
+    col_ramps = [[ramp] for ramp in ramps] if facet_ramps else [ramps]
+    if figsize is None:
+        figsize = (6.4 * len(col_ramps), 4.8 * len(row_values))
     fig = plt.figure(figsize=figsize, tight_layout=True)
-    ax1 = fig.add_subplot(111)
-    # Make ax2
-    ax2 = ax1.twinx()
-    ylabel = (
-        f"{experiment.actual_temperature.name} ({experiment.actual_temperature.unit})"
-    )
-    ax2.set_ylabel(ylabel.capitalize(), color=tempc)
-    ax2.tick_params(axis="y", labelcolor=tempc)
-    ax2.plot(
-        experiment.time_since_experiment_start.values,
-        experiment.actual_temperature.values,
-        color=tempc,
-        linestyle="dashed",
-        alpha=0.5,
+    axes = fig.subplots(
+        len(row_values), len(col_ramps), sharex=True, sharey=True, squeeze=False
     )
 
-    # plot ax1
-    xlabel = f"{experiment.time_since_experiment_start.name} ({experiment.time_since_experiment_start.unit})"
-    ylabel = f"{experiment.reactors[0].transmission.name} ({experiment.reactors[0].transmission.unit})"
-    ax1.set_xlabel(xlabel.capitalize())
-    ax1.set_ylabel(ylabel.capitalize())
-
-    ax1.set_xlim([0, max(experiment.time_since_experiment_start.values)])
-    ax1.tick_params(axis="y", labelcolor="black")
-    curr = 0
-    for reactor in experiment.reactors:
-        ax1.plot(
-            reactor.experiment.time_since_experiment_start.values,
-            reactor.transmission.values,
-            color=cmap[curr],
-            linewidth=2.5,
-            label=str(reactor),
+    # reactors are numbered over the whole dataframe so a reactor has the same
+    # color in every axes. Labels repeat across experiments, so reactors are the
+    # runs of rows of one reactor (see csst.analyzer.phase.reactor_runs).
+    reactor_codes = reactor_runs(df)
+    starts = np.flatnonzero(np.diff(reactor_codes, prepend=-1))
+    reactors = df["reactor"].astype(object).to_numpy()[starts]
+    colors = np.array(reactor_colors(len(reactors)), dtype=object)
+    temps = df["average_temperature"].to_numpy(dtype=np.float64)
+    values = df[y].to_numpy(dtype=np.float64)
+    errors = None if error is None else df[error].to_numpy(dtype=np.float64)
+    is_filtered = df["filtered"].to_numpy(dtype=bool)
+    ramp_codes = np.full(len(df), -1)
+    for i, ramp in enumerate(RAMPS):
+        ramp_codes[df[ramp].to_numpy() == 1] = i
+
+    for row, filtered_value in zip(axes, row_values):
+        for ax, ax_ramps in zip(row, col_ramps):
+            mask = is_filtered == filtered_value
+            mask &= np.isin(ramp_codes, [RAMPS.index(ramp) for ramp in ax_ramps])
+            _draw_curves(
+                ax,
+                temps[mask],
+                values[mask],
+                None if errors is None else errors[mask],
+                reactor_codes[mask],
+                ramp_codes[mask],
+                colors,
+            )
+            title = " and ".join(
+                filter(None, [", ".join(ax_ramps[:-1]), ax_ramps[-1]])
+            ).capitalize()
+            if len(row_values) > 1:
+                title = f"{'Filtered' if filtered_value else 'Unfiltered'}, {title}"
+            ax.set_title(title)
+    for ax in axes[-1]:
+        ax.set_xlabel(_label(df, "average_temperature", "temperature_unit"))
+    for ax in axes[:, 0]:
+        ax.set_ylabel(_label(df, y, "transmission_unit"))
+
+    if legend:
+        handles = [
+            Line2D([], [], color=color, label=str(reactor))
+            for reactor, color in zip(reactors, colors)
+        ]
+        if not facet_ramps and len(ramps) > 1:
+            handles += [
+                Line2D(
+                    [], [], color="black", linestyle=RAMP_LINESTYLES[ramp], label=ramp
+                )
+                for ramp in ramps
+            ]
+        # an explicit location as finding the best one is slow with many points
+        axes[0][-1].legend(handles=handles, loc="lower left", ncol=2, fontsize=8)
+    return fig
+
+
+def _draw_curves(
+    ax,
+    temps: np.ndarray,
+    values: np.ndarray,
+    errors: Optional[np.ndarray],
+    reactor_codes: np.ndarray,
+    ramp_codes: np.ndarray,
+    colors: np.ndarray,
+):
+    """Draw one curve per reactor and ramp state in temperature order"""
+    if len(temps) == 0:
+        return
+    curves = reactor_codes * len(RAMPS) + ramp_codes
+    order = np.lexsort((temps, curves))
+    temps, values, curves = temps[order], values[order], curves[order]
+    splits = np.flatnonzero(curves[1:] != curves[:-1]) + 1
+    starts = np.append(0, splits)
+    curve_colors = colors[curves[starts] // len(RAMPS)]
+    points = np.column_stack([temps, values])
+    ax.add_collection(
+        LineCollection(
+            np.split(points, splits),
+            colors=list(curve_colors),
+            linestyles=[
+                RAMP_LINESTYLES[RAMPS[code]] for code in curves[starts] % len(RAMPS)
+            ],
+            linewidths=1.5,
         )
-        curr += 1
-    fs = 8
-    if len(experiment.reactors) > 2:
-        offset = -0.425
-    else:
-        offset = -0.35
-    ax1.legend(
-        bbox_to_anchor=(0, offset, 1, 0.1),
-        loc="lower left",
-        mode="expand",
-        ncol=2,
-        fontsize=fs,
     )
-    return fig
+    if errors is not None:
+        errors = errors[order]
+        # each band is the upper edge left to right then the lower edge back
+        upper = np.split(np.column_stack([temps, values + errors]), splits)
+        lower = np.split(np.column_stack([temps, values - errors]), splits)
+        ax.add_collection(
+            PolyCollection(
+                [np.concatenate([up, low[::-1]]) for up, low in zip(upper, lower)],
+                facecolors=list(curve_colors),
+                edgecolors="none",
+                alpha=0.2,
+            )
+        )
+    ax.autoscale_view()
+
+
+def _label(df: pd.DataFrame, column: str, unit_column: str) -> str:
+    """Axis label of a column with the unit of its rows"""
+    label = column.replace("_", " ").capitalize()
+    if unit_column in df.columns and len(df) > 0:
+        label = f"{label} ({df[unit_column].iloc[0]})"
+    return label
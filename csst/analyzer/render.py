@@ -0,0 +1,142 @@
+"""Render experiment plots to files in parallel
+
+Each experiment is drawn with csst.analyzer.plotter.draw_experiment on its own
+matplotlib Figure with an Agg canvas, without pyplot, so no global figure state is
+shared and the experiments can be rendered in a pool of processes.
+
+Typical usage example:
+
+    rendered = render_experiments(Path("data").glob("*.csv"), "plots")
+    for figure in rendered:
+        print(figure.path, figure.seconds)
+"""
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from pydantic import BaseModel
+
+from csst.experiment import Experiment
+from csst.analyzer.plotter import FONT, draw_experiment
+
+logger = logging.getLogger(__name__)
+
+
+class RenderedFigure(BaseModel):
+    """Result of rendering one experiment
+
+    Args:
+        source: path of the experiment file or name of the experiment
+        path: path the figure was written to. None if rendering failed.
+        load_seconds: time spent loading the experiment file
+        seconds: time spent loading, drawing and writing the figure
+        error: error message if rendering failed
+    """
+
+    source: str
+    path: Optional[Path]
+    load_seconds: float = 0
+    seconds: float
+    error: Optional[str] = None
+
+
+def render_experiments(
+    experiments: Iterable[Union[Experiment, str, Path]],
+    output_dir: Union[str, Path],
+    format: str = "png",
+    figsize: Tuple[float, float] = (8, 6),
+    dpi: float = 100,
+    max_points: Optional[int] = None,
+    processes: Optional[int] = None,
+) -> List[RenderedFigure]:
+    """Plot each experiment (see csst.analyzer.plotter.plot_experiment) to a file
+
+    Paths are loaded in the worker processes, so only the path is sent to them.
+    Figures are named after the experiment file (e.g., 'report.csv' is written to
+    'report.png'), with the position of the experiment (or the next unused number)
+    appended to repeated names.
+    An experiment that fails to load or render is logged and reported with its
+    error instead of stopping the batch.
+
+    Args:
+        experiments: experiments or paths of experiment files
+        output_dir: directory to write the figures to. Created if it does not exist.
+        format: file format of the figures (e.g., 'png', 'pdf' or 'svg')
+        figsize: size of the figures in inches
+        dpi: resolution of raster figures
+        max_points: see plot_experiment
+        processes: number of worker processes. Defaults to the number of CPUs. 1
+            renders in the current process.
+
+    Returns:
+        rendered figures in the order of experiments
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tasks = []
+    names = set()
+    for i, experiment in enumerate(experiments):
+        if isinstance(experiment, Experiment):
+            source = experiment.file_name or f"experiment_{i}"
+        else:
+            experiment = str(experiment)
+            source = experiment
+        stem = Path(source).stem
+        name, k = stem, i
+        while name in names:
+            name = f"{stem}_{k}"
+            k += 1
+        names.add(name)
+        path = output_dir / f"{name}.{format}"
+        tasks.append((experiment, source, path, figsize, dpi, max_points))
+
+    if processes == 1 or len(tasks) <= 1:
+        return [_render(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(_render, *task) for task in tasks]
+        return [future.result() for future in futures]
+
+
+def _render(
+    experiment: Union[Experiment, str],
+    source: str,
+    path: Path,
+    figsize: Tuple[float, float],
+    dpi: float,
+    max_points: Optional[int],
+) -> RenderedFigure:
+    """Load (if needed), draw and write one experiment"""
+    start = time.perf_counter()
+    load_seconds = 0
+    try:
+        if not isinstance(experiment, Experiment):
+            experiment = Experiment.load_from_file(experiment)
+            load_seconds = time.perf_counter() - start
+        # rc_context only changes the font size while the figure is drawn
+        with matplotlib.rc_context(
+            {f"font.{key}": value for key, value in FONT.items()}
+        ):
+            fig = Figure(figsize=figsize, tight_layout=True)
+            FigureCanvasAgg(fig)
+            draw_experiment(fig, experiment, max_points)
+            fig.savefig(path, dpi=dpi)
+    except Exception as e:
+        logger.warning(f"Could not render {source}: {e!r}")
+        return RenderedFigure(
+            source=source,
+            path=None,
+            load_seconds=load_seconds,
+            seconds=time.perf_counter() - start,
+            error=repr(e),
+        )
+    return RenderedFigure(
+        source=source,
+        path=path,
+        load_seconds=load_seconds,
+        seconds=time.perf_counter() - start,
+    )
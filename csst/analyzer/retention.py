@@ -0,0 +1,261 @@
+"""Retention of the raw data of the reactors processed by an Analyzer
+
+Every ProcessedReactor references its unprocessed Reactor and, through it, the whole
+Experiment with all of its temperature, time and transmission arrays. The retention
+policy decides how much of that raw data Analyzer.processed_reactors keeps:
+
+- 'all' keeps the raw data of every experiment (the default).
+- 'processed' keeps only the processed temperatures. Raw data is reloaded from its
+  source every time a processed reactor is accessed and released afterwards.
+- 'lru' keeps the raw data of the most recently used experiments within a byte
+  budget and releases the least recently used experiments first.
+
+Released raw data is reloaded from the file the experiment was loaded from
+(Experiment.file_path) or its database id (Experiment.database_id). Reactors of
+experiments with neither keep their raw data regardless of the policy. Iterating the
+processed reactors reloads each released experiment once, not once per reactor.
+
+The policy only covers processed_reactors. The rows of Analyzer.unprocessed_df are a
+copy of every raw sample, so an in-memory analyzer still grows with the data added;
+memory is only bounded together with an out-of-core store (see Analyzer), which
+writes those rows to disk.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from csst.experiment import Experiment
+from csst.processor.models import ProcessedReactor, ProcessedTemperature
+
+logger = logging.getLogger(__name__)
+
+RETENTION_POLICIES = ["all", "processed", "lru"]
+
+
+def experiment_nbytes(experiment: Experiment) -> int:
+    """Bytes of the raw data arrays of the experiment and its reactors"""
+    values = [
+        experiment.actual_temperature,
+        experiment.set_temperature,
+        experiment.time_since_experiment_start,
+        experiment.stir_rates,
+    ]
+    for reactor in experiment.reactors:
+        values.append(reactor.transmission)
+        values.append(reactor.filtered_transmission)
+    nbytes = sum(
+        np.asarray(value.values).nbytes for value in values if value is not None
+    )
+    if experiment.ramp_state is not None:
+        nbytes += np.asarray(experiment.ramp_state, dtype=object).nbytes
+    return nbytes
+
+
+class _Released:
+    """Processed reactor whose raw data was released"""
+
+    __slots__ = ("temperatures",)
+
+    def __init__(self, temperatures: List[ProcessedTemperature]):
+        self.temperatures = temperatures
+
+
+class ProcessedReactors(Sequence):
+    """Processed reactors of an Analyzer holding raw data by a retention policy
+
+    Behaves like a list of ProcessedReactor. Accessing a processed reactor whose raw
+    data was released reloads the raw data of its experiment. Iterating, or taking a
+    slice, reloads each experiment once and keeps it until its last processed
+    reactor was returned. Safe to use from several threads.
+
+    Attributes:
+        policy (str): 'all', 'processed' or 'lru'
+        budget_bytes (Optional[int]): byte budget of the raw data kept by the 'lru'
+            policy
+        nbytes (int): bytes of the raw data currently kept by the policy
+    """
+
+    def __init__(
+        self,
+        policy: str = "all",
+        budget_bytes: Optional[int] = None,
+        loader: Optional[Callable[[Union[str, int]], Experiment]] = None,
+    ):
+        """
+        Args:
+            policy: 'all', 'processed' or 'lru'
+            budget_bytes: byte budget of the 'lru' policy. Required for 'lru'.
+            loader: function loading an experiment from its database id. Required to
+                reload experiments loaded from the database.
+        """
+        if policy not in RETENTION_POLICIES:
+            msg = f"retention must be one of {RETENTION_POLICIES}, not {policy}"
+            logger.warning(msg)
+            raise ValueError(msg)
+        if policy == "lru" and budget_bytes is None:
+            msg = "The 'lru' retention policy needs a byte budget"
+            logger.warning(msg)
+            raise ValueError(msg)
+        self.policy = policy
+        self.budget_bytes = budget_bytes
+        self.loader = loader
+        self._items: List[Union[ProcessedReactor, _Released]] = []
+        # reactor key and experiment key (see csst.analyzer.reactor_key) of each
+        # item
+        self._keys: List[tuple] = []
+        self._experiment_keys: List[tuple] = []
+        # positions of the items of each experiment
+        self._positions: Dict[tuple, List[int]] = {}
+        # file path or database id of each experiment that can be reloaded
+        self._sources: Dict[tuple, Union[str, int]] = {}
+        # bytes of the raw data kept of each experiment, least recently used first
+        self._kept: "OrderedDict[tuple, int]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(self._kept.values())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self._iter(range(*i.indices(len(self)))))
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError("processed reactor index out of range")
+        return next(self._iter([i % n]))
+
+    def __iter__(self) -> Iterator[ProcessedReactor]:
+        return self._iter(range(len(self)))
+
+    def _iter(self, positions: Iterable[int]) -> Iterator[ProcessedReactor]:
+        """Processed reactors at the positions. The raw data of a released experiment
+        is reloaded once and kept until its last position was returned."""
+        reloaded: Dict[tuple, List[ProcessedReactor]] = {}
+        for i in positions:
+            with self._lock:
+                item = self._items[i]
+                experiment_key = self._experiment_keys[i]
+                experiment_positions = self._positions[experiment_key]
+                if isinstance(item, ProcessedReactor):
+                    if experiment_key in self._kept:
+                        self._kept.move_to_end(experiment_key)
+                    reactor = item
+                else:
+                    if experiment_key not in reloaded:
+                        reloaded[experiment_key] = self._reload(experiment_key)
+                    reactor = reloaded[experiment_key][experiment_positions.index(i)]
+            if i == experiment_positions[-1]:
+                reloaded.pop(experiment_key, None)
+            yield reactor
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, ProcessedReactors)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ProcessedReactors({len(self)} reactors, policy={self.policy!r})"
+
+    def append(self, reactor: ProcessedReactor, key: tuple):
+        """Add a processed reactor
+
+        Args:
+            reactor: processed reactor
+            key: key of the reactor (see csst.analyzer.reactor_key). Used to find the
+                reactor in its reloaded experiment.
+        """
+        experiment = reactor.unprocessed_reactor.experiment
+        experiment_key = key[0]
+        source = _source(experiment)
+        with self._lock:
+            self._keys.append(key)
+            self._experiment_keys.append(experiment_key)
+            self._positions.setdefault(experiment_key, []).append(len(self._items))
+            if self.policy == "all" or source is None:
+                self._items.append(reactor)
+                return
+            self._sources[experiment_key] = source
+            if self.policy == "processed":
+                self._items.append(_Released(reactor.temperatures))
+                return
+            self._items.append(reactor)
+            self._keep(experiment_key, experiment_nbytes(experiment))
+
+    def _keep(self, experiment_key: tuple, nbytes: int):
+        """Keep the raw data of the experiment and release the least recently used
+        experiments over the budget"""
+        self._kept[experiment_key] = nbytes
+        self._kept.move_to_end(experiment_key)
+        while self.nbytes > self.budget_bytes and len(self._kept) > 1:
+            released, _ = self._kept.popitem(last=False)
+            self._release(released)
+        if self.nbytes > self.budget_bytes:
+            logger.warning(
+                f"Raw data of experiment {experiment_key} is larger than the "
+                f"{self.budget_bytes} byte budget"
+            )
+
+    def _release(self, experiment_key: tuple):
+        """Replace the processed reactors of the experiment by their processed
+        temperatures"""
+        for position in self._positions[experiment_key]:
+            item = self._items[position]
+            if isinstance(item, ProcessedReactor):
+                self._items[position] = _Released(item.temperatures)
+
+    def _reload(self, experiment_key: tuple) -> List[ProcessedReactor]:
+        """Processed reactors of the experiment with their raw data reloaded from its
+        source. The raw data is kept if the policy allows it."""
+        source = self._sources[experiment_key]
+        logger.info(f"Reloading raw data of experiment {experiment_key} from {source}")
+        if isinstance(source, int):
+            if self.loader is None:
+                msg = (
+                    f"Raw data of experiment {experiment_key} was released and can "
+                    "not be reloaded from the database without a session"
+                )
+                logger.warning(msg)
+                raise LookupError(msg)
+            experiment = self.loader(source)
+        else:
+            experiment = Experiment.load_from_file(source)
+        # reactors are identified by their number in the reloaded experiment
+        reactors = {reactor.reactor_number: reactor for reactor in experiment.reactors}
+        processed = []
+        for position in self._positions[experiment_key]:
+            item = self._items[position]
+            if isinstance(item, ProcessedReactor):
+                processed.append(item)
+                continue
+            key = self._keys[position]
+            reactor = reactors.get(key[1])
+            if reactor is None:
+                msg = f"Reactor {key} is no longer in {source}"
+                logger.warning(msg)
+                raise LookupError(msg)
+            processed.append(
+                ProcessedReactor.construct(
+                    unprocessed_reactor=reactor,
+                    temperatures=item.temperatures,
+                )
+            )
+        if self.policy == "lru":
+            for position, reactor in zip(self._positions[experiment_key], processed):
+                self._items[position] = reactor
+            self._keep(experiment_key, experiment_nbytes(experiment))
+        return processed
+
+
+def _source(experiment: Experiment) -> Optional[Union[str, int]]:
+    """File path or database id the experiment can be reloaded from"""
+    if getattr(experiment, "file_path", None) is not None:
+        return str(experiment.file_path)
+    return getattr(experiment, "database_id", None)
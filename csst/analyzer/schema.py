@@ -0,0 +1,169 @@
+"""Column types of the Analyzer dataframes
+
+Labels repeated on every row (reactor, polymer, solvent, units and ramp state) are
+categoricals, the state flags are int8 or bool and measurements are floats. Raw
+transmissions and stir rates are whole numbers, so float32 stores them exactly, while
+temperatures, times and filtered transmissions keep float64.
+
+With the 'pyarrow' dtype backend the same schema is stored in Arrow-backed columns
+(strings for the labels). pyarrow is an optional dependency only needed for that
+backend.
+"""
+import logging
+from typing import Dict, List
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+logger = logging.getLogger(__name__)
+
+DTYPE_BACKENDS = ["numpy", "pyarrow"]
+
+LABEL_COLUMNS = {
+    "reactor": "category",
+    "polymer": "category",
+    "solvent": "category",
+    "concentration": "float64",
+    "concentration_unit": "category",
+    "temperature_unit": "category",
+}
+PROCESSED_SCHEMA = {
+    **LABEL_COLUMNS,
+    "average_temperature": "float64",
+    "temperature_range": "float64",
+    "average_transmission": "float64",
+    "median_transmission": "float64",
+    "transmission_std": "float64",
+    "heating": "int8",
+    "cooling": "int8",
+    "holding": "int8",
+    "filtered": "bool",
+    "transmission_unit": "category",
+}
+UNPROCESSED_SCHEMA = {
+    **LABEL_COLUMNS,
+    "temperature": "float64",
+    "transmission": "float32",
+    "filtered_transmission": "float64",
+    "set_temperature": "float64",
+    "time": "float64",
+    "time_unit": "category",
+    "stir_rate": "float32",
+    "stir_rate_unit": "category",
+    "bottom_stir_rate": "float64",
+    "bottom_stir_rate_unit": "category",
+    "top_stir_rate": "float64",
+    "top_stir_rate_unit": "category",
+    "ramp_state": "category",
+    "transmission_unit": "category",
+}
+
+# normalized layout of the unprocessed data (see csst.analyzer.Analyzer layout)
+SAMPLE_SCHEMA = {
+    "experiment": "int32",
+    "sample_index": "int32",
+    "temperature_unit": "category",
+    "temperature": "float64",
+    "set_temperature": "float64",
+    "time": "float64",
+    "time_unit": "category",
+    "stir_rate": "float32",
+    "stir_rate_unit": "category",
+    "bottom_stir_rate": "float64",
+    "bottom_stir_rate_unit": "category",
+    "top_stir_rate": "float64",
+    "top_stir_rate_unit": "category",
+    "ramp_state": "category",
+}
+TRANSMISSION_SCHEMA = {
+    "experiment": "int32",
+    "reactor": "category",
+    "polymer": "category",
+    "solvent": "category",
+    "concentration": "float64",
+    "concentration_unit": "category",
+    "sample_index": "int32",
+    "transmission": "float32",
+    "filtered_transmission": "float64",
+    "transmission_unit": "category",
+}
+
+
+def dtypes(schema: Dict[str, str], dtype_backend: str = "numpy") -> Dict[str, object]:
+    """pandas dtypes of the schema columns for the dtype backend
+
+    Args:
+        schema: column name to numpy backend dtype
+        dtype_backend: 'numpy' or 'pyarrow'
+    """
+    if dtype_backend not in DTYPE_BACKENDS:
+        msg = f"dtype_backend must be one of {DTYPE_BACKENDS}, not {dtype_backend}"
+        logger.warning(msg)
+        raise ValueError(msg)
+    if dtype_backend == "numpy":
+        return dict(schema)
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow must be installed to use the 'pyarrow' dtype backend. "
+            "Install the parquet extra, e.g. poetry install -E parquet"
+        ) from e
+    arrow_types = {
+        "category": pa.string(),
+        "float64": pa.float64(),
+        "float32": pa.float32(),
+        "int8": pa.int8(),
+        "int32": pa.int32(),
+        "bool": pa.bool_(),
+    }
+    return {col: pd.ArrowDtype(arrow_types[dtype]) for col, dtype in schema.items()}
+
+
+def empty_frame(schema: Dict[str, str], dtype_backend: str = "numpy") -> pd.DataFrame:
+    """Empty dataframe with the schema columns and types"""
+    return pd.DataFrame(
+        {
+            col: pd.Series(dtype=dtype)
+            for col, dtype in dtypes(schema, dtype_backend).items()
+        }
+    )
+
+
+def apply_schema(
+    df: pd.DataFrame, schema: Dict[str, str], dtype_backend: str = "numpy"
+) -> pd.DataFrame:
+    """Cast the schema columns in df to their types. Other columns are unchanged."""
+    types = {
+        col: dtype
+        for col, dtype in dtypes(schema, dtype_backend).items()
+        if col in df.columns and df[col].dtype != dtype
+    }
+    if len(types) == 0:
+        return df
+    return df.astype(types)
+
+
+def concat_frames(
+    frames: List[pd.DataFrame], schema: Dict[str, str], dtype_backend: str = "numpy"
+) -> pd.DataFrame:
+    """Concatenate frames keeping the schema types
+
+    pd.concat turns categoricals into objects unless every frame has the same
+    categories, so the categories of each categorical column are unioned first.
+    """
+    frames = [apply_schema(df, schema, dtype_backend) for df in frames]
+    for col, dtype in schema.items():
+        if dtype != "category" or dtype_backend != "numpy":
+            continue
+        columns = [df[col] for df in frames if col in df.columns]
+        if len(columns) < 2:
+            continue
+        categories = union_categoricals(columns).categories
+        frames = [
+            df.assign(**{col: df[col].cat.set_categories(categories)})
+            if col in df.columns
+            else df
+            for df in frames
+        ]
+    return apply_schema(pd.concat(frames), schema, dtype_backend)
@@ -0,0 +1,163 @@
+"""Parquet persistence of the Analyzer dataframes
+
+Each dataframe is written as a Parquet dataset partitioned by polymer and solvent
+(hive style, e.g., 'polymer=PEG/solvent=TOL/<file>.parquet'), so reading a subset of
+polymers and solvents only opens their files. Filters on other columns are pushed
+down to the Parquet row groups and only the requested columns are read.
+
+The same layout is used as the on-disk store of out-of-core analyzers, which append
+a chunk of files to each dataset every time their buffered rows are spilled, and
+iter_frames streams a dataset in batches so it can be scanned with bounded memory.
+
+pyarrow is an optional dependency (the 'parquet' extra) only needed to save and load
+analyzers and for out-of-core analyzers.
+
+Typical usage example:
+
+    analyzer.save("results")
+    peg_in_tol = Analyzer.load("results", polymer="PEG", solvent="TOL")
+"""
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from csst.analyzer.schema import apply_schema, empty_frame
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMNS = ["polymer", "solvent"]
+PROCESSED_DIR = "processed"
+UNPROCESSED_DIR = "unprocessed"
+# column pandas writes the dataframe index to
+INDEX_COLUMN = "__index_level_0__"
+
+
+def check_pyarrow():
+    """Raise an ImportError if pyarrow is not installed"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow must be installed to save and load analyzer results. "
+            "Install the parquet extra, e.g. poetry install -E parquet"
+        ) from e
+
+
+def write_frame(df: pd.DataFrame, path: Union[str, Path], chunk: int = 0):
+    """Write df as a Parquet dataset partitioned by polymer and solvent
+
+    Args:
+        df: Analyzer.df or Analyzer.unprocessed_df
+        path: directory of the dataset. Created if it does not exist.
+        chunk: number of the chunk of rows. Files of the same chunk are replaced,
+            files of other chunks are kept, so a dataset can be written in chunks.
+            Files are read in chunk order.
+    """
+    check_pyarrow()
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    if len(df) == 0:
+        return
+    df.to_parquet(
+        path,
+        engine="pyarrow",
+        partition_cols=PARTITION_COLUMNS,
+        basename_template=f"chunk-{chunk:08d}-{{i}}.parquet",
+    )
+
+
+def read_frame(
+    path: Union[str, Path],
+    schema: Dict[str, str],
+    filters: Optional[List[tuple]] = None,
+    columns: Optional[List[str]] = None,
+    dtype_backend: str = "numpy",
+) -> pd.DataFrame:
+    """Read a dataset written by write_frame
+
+    Rows are grouped by polymer and solvent, not in the order they were written.
+
+    Args:
+        path: directory of the dataset
+        schema: schema of the dataframe (see csst.analyzer.schema)
+        filters: pyarrow filters, e.g. [('polymer', '=', 'PEG')]. Filters on polymer
+            and solvent skip the files of other partitions.
+        columns: columns to read. Columns not in schema are ignored. Defaults to all
+            columns.
+        dtype_backend: 'numpy' or 'pyarrow'
+    """
+    check_pyarrow()
+    path = Path(path)
+    if columns is not None:
+        columns = [col for col in schema if col in columns]
+        schema = {col: schema[col] for col in columns}
+    if not path.is_dir() or next(path.rglob("*.parquet"), None) is None:
+        return empty_frame(schema, dtype_backend)
+    df = pd.read_parquet(path, engine="pyarrow", columns=columns, filters=filters)
+    df = df[[col for col in schema if col in df.columns]]
+    return apply_schema(df, schema, dtype_backend)
+
+
+def iter_frames(
+    path: Union[str, Path],
+    schema: Dict[str, str],
+    filters: Optional[List[tuple]] = None,
+    columns: Optional[List[str]] = None,
+    dtype_backend: str = "numpy",
+    batch_rows: int = 1_000_000,
+) -> Iterator[pd.DataFrame]:
+    """Stream a dataset written by write_frame in batches of at most batch_rows rows
+
+    Only one batch is held in memory at a time. Arguments are the same as read_frame.
+    """
+    check_pyarrow()
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    if columns is not None:
+        columns = [col for col in schema if col in columns]
+        schema = {col: schema[col] for col in columns}
+    if not path.is_dir() or next(path.rglob("*.parquet"), None) is None:
+        return
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    if columns is not None and INDEX_COLUMN in dataset.schema.names:
+        columns = columns + [INDEX_COLUMN]
+    expression = pq.filters_to_expression(filters) if filters else None
+    for batch in dataset.to_batches(
+        columns=columns, filter=expression, batch_size=batch_rows
+    ):
+        if batch.num_rows == 0:
+            continue
+        df = batch.to_pandas()
+        if INDEX_COLUMN in df.columns:
+            df = df.set_index(INDEX_COLUMN).rename_axis(None)
+        df = df[[col for col in schema if col in df.columns]]
+        yield apply_schema(df, schema, dtype_backend)
+
+
+def to_filters(
+    polymer: Optional[Union[str, List[str]]] = None,
+    solvent: Optional[Union[str, List[str]]] = None,
+    filters: Optional[List[tuple]] = None,
+) -> Optional[List[tuple]]:
+    """Add polymer and solvent selections to pyarrow filters
+
+    Args:
+        polymer: polymer or polymers to select
+        solvent: solvent or solvents to select
+        filters: other pyarrow filters as a list of (column, op, value) tuples
+    """
+    filters = list(filters) if filters is not None else []
+    for col, value in [("polymer", polymer), ("solvent", solvent)]:
+        if value is None:
+            continue
+        if isinstance(value, str):
+            filters.append((col, "=", value))
+        else:
+            filters.append((col, "in", list(value)))
+    if len(filters) == 0:
+        return None
+    return filters
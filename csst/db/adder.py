@@ -1,7 +1,8 @@
 """Functions for adding data to the database"""
-from typing import Union, Optional, Dict
+from typing import Union, Optional, Dict, Type
 import logging
 
+from sqlalchemy import insert
 from sqlalchemy.orm.scoping import scoped_session
 from sqlalchemy.orm.session import Session
 import numpy as np
@@ -12,7 +13,9 @@ from csst.db.orm.csst import (
     CSSTProperty,
     CSSTExperimentPropertyValue,
     CSSTExperimentPropertyValues,
+    CSSTExperimentPropertyArray,
     CSSTReactorPropertyValues,
+    CSSTReactorPropertyArray,
     CSSTReactorProcessedTemperature,
 )
 
@@ -25,6 +28,7 @@ from csst.experiment.models import (
 )
 from csst.processor.models import ProcessedReactor
 from csst.db import getter
+from csst.instrumentation import span
 
 logger = logging.getLogger(__name__)
 
@@ -40,21 +44,22 @@ def add_experiment(
         experiment: experiment to add to table
         session: instantiated session connected to the database
     """
-    exp_id = add_experiment_and_or_get_id(
-        experiment=experiment,
-        session=session,
-        upload_raw_properties=upload_raw_properties,
-    )
-    temp_program_id = add_temperature_program_and_or_get_program_id(
-        temperature_program=experiment.temperature_program, session=session
-    )
-    add_experiment_reactors(
-        experiment=experiment,
-        experiment_id=exp_id,
-        temperature_program_id=temp_program_id,
-        session=session,
-        upload_raw_properties=upload_raw_properties,
-    )
+    with span("db.add_experiment"):
+        exp_id = add_experiment_and_or_get_id(
+            experiment=experiment,
+            session=session,
+            upload_raw_properties=upload_raw_properties,
+        )
+        temp_program_id = add_temperature_program_and_or_get_program_id(
+            temperature_program=experiment.temperature_program, session=session
+        )
+        add_experiment_reactors(
+            experiment=experiment,
+            experiment_id=exp_id,
+            temperature_program_id=temp_program_id,
+            session=session,
+            upload_raw_properties=upload_raw_properties,
+        )
 
 
 def add_experiment_and_or_get_id(
@@ -154,18 +159,15 @@ def add_experiment_property_values(
         "csst_property_id": prop_id,
         "csst_experiment_id": experiment_id,
     }
-    query = session.query(CSSTExperimentPropertyValues).filter_by(**data)
-    if query.count() != 0:
+    if (
+        session.query(CSSTExperimentPropertyArray).filter_by(**data).count() != 0
+        or session.query(CSSTExperimentPropertyValues).filter_by(**data).count() != 0
+    ):
         msg = f"PropertyValues for {data} already added"
         logger.warning(msg)
         raise LookupError(msg)
-    values = prop.values
-    if isinstance(values, np.ndarray):
-        values = values.astype(np.float64)
-    for i in range(len(values)):
-        data["array_index"] = i
-        data["value"] = values[i]
-        session.add(CSSTExperimentPropertyValues(**data))
+    with span("add_experiment_property_values", rows=len(prop.values)):
+        insert_property_array(CSSTExperimentPropertyArray, data, prop.values, session)
 
 
 def add_experiment_property_value(
@@ -336,18 +338,58 @@ def add_reactor_property_values(
         "csst_property_id": prop_id,
         "csst_reactor_id": reactor_id,
     }
-    query = session.query(CSSTReactorPropertyValues).filter_by(**data)
-    if query.count() != 0:
+    if (
+        session.query(CSSTReactorPropertyArray).filter_by(**data).count() != 0
+        or session.query(CSSTReactorPropertyValues).filter_by(**data).count() != 0
+    ):
         msg = f"PropertyValues for {data} already added"
         logger.warning(msg)
         raise LookupError(msg)
-    values = prop.values
-    if isinstance(values, np.ndarray):
-        values = values.astype(np.float64)
-    for i in range(len(values)):
-        data["array_index"] = i
-        data["value"] = values[i]
-        session.add(CSSTReactorPropertyValues(**data))
+    with span("add_reactor_property_values", rows=len(prop.values)):
+        insert_property_array(CSSTReactorPropertyArray, data, prop.values, session)
+
+
+def insert_property_array(
+    table: Type[Union[CSSTExperimentPropertyArray, CSSTReactorPropertyArray]],
+    data: Dict[str, int],
+    values,
+    session: Union[scoped_session, Session],
+    use_copy: Optional[bool] = None,
+):
+    """Insert a property array as one row of a property array table
+
+    The array is streamed to Postgres with a binary COPY when the session uses
+    psycopg (3), and otherwise inserted with one INSERT, instead of creating an ORM
+    object holding the array. The row is written on the session's connection, so it
+    is part of the session's transaction. Pending ORM objects are flushed first so
+    the row can reference them.
+
+    Args:
+        table: CSSTExperimentPropertyArray or CSSTReactorPropertyArray
+        data: property id and experiment or reactor id of the row
+        values: values of the array
+        session: instantiated session connected to the database
+        use_copy: if COPY is used. Default None uses COPY when the driver supports it.
+    """
+    values = np.asarray(values, dtype=np.float64).tolist()
+    session.flush()
+    connection = session.connection()
+    if use_copy is None:
+        use_copy = connection.dialect.driver == "psycopg"
+    if not use_copy:
+        connection.execute(insert(table).values({**data, "values": values}))
+        return
+    quote = connection.dialect.identifier_preparer.quote
+    columns = ", ".join(quote(column) for column in list(data) + ["values"])
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        with cursor.copy(
+            f"COPY {quote(table.__tablename__)} ({columns}) FROM STDIN (FORMAT BINARY)"
+        ) as copy:
+            copy.set_types(["int4"] * len(data) + ["float8[]"])
+            copy.write_row(tuple(data.values()) + (values,))
+    finally:
+        cursor.close()
 
 
 def add_property(
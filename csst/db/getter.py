@@ -1,6 +1,6 @@
 """Functions for getting data from the database"""
 from datetime import datetime
-from typing import Union, List, Dict, Optional
+from typing import Union, List, Dict, Optional, Type
 import logging
 
 import numpy as np
@@ -15,7 +15,9 @@ from csst.db.orm.csst import (
     CSSTReactor,
     CSSTExperimentPropertyValue,
     CSSTExperimentPropertyValues,
+    CSSTExperimentPropertyArray,
     CSSTReactorPropertyValues,
+    CSSTReactorPropertyArray,
     CSSTProperty,
 )
 
@@ -28,6 +30,7 @@ from csst.experiment.models import (
     PropertyValues,
 )
 from csst.experiment.helpers import remove_keys_with_null_values_in_dict
+from csst.instrumentation import span
 
 logger = logging.getLogger(__name__)
 
@@ -97,82 +100,110 @@ def get_experiments(
     experiment: Experiment, session: Union[scoped_session, Session]
 ) -> List[Experiment]:
     """Gets all experiments associated with the experiment dict data"""
-    experiments = []
-    exps = get_csst_experiments(experiment, session)
-    if len(exps) == 0:
-        return experiments
-    for exp in exps:
-        reactors = get_csst_reactors_by_experiment_id(exp.id, session)
-        temp_program = get_temperature_program_by_id(
-            reactors[0].csst_temperature_program_id, session
-        )
-        exp_value_properties = get_experiment_property_value_by_experiment_id(
-            exp.id, session
-        )
-        exp_values_properties = get_experiment_property_values_by_experiment_id(
-            exp.id, session
-        )
-        reactors = [
-            (reactor, get_reactor_property_values_by_reactor_id(reactor.id, session))
-            for reactor in reactors
-        ]
-        experiment = Experiment()
-        experiment.file_name = exp.file_name
-        experiment.version = exp.version
-        experiment.experiment_details = exp.experiment_details
-        experiment.experiment_number = exp.experiment_number
-        experiment.experimenter = exp.experimenter
-        experiment.project = exp.project
-        experiment.lab_journal = exp.lab_journal
-        experiment.description = exp.description.split("\n")
-        experiment.start_of_experiment = exp.start_of_experiment
-
-        # data details
-        experiment.temperature_program = temp_program
-        experiment.bottom_stir_rate = None
-        experiment.top_stir_rate = None
-        if PropertyNameEnum.BOTTOM_STIR_RATE in exp_value_properties:
-            experiment.bottom_stir_rate = exp_value_properties[
-                PropertyNameEnum.BOTTOM_STIR_RATE
-            ]
-        if PropertyNameEnum.TOP_STIR_RATE in exp_value_properties:
-            experiment.top_stir_rate = exp_value_properties[
-                PropertyNameEnum.TOP_STIR_RATE
-            ]
-
-        experiment.set_temperature = exp_values_properties["set_temperature"]
-        experiment.actual_temperature = exp_values_properties[PropertyNameEnum.TEMP]
-        experiment.time_since_experiment_start = exp_values_properties[
-            PropertyNameEnum.TIME
+    with span("db.get_experiments"):
+        return _get_experiments(experiment, session)
+
+
+def _get_experiments(
+    experiment: Experiment, session: Union[scoped_session, Session]
+) -> List[Experiment]:
+    """Gets the experiments (see get_experiments)"""
+    return [
+        _get_experiment(exp, session)
+        for exp in get_csst_experiments(experiment, session)
+    ]
+
+
+def _get_experiment(
+    exp: CSSTExperiment, session: Union[scoped_session, Session]
+) -> Experiment:
+    """Builds the experiment of a CSSTExperiment row with its reactors and data"""
+    reactors = get_csst_reactors_by_experiment_id(exp.id, session)
+    temp_program = get_temperature_program_by_id(
+        reactors[0].csst_temperature_program_id, session
+    )
+    exp_value_properties = get_experiment_property_value_by_experiment_id(
+        exp.id, session
+    )
+    exp_values_properties = get_experiment_property_values_by_experiment_id(
+        exp.id, session
+    )
+    reactors = [
+        (reactor, get_reactor_property_values_by_reactor_id(reactor.id, session))
+        for reactor in reactors
+    ]
+    experiment = Experiment()
+    experiment.database_id = exp.id
+    experiment.file_name = exp.file_name
+    experiment.version = exp.version
+    experiment.experiment_details = exp.experiment_details
+    experiment.experiment_number = exp.experiment_number
+    experiment.experimenter = exp.experimenter
+    experiment.project = exp.project
+    experiment.lab_journal = exp.lab_journal
+    experiment.description = exp.description.split("\n")
+    experiment.start_of_experiment = exp.start_of_experiment
+
+    # data details
+    experiment.temperature_program = temp_program
+    experiment.bottom_stir_rate = None
+    experiment.top_stir_rate = None
+    if PropertyNameEnum.BOTTOM_STIR_RATE in exp_value_properties:
+        experiment.bottom_stir_rate = exp_value_properties[
+            PropertyNameEnum.BOTTOM_STIR_RATE
         ]
-        dt = experiment.get_timestep_of_experiment()
-        experiment.ramp_state = experiment.create_ramp_state(
-            experiment.actual_temperature.values, dt
+    if PropertyNameEnum.TOP_STIR_RATE in exp_value_properties:
+        experiment.top_stir_rate = exp_value_properties[PropertyNameEnum.TOP_STIR_RATE]
+
+    experiment.set_temperature = exp_values_properties["set_temperature"]
+    experiment.actual_temperature = exp_values_properties[PropertyNameEnum.TEMP]
+    experiment.time_since_experiment_start = exp_values_properties[
+        PropertyNameEnum.TIME
+    ]
+    dt = experiment.get_timestep_of_experiment()
+    experiment.ramp_state = experiment.create_ramp_state(
+        experiment.actual_temperature.values, dt
+    )
+    experiment.stir_rates = exp_values_properties[PropertyNameEnum.STIR_RATE]
+    exp_reactors = [
+        Reactor(
+            solvent=get_lab_solvent_by_id(reactor.lab_sol_id, session).name,
+            polymer=get_lab_polymer_by_id(reactor.lab_pol_id, session).name,
+            polymer_id=reactor.lab_pol_id,
+            solvent_id=reactor.lab_sol_id,
+            reactor_number=reactor.reactor_number,
+            conc=PropertyValue(
+                name=PropertyNameEnum.CONC,
+                unit=reactor.conc_unit,
+                value=reactor.conc,
+            ),
+            transmission=reactor_prop[PropertyNameEnum.TRANS],
+            filtered_transmission=experiment.filter_transmission(
+                reactor_prop[PropertyNameEnum.TRANS].values, dt
+            ),
+            experiment=experiment,
         )
-        experiment.stir_rates = exp_values_properties[PropertyNameEnum.STIR_RATE]
-        exp_reactors = [
-            Reactor(
-                solvent=get_lab_solvent_by_id(reactor.lab_sol_id, session).name,
-                polymer=get_lab_polymer_by_id(reactor.lab_pol_id, session).name,
-                polymer_id=reactor.lab_pol_id,
-                solvent_id=reactor.lab_sol_id,
-                reactor_number=reactor.reactor_number,
-                conc=PropertyValue(
-                    name=PropertyNameEnum.CONC,
-                    unit=reactor.conc_unit,
-                    value=reactor.conc,
-                ),
-                transmission=reactor_prop[PropertyNameEnum.TRANS],
-                filtered_transmission=experiment.filter_transmission(
-                    reactor_prop[PropertyNameEnum.TRANS].values, dt
-                ),
-                experiment=experiment,
-            )
-            for reactor, reactor_prop in reactors
-        ]
-        experiment.reactors = exp_reactors
-        experiments.append(experiment)
-    return experiments
+        for reactor, reactor_prop in reactors
+    ]
+    experiment.reactors = exp_reactors
+    return experiment
+
+
+def get_experiment_by_id(
+    experiment_id: int, session: Union[scoped_session, Session]
+) -> Experiment:
+    """Gets the experiment with the database id
+
+    Raises:
+        LookupError: if no experiment has the id
+    """
+    exp = session.query(CSSTExperiment).filter_by(id=experiment_id).first()
+    if exp is None:
+        msg = f"No experiment with id {experiment_id} in the database"
+        logger.warning(msg)
+        raise LookupError(msg)
+    with span("db.get_experiment_by_id"):
+        return _get_experiment(exp, session)
 
 
 def get_csst_experiments(
@@ -239,56 +270,87 @@ def get_experiment_property_value_by_experiment_id(
 def get_experiment_property_values_by_experiment_id(
     experiment_id: int, session: Union[scoped_session, Session]
 ) -> Dict[str, PropertyValues]:
-    properties = {}
-    for prop_id in (
-        session.query(CSSTExperimentPropertyValues.csst_property_id)
-        .filter_by(csst_experiment_id=experiment_id)
-        .distinct()
-    ):
-        prop = session.query(CSSTProperty).filter_by(id=prop_id[0]).first()
-        values = (
-            session.query(CSSTExperimentPropertyValues)
-            .filter_by(csst_experiment_id=experiment_id, csst_property_id=prop.id)
-            .all()
+    with span("get_experiment_property_values") as s:
+        properties = {}
+        arrays = _get_property_arrays(
+            CSSTExperimentPropertyArray,
+            CSSTExperimentPropertyValues,
+            "csst_experiment_id",
+            experiment_id,
+            session,
         )
-        values = {value.array_index: value.value for value in values}
-        arr = []
-        for i in range(len(values)):
-            arr.append(values[i])
-        if prop.name != "set_temperature":
-            properties[prop.name] = PropertyValues(
-                name=prop.name, unit=prop.unit, values=np.array(arr)
-            )
-        else:
-            properties[prop.name] = PropertyValues(
-                name="temperature", unit=prop.unit, values=np.array(arr)
-            )
-    return properties
+        for prop in session.query(CSSTProperty).filter(
+            CSSTProperty.id.in_(list(arrays))
+        ):
+            values = arrays[prop.id]
+            s.add(rows=len(values))
+            if prop.name != "set_temperature":
+                properties[prop.name] = PropertyValues(
+                    name=prop.name, unit=prop.unit, values=values
+                )
+            else:
+                properties[prop.name] = PropertyValues(
+                    name="temperature", unit=prop.unit, values=values
+                )
+        return properties
 
 
 def get_reactor_property_values_by_reactor_id(
     reactor_id: int, session: Union[scoped_session, Session]
 ) -> Dict[str, PropertyValues]:
-    properties = {}
-    for prop_id in (
-        session.query(CSSTReactorPropertyValues.csst_property_id)
-        .filter_by(csst_reactor_id=reactor_id)
-        .distinct()
-    ):
-        prop = session.query(CSSTProperty).filter_by(id=prop_id[0]).first()
-        values = (
-            session.query(CSSTReactorPropertyValues)
-            .filter_by(csst_reactor_id=reactor_id, csst_property_id=prop.id)
-            .all()
+    with span("get_reactor_property_values") as s:
+        properties = {}
+        arrays = _get_property_arrays(
+            CSSTReactorPropertyArray,
+            CSSTReactorPropertyValues,
+            "csst_reactor_id",
+            reactor_id,
+            session,
         )
-        values = {value.array_index: value.value for value in values}
-        arr = []
-        for i in range(len(values)):
-            arr.append(values[i])
-        properties[prop.name] = PropertyValues(
-            name=prop.name, unit=prop.unit, values=np.array(arr)
+        for prop in session.query(CSSTProperty).filter(
+            CSSTProperty.id.in_(list(arrays))
+        ):
+            values = arrays[prop.id]
+            s.add(rows=len(values))
+            properties[prop.name] = PropertyValues(
+                name=prop.name, unit=prop.unit, values=values
+            )
+        return properties
+
+
+def _get_property_arrays(
+    array_table: Type[Union[CSSTExperimentPropertyArray, CSSTReactorPropertyArray]],
+    values_table: Type[Union[CSSTExperimentPropertyValues, CSSTReactorPropertyValues]],
+    owner_column: str,
+    owner_id: int,
+    session: Union[scoped_session, Session],
+) -> Dict[int, np.ndarray]:
+    """Value arrays of the properties of an experiment or reactor by property id
+
+    Each array is one row of the array table. Properties that are only in the one row
+    per value table (i.e., added before the array tables existed and not migrated)
+    are reassembled from their rows in array_index order.
+    """
+    arrays = {
+        row.csst_property_id: np.asarray(row.values, dtype=np.float64)
+        for row in session.query(array_table).filter(
+            getattr(array_table, owner_column) == owner_id
         )
-    return properties
+    }
+    rows = (
+        session.query(values_table.csst_property_id, values_table.value)
+        .filter(
+            getattr(values_table, owner_column) == owner_id,
+            values_table.csst_property_id.notin_(list(arrays)),
+        )
+        .order_by(values_table.csst_property_id, values_table.array_index)
+    )
+    legacy: Dict[int, List[float]] = {}
+    for prop_id, value in rows:
+        legacy.setdefault(prop_id, []).append(value)
+    for prop_id, values in legacy.items():
+        arrays[prop_id] = np.array(values, dtype=np.float64)
+    return arrays
 
 
 def get_csst_experiment(
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, Float, DateTime, Text, ForeignKey, Boolean, JSON
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import ARRAY, DOUBLE_PRECISION
 
 from csst.db._base import Base
 
@@ -178,6 +178,58 @@ class CSSTExperimentPropertyValues(Base):
     value = Column(Float, nullable=False, primary_key=True)
 
 
+class CSSTReactorPropertyArray(Base):
+    """Model to store a whole array of reactor property values, like transmission,
+    in one row
+
+    Replaces CSSTReactorPropertyValues, which stores one row per value.
+
+    Attributes:
+        csst_property_id (int):
+            Id in the CSSTProperty table
+        csst_reactor_id (int):
+            Id of the reactor the property is associated with
+        values (List[float]):
+            Values of the property in the order of the original array
+    """
+
+    __tablename__ = "csst_reactor_property_arrays"
+
+    csst_property_id = Column(
+        Integer, ForeignKey("csst_properties.id"), nullable=False, primary_key=True
+    )
+    csst_reactor_id = Column(
+        Integer, ForeignKey("csst_reactors.id"), nullable=False, primary_key=True
+    )
+    values = Column(ARRAY(DOUBLE_PRECISION, dimensions=1), nullable=False)
+
+
+class CSSTExperimentPropertyArray(Base):
+    """Model to store a whole array of experiment property values, like temperature
+    and time, in one row
+
+    Replaces CSSTExperimentPropertyValues, which stores one row per value.
+
+    Attributes:
+        csst_property_id (int):
+            Id in the CSSTProperty table
+        csst_experiment_id (int):
+            Id of the experiment the property is associated with
+        values (List[float]):
+            Values of the property in the order of the original array
+    """
+
+    __tablename__ = "csst_experiment_property_arrays"
+
+    csst_property_id = Column(
+        Integer, ForeignKey("csst_properties.id"), nullable=False, primary_key=True
+    )
+    csst_experiment_id = Column(
+        Integer, ForeignKey("csst_experiments.id"), nullable=False, primary_key=True
+    )
+    values = Column(ARRAY(DOUBLE_PRECISION, dimensions=1), nullable=False)
+
+
 class CSSTReactorProcessedTemperature(Base):
     """Model to store processed csst temperature data.
     See https://github.com/jdkern11/csst_analyzer/blob/main/csst/processor/models.py
@@ -1,14 +1,13 @@
 import logging
-from typing import Dict, List, Set
+import os
+from typing import TYPE_CHECKING, Dict, List, Set
 from pathlib import Path
-from datetime import datetime
 from typing import TextIO
 
-import pandas as pd
 import numpy as np
-from scipy.signal import savgol_filter
 
-from csst.experiment.helpers import try_parsing_date, make_name_searchable
+from csst.experiment.helpers import try_parsing_date, make_name_searchable, per_hour
+from csst.instrumentation import span
 from csst.experiment.models import (
     Reactor,
     PropertyValue,
@@ -17,9 +16,15 @@ from csst.experiment.models import (
     TemperatureHold,
     TemperatureProgram,
     TemperatureSettingEnum,
+    TemperatureProgramLabels,
     FilteredTransmission,
 )
 
+# pandas and scipy are imported where they are first used so importing csst.experiment
+# (e.g., to read a header or query the database) does not pay for them
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +33,10 @@ class Experiment:
 
     Attributes:
         file_name (str): name of the data file
+        file_path (Optional[Path]): path the experiment was loaded from, if it was
+            loaded from a file
+        database_id (Optional[int]): id of the experiment in the database, if it was
+            loaded from the database
         version (str): version of the data file
         experiment_details (str):
         experiment_number (str):
@@ -74,12 +83,22 @@ class Experiment:
         reactors (List[Reactor]):
             List of reactors. Each reactor keeps track of the polymer, solvent,
             concentration and tranmission percentage (see Reactor documentation).
+        segments (pd.DataFrame):
+            Run length encoded ramp state (see get_segments). Computed the first time
+            it is accessed and reused until ramp_state, actual_temperature or
+            time_since_experiment_start is replaced or changes length.
+        program_labels (TemperatureProgramLabels):
+            Temperature program stage and step of each sample (see
+            get_program_labels). Computed the first time it is accessed and reused
+            until set_temperature or temperature_program is replaced.
     """
 
     def __init__(self):
         """Initialize attirbutes"""
         # experiment details
         self.file_name = None
+        self.file_path = None
+        self.database_id = None
         self.version = None
         self.experiment_details = None
         self.experiment_number = None
@@ -102,6 +121,13 @@ class Experiment:
         self.stir_rates = None
         self.reactors = []
 
+        # cache of get_segments results
+        self._segments = {}
+        self._segments_source = None
+        # cache of get_program_labels results
+        self._program_labels = {}
+        self._program_labels_source = None
+
     def dict(self) -> Dict[str, str]:
         """Returns dictionary of experiment information, but no reactor,
         temperature program or file_name information
@@ -124,13 +150,17 @@ class Experiment:
     def load_from_file(cls, data_path: str) -> "Experiment":
         """Load data from a file"""
         obj = cls()
-        # Need to find start of data and save header information
-        with open(data_path, "r", encoding="utf-8") as f:
-            first_line = f.readline().strip("\n")
-            obj.version = first_line.split(",")[1].split(":")[1].strip()
-            if obj.version == "1014":
-                obj._load_file_version_1014(f)
-        obj.file_name = Path(data_path).name
+        with span("experiment.load_from_file", nbytes=os.path.getsize(data_path)) as s:
+            # Need to find start of data and save header information
+            with open(data_path, "r", encoding="utf-8") as f:
+                first_line = f.readline().strip("\n")
+                obj.version = first_line.split(",")[1].split(":")[1].strip()
+                if obj.version == "1014":
+                    obj._load_file_version_1014(f)
+            obj.file_path = Path(data_path)
+            obj.file_name = obj.file_path.name
+            if obj.time_since_experiment_start is not None:
+                s.add(rows=len(obj.time_since_experiment_start.values))
 
         return obj
 
@@ -140,6 +170,8 @@ class Experiment:
         Args:
             f: open file to read data from
         """
+        import pandas as pd
+
         # load header data and find where the Temperature Program starts
         # initialize reactor data
         reactors = {}
@@ -231,7 +263,9 @@ class Experiment:
                                 ),
                                 "polymer": pol.strip(),
                                 "solvent": sol.strip(),
-                                "reactor_number": int(line[0].strip()[-1]),
+                                "reactor_number": int(
+                                    line[0].strip()[len("Reactor") :]
+                                ),
                             }
                         except KeyError:
                             logger.info(f"{line} missing polymer or solvent")
@@ -332,19 +366,23 @@ class Experiment:
 
         # load data block and get set temperature, actual temperature, time and
         # stir rates
-        df = pd.read_csv(f)
+        with span("read_csv") as s:
+            df = pd.read_csv(f)
+            s.add(rows=len(df))
         # get time in hours
-        times = df["Decimal Time [mins]"]
-        time_since_experiment_start = []
-        for time in times:
-            # Account for when day in
-            if "." in time:
-                t = datetime.strptime(time, "%d.%H:%M:%S")
-                val = t.day * 24 + t.hour + t.minute / 60 + t.second / 3600
-            else:
-                t = datetime.strptime(time, "%H:%M:%S")
-                val = t.hour + t.minute / 60 + t.second / 3600
-            time_since_experiment_start.append(val)
+        # times are H:MM:SS, or D.HH:MM:SS once the experiment has run for a day
+        with span("parse_times", rows=len(df)):
+            times = df["Decimal Time [mins]"].astype(str)
+            parts = times.str.extract(r"^(?:(\d+)\.)?(\d+):(\d+):(\d+)$")
+            if parts[1].isna().any():
+                bad = times[parts[1].isna()].iloc[0]
+                raise ValueError(
+                    f"{bad} is not a valid time since the experiment start"
+                )
+            parts = parts.astype(float).fillna(0)
+            time_since_experiment_start = (
+                parts[0] * 24 + parts[1] + parts[2] / 60 + parts[3] / 3600
+            ).tolist()
         self.time_since_experiment_start = PropertyValues(
             name="time", unit="hour", values=time_since_experiment_start
         )
@@ -374,7 +412,8 @@ class Experiment:
         )
 
         for reactor, parameters in reactors.items():
-            reactor_col = [col for col in df.columns if reactor in col][0]
+            # match the whole name so Reactor1 does not match Reactor10
+            reactor_col = [col for col in df.columns if col.split(" ")[0] == reactor][0]
             solvent_id, polymer_id = None, None
 
             sol = make_name_searchable(parameters["solvent"])
@@ -404,21 +443,240 @@ class Experiment:
                 )
             )
 
-    def filter_transmission(self, transmissions, dt):
-        """Use savgol_filter on the transmission values"""
-        wl = max(int((120 / 3600) / dt), 3)
-        if wl % 2 == 0:
-            wl += 1
-        return FilteredTransmission(
-            window_length=wl,
-            polyorder=1,
-            values=savgol_filter(transmissions, window_length=wl, polyorder=1),
-        )
+    def filter_transmission(self, transmissions, dt, window_length=None):
+        """Use savgol_filter on the transmission values
+
+        Args:
+            transmissions: transmission values to filter. If 2d, each row is filtered.
+            dt: change in time in hours at each index step of experiment
+            window_length: Optional savgol_filter window length. Default None uses
+                the odd number of indices closest to 2 minutes (minimum of 3).
+        """
+        from scipy.signal import savgol_filter
+
+        wl = window_length
+        if wl is None:
+            wl = max(int((120 / 3600) / dt), 3)
+            if wl % 2 == 0:
+                wl += 1
+        with span("filter_transmission", rows=np.size(transmissions)):
+            return FilteredTransmission(
+                window_length=wl,
+                polyorder=1,
+                values=savgol_filter(transmissions, window_length=wl, polyorder=1),
+            )
 
     def get_timestep_of_experiment(self):
         """Get average time passed between indices inn experiment"""
         return np.mean(np.diff(self.time_since_experiment_start.values))
 
+    @property
+    def segments(self) -> "pd.DataFrame":
+        """Run length encoded ramp state with the default minimum cycle duration"""
+        return self.get_segments()
+
+    def get_segments(
+        self, min_cycle_duration_in_hours: float = 1 / 60
+    ) -> "pd.DataFrame":
+        """Run length encode the ramp state into heating, cooling and holding segments
+
+        Segments shorter than min_cycle_duration_in_hours are noise in the ramp state,
+        so they are not part of any cycle and the segments around them are merged into
+        one cycle if they have the same state. The table is computed once and reused
+        until ramp_state or the actual temperature or time values are replaced or
+        change length. Changing values in place without changing their length is not
+        detected.
+
+        Args:
+            min_cycle_duration_in_hours: minimum duration of a segment to count as
+                part of a cycle. Default 1 minute.
+
+        Returns:
+            Dataframe with one row per segment. Columns are 'start' (index of the
+            first sample), 'stop' (index after the last sample), 'state', 'cycle'
+            (number of the cycle among cycles with the same state starting at 1,
+            or 0 if the segment is too short to be part of a cycle), 'duration' (in
+            the time unit) and 'mean_rate' (temperature change per unit time).
+        """
+        arrays = (
+            self.ramp_state,
+            getattr(self.actual_temperature, "values", None),
+            getattr(self.time_since_experiment_start, "values", None),
+        )
+        source = (arrays, [None if a is None else len(a) for a in arrays])
+        if (
+            self._segments_source is None
+            or any(a is not b for a, b in zip(arrays, self._segments_source[0]))
+            or source[1] != self._segments_source[1]
+        ):
+            self._segments = {}
+            self._segments_source = source
+        if min_cycle_duration_in_hours not in self._segments:
+            self._segments[min_cycle_duration_in_hours] = self._create_segments(
+                min_cycle_duration_in_hours
+            )
+        return self._segments[min_cycle_duration_in_hours]
+
+    def _create_segments(self, min_cycle_duration_in_hours: float) -> "pd.DataFrame":
+        """Creates the segment table returned by get_segments"""
+        import pandas as pd
+
+        ramp_state = np.asarray(self.ramp_state)
+        times = np.asarray(self.time_since_experiment_start.values, dtype=np.float64)
+        temps = np.asarray(self.actual_temperature.values, dtype=np.float64)
+        if len(ramp_state) == 0:
+            return pd.DataFrame(
+                columns=["start", "stop", "state", "cycle", "duration", "mean_rate"]
+            )
+        starts = np.flatnonzero(np.r_[True, ramp_state[1:] != ramp_state[:-1]])
+        stops = np.r_[starts[1:], len(ramp_state)]
+        states = ramp_state[starts]
+        durations = times[stops - 1] - times[starts]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = (temps[stops - 1] - temps[starts]) / durations
+
+        # consecutive long segments with the same state make up one cycle
+        long_segments = np.flatnonzero(durations >= min_cycle_duration_in_hours)
+        long_states = states[long_segments]
+        new_cycle = np.r_[True, long_states[1:] != long_states[:-1]]
+        cycle_states = long_states[new_cycle]
+        cycle_numbers = np.zeros(len(cycle_states), dtype=np.int64)
+        for state in np.unique(cycle_states):
+            is_state = cycle_states == state
+            cycle_numbers[is_state] = np.arange(1, is_state.sum() + 1)
+        cycles = np.zeros(len(starts), dtype=np.int64)
+        cycles[long_segments] = cycle_numbers[np.cumsum(new_cycle) - 1]
+        return pd.DataFrame(
+            {
+                "start": starts,
+                "stop": stops,
+                "state": states.astype(object),
+                "cycle": cycles,
+                "duration": durations,
+                "mean_rate": rates,
+            }
+        )
+
+    def get_cycle_slice(
+        self, state: str, cycle: int, min_cycle_duration_in_hours: float = 1 / 60
+    ) -> slice:
+        """Get the slice of sample indices of a cycle
+
+        Slicing numpy arrays (e.g., the temperature or transmission values) with the
+        slice returns a view, so no data is copied.
+
+        Typical usage example:
+
+            # third cooling ramp
+            s = experiment.get_cycle_slice("cooling", 3)
+            temps = experiment.actual_temperature.values[s]
+
+        Args:
+            state: 'heating', 'cooling' or 'holding'
+            cycle: number of the cycle among cycles with the same state starting at 1
+            min_cycle_duration_in_hours: see get_segments
+
+        Returns:
+            slice from the first sample to after the last sample of the cycle. Short
+            segments of a different state inside the cycle are included.
+        """
+        segments = self.get_segments(min_cycle_duration_in_hours)
+        segments = segments[(segments.state == state) & (segments.cycle == cycle)]
+        if len(segments) == 0:
+            msg = f"Experiment has no {state} cycle {cycle}"
+            logger.warning(msg)
+            raise LookupError(msg)
+        return slice(int(segments.start.iloc[0]), int(segments.stop.iloc[-1]))
+
+    @property
+    def program_labels(self) -> TemperatureProgramLabels:
+        """Temperature program labels of each sample with the default tolerance"""
+        return self.get_program_labels()
+
+    def get_program_labels(self, tolerance: float = 0.05) -> TemperatureProgramLabels:
+        """Label each sample with the temperature program stage and step it was taken in
+
+        The steps of the temperature program are aligned to the set temperature. A
+        temperature change step ends when the set temperature reaches the step
+        temperature. A hold step ends after its hold time, or, if the next step is not
+        a hold at the same temperature, once the set temperature leaves the hold
+        temperature afterwards (the instrument waits at holds, e.g., while samples are
+        loaded). Each step is located with a vectorized search from where the last
+        step ended, so the labels take one pass over the set temperatures per step.
+
+        Args:
+            tolerance: set temperatures within tolerance of a step temperature are at
+                the step temperature. Default 0.05.
+        """
+        source = (self.set_temperature, self.temperature_program)
+        if self._program_labels_source is None or any(
+            a is not b for a, b in zip(source, self._program_labels_source)
+        ):
+            self._program_labels = {}
+            self._program_labels_source = source
+        if tolerance not in self._program_labels:
+            self._program_labels[tolerance] = self._create_program_labels(tolerance)
+        return self._program_labels[tolerance]
+
+    def _create_program_labels(self, tolerance: float) -> TemperatureProgramLabels:
+        """Creates the labels returned by get_program_labels"""
+        if self.temperature_program is None or self.set_temperature is None:
+            raise ValueError(
+                "Temperature program and set temperature are needed to label samples"
+            )
+        set_temps = np.asarray(self.set_temperature.values, dtype=np.float64)
+        times = np.asarray(self.time_since_experiment_start.values, dtype=np.float64)
+        n = len(set_temps)
+        stage = np.full(n, "", dtype="<U12")
+        step_index = np.full(n, -1, dtype=np.int64)
+        expected = np.full(n, np.nan)
+        ramp_state = np.full(n, "holding", dtype="<U7")
+        steps = [
+            (name, i, step)
+            for name in ["solvent_tune", "sample_load", "experiment"]
+            for i, step in enumerate(getattr(self.temperature_program, name))
+        ]
+        start = 0
+        current = set_temps[0] if n > 0 else np.nan
+        for k, (name, i, step) in enumerate(steps):
+            if start >= n:
+                break
+            if isinstance(step, TemperatureChange):
+                target = step.to.value
+                stop = _first_index(np.abs(set_temps[start:] - target) <= tolerance)
+                stop = start + stop
+                rate = step.rate.value * per_hour(step.rate.unit.split("/")[-1])
+                direction = np.sign(target - current)
+                change = direction * rate * (times[start:stop] - times[start])
+                if direction > 0:
+                    expected[start:stop] = np.minimum(current + change, target)
+                    ramp_state[start:stop] = "heating"
+                else:
+                    expected[start:stop] = np.maximum(current + change, target)
+                    if direction < 0:
+                        ramp_state[start:stop] = "cooling"
+            else:
+                target = step.at.value
+                hold = step.for_.value / per_hour(step.for_.unit)
+                stop = int(np.searchsorted(times, times[start] + hold))
+                next_step = steps[k + 1][2] if k + 1 < len(steps) else None
+                if not (
+                    isinstance(next_step, TemperatureHold)
+                    and abs(next_step.at.value - target) <= tolerance
+                ):
+                    stop += _first_index(np.abs(set_temps[stop:] - target) > tolerance)
+                expected[start:stop] = target
+            stage[start:stop] = name
+            step_index[start:stop] = i
+            current = target
+            start = stop
+        return TemperatureProgramLabels(
+            stage=stage,
+            step_index=step_index,
+            expected_set_temperature=expected,
+            ramp_state=ramp_state,
+        )
+
     def create_ramp_state(self, temperatures: List[float], dt: float) -> List[str]:
         """Creates ramp state based on passed in temperatures
 
@@ -430,23 +688,31 @@ class Experiment:
         ramp_state = ["holding"] * len(temperatures)
         # width is number of indices that represents 30 seconds
         width = int((60 / 3600) / dt)
-        for i in range(1, len(ramp_state) - 1):
-            if i < width:
-                left = np.mean(temperatures[0:i])
-            else:
-                left = np.mean(temperatures[i - width : i])
-            if i > len(ramp_state) - width:
-                right = np.mean(temperatures[i + 1 :])
-            else:
-                right = np.mean(temperatures[i + 1 : i + 1 + width])
-            mid = temperatures[i]
-            if left < mid and mid < right:
-                ramp_state[i] = "heating"
-            elif mid > right and left > mid:
-                ramp_state[i] = "cooling"
+        with span("create_ramp_state", rows=len(temperatures)):
+            for i in range(1, len(ramp_state) - 1):
+                if i < width:
+                    left = np.mean(temperatures[0:i])
+                else:
+                    left = np.mean(temperatures[i - width : i])
+                if i > len(ramp_state) - width:
+                    right = np.mean(temperatures[i + 1 :])
+                else:
+                    right = np.mean(temperatures[i + 1 : i + 1 + width])
+                mid = temperatures[i]
+                if left < mid and mid < right:
+                    ramp_state[i] = "heating"
+                elif mid > right and left > mid:
+                    ramp_state[i] = "cooling"
         return ramp_state
 
 
+def _first_index(mask: np.ndarray) -> int:
+    """Index of the first True value in mask, or the length of mask if none are"""
+    if len(mask) == 0 or not mask.any():
+        return len(mask)
+    return int(np.argmax(mask))
+
+
 def load_experiments_from_folder(
     folder: str, recursive: bool = False, files_to_ignore: Set[str] = {}
 ) -> List[Experiment]:
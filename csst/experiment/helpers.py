@@ -42,3 +42,15 @@ def make_name_searchable(name: str) -> str:
     search_name = name.lower()
     search_name = search_name.translate({ord(i): None for i in ":{}- ()[],‐'\""})
     return search_name
+
+
+def per_hour(unit: str) -> float:
+    """Number of the time unit in one hour (e.g., 60 for min)"""
+    unit = unit.strip().lower()
+    if unit in ["s", "sec", "secs", "second", "seconds"]:
+        return 3600
+    if unit in ["min", "mins", "minute", "minutes"]:
+        return 60
+    if unit in ["h", "hr", "hrs", "hour", "hours"]:
+        return 1
+    raise ValueError(f"Unknown time unit {unit}")
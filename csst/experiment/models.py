@@ -185,3 +185,34 @@ class Reactor(BaseModel):
     def __str__(self):
         """String representation is the polymer in the solvent at the specific concentration"""
         return f"Reactor {self.reactor_number}: {self.conc.value} {self.conc.unit} {self.polymer} in {self.solvent}"
+
+
+class TemperatureProgramLabels(BaseModel):
+    """Temperature program stage and step each sample of an experiment was taken in
+
+    Indices in each array match the experiment time, temperature and transmission
+    indices.
+
+    Args:
+        stage: 'solvent_tune', 'sample_load' or 'experiment', or '' if the sample
+            was taken after the temperature program finished.
+        step_index: index of the step in its stage, or -1 if there is no stage.
+        expected_set_temperature: set temperature the temperature program expects
+            at each sample. NaN if there is no stage.
+        ramp_state: 'heating' or 'cooling' for samples in a temperature change step
+            and 'holding' for samples in a hold step or with no stage.
+    """
+
+    stage: np.ndarray
+    step_index: np.ndarray
+    expected_set_temperature: np.ndarray
+    ramp_state: np.ndarray
+
+    class Config:
+        # added to allow np.ndarray type
+        arbitrary_types_allowed = True
+
+    @property
+    def experiment_mask(self) -> np.ndarray:
+        """Boolean mask of the samples taken in the experiment stage"""
+        return self.stage == "experiment"
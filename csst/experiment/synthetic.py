@@ -0,0 +1,404 @@
+"""Write synthetic Crystal16 data report files
+
+Synthetic reports are version 1014 files that load with
+csst.experiment.Experiment.load_from_file, so production-scale experiments can be
+created locally for benchmarks and stress tests. The set temperature follows the
+temperature program, the actual temperature lags behind it, and each reactor's
+transmission follows a cloud point curve: it falls while cooling through the cloud
+point and rises while heating through the clear point.
+
+Typical usage example:
+
+    path = write_synthetic_report(
+        "synthetic.csv", reactors=default_reactors(16), duration_in_hours=200
+    )
+    experiment = Experiment.load_from_file(path)
+"""
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from scipy.signal import lfilter
+
+from csst.experiment.helpers import per_hour
+from csst.experiment.models import (
+    PropertyValue,
+    TemperatureChange,
+    TemperatureHold,
+    TemperatureProgram,
+    TemperatureSettingEnum,
+)
+
+logger = logging.getLogger(__name__)
+
+# zero padded minutes and seconds so times can be formatted without a python loop
+_PADDED = np.array([f"{i:02d}" for i in range(60)], dtype=object)
+
+
+class SyntheticReactor(BaseModel):
+    """Settings of one reactor in a synthetic report
+
+    Args:
+        polymer: polymer in the reactor
+        solvent: solvent in the reactor
+        concentration: polymer concentration
+        concentration_unit: unit of the concentration
+        cloud_point: temperature the transmission falls through while cooling
+        clear_point: temperature the transmission rises through while heating. If
+            None, 5 degrees above the cloud point.
+        width: temperature width of the transition. The transmission goes from about
+            12% to 88% over 4 widths.
+        polymer_id: Optional id of the polymer written to the report description
+        solvent_id: Optional id of the solvent written to the report description
+    """
+
+    polymer: str = "PEG"
+    solvent: str = "TOL"
+    concentration: float = 5
+    concentration_unit: str = "mg/ml"
+    cloud_point: float = 30
+    clear_point: Optional[float] = None
+    width: float = 1
+    polymer_id: Optional[int] = None
+    solvent_id: Optional[int] = None
+
+
+def default_reactors(
+    n: int, min_cloud_point: float = 20, max_cloud_point: float = 50
+) -> List[SyntheticReactor]:
+    """Reactors with increasing concentrations and cloud points spread over a range
+
+    Args:
+        n: number of reactors
+        min_cloud_point: cloud point of the first reactor
+        max_cloud_point: cloud point of the last reactor
+    """
+    cloud_points = np.linspace(min_cloud_point, max_cloud_point, n)
+    return [
+        SyntheticReactor(concentration=5 * (i + 1), cloud_point=round(cloud_point, 2))
+        for i, cloud_point in enumerate(cloud_points)
+    ]
+
+
+def default_temperature_program(
+    low: float = 10,
+    high: float = 60,
+    rate: float = 0.5,
+    hold_in_seconds: float = 600,
+) -> TemperatureProgram:
+    """Temperature program that tunes and loads at 20 C, then heats to high and cools
+    to low, holding at each
+
+    Args:
+        low: temperature cooled to in C
+        high: temperature heated to in C
+        rate: heating and cooling rate in C/min
+        hold_in_seconds: time held at high and low
+    """
+    return TemperatureProgram(
+        block="A",
+        solvent_tune=[_change(TemperatureSettingEnum.HEAT, 20, 20), _hold(20, 30)],
+        sample_load=[_hold(20, 60)],
+        experiment=[
+            _change(TemperatureSettingEnum.HEAT, high, rate),
+            _hold(high, hold_in_seconds),
+            _change(TemperatureSettingEnum.COOL, low, rate),
+            _hold(low, hold_in_seconds),
+        ],
+    )
+
+
+def write_synthetic_report(
+    path: Union[str, Path],
+    reactors: Optional[List[SyntheticReactor]] = None,
+    duration_in_hours: Optional[float] = None,
+    samples: Optional[int] = None,
+    sampling_interval_in_seconds: float = 2,
+    temperature_program: Optional[TemperatureProgram] = None,
+    start_temperature: float = 20,
+    start_of_experiment: datetime = datetime(2022, 8, 19, 13, 54),
+    time_constant_in_seconds: float = 30,
+    noise: float = 1,
+    seed: Optional[int] = 0,
+    chunk_size: int = 100_000,
+) -> Path:
+    """Write a synthetic version 1014 report
+
+    The experiment steps of the temperature program are repeated until the report
+    is long enough, and every step run is written to the report's temperature program.
+    Samples are generated and written chunk_size at a time, so the memory used does
+    not grow with the length of the report.
+
+    Args:
+        path: file to write
+        reactors: reactors in the report. Default 4 reactors from default_reactors.
+        duration_in_hours: length of the report. Ignored if samples is passed.
+        samples: number of samples in the report. If neither samples nor
+            duration_in_hours are passed, the temperature program is run once.
+        sampling_interval_in_seconds: time between samples. Times are written to the
+            second like the instrument does.
+        temperature_program: temperature program to run. Default
+            default_temperature_program().
+        start_temperature: set temperature at the start of the report in C
+        start_of_experiment: date and time the experiment started
+        time_constant_in_seconds: time constant of the actual temperature following
+            the set temperature
+        noise: standard deviation of the noise added to the transmission in %
+        seed: seed of the noise. None for different noise every call.
+        chunk_size: samples generated and written at a time
+
+    Returns:
+        path of the written report
+    """
+    path = Path(path)
+    if reactors is None:
+        reactors = default_reactors(4)
+    if temperature_program is None:
+        temperature_program = default_temperature_program()
+    if sampling_interval_in_seconds <= 0:
+        raise ValueError(
+            "sampling_interval_in_seconds must be greater than 0, not "
+            + f"{sampling_interval_in_seconds}"
+        )
+    if samples is None and duration_in_hours is not None:
+        samples = int(duration_in_hours * 3600 / sampling_interval_in_seconds) + 1
+    run_length = None
+    if samples is not None:
+        run_length = (samples - 1) * sampling_interval_in_seconds
+    program = _repeat_program(temperature_program, start_temperature, run_length)
+    times, temps, directions = _program_breakpoints(program, start_temperature)
+    if samples is None:
+        samples = int(times[-1] / sampling_interval_in_seconds) + 1
+
+    rng = np.random.default_rng(seed)
+    clouds = np.array([reactor.cloud_point for reactor in reactors])[:, None]
+    clears = np.array(
+        [
+            reactor.cloud_point + 5
+            if reactor.clear_point is None
+            else reactor.clear_point
+            for reactor in reactors
+        ]
+    )[:, None]
+    widths = np.array([reactor.width for reactor in reactors])[:, None]
+    alpha = 1 - np.exp(-sampling_interval_in_seconds / time_constant_in_seconds)
+    # state of the actual temperature filter carried between chunks
+    zi = np.array([(1 - alpha) * start_temperature])
+    columns = (
+        ["Date Time", "Decimal Time [mins]"]
+        + ["Temperature Setpoint [°C]", "Temperature Actual [°C]"]
+        + [f"Reactor{i + 1} Transmission [%]" for i in range(len(reactors))]
+        + ["Stirring Rate [rpm]"]
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(_header(reactors, program, start_of_experiment))
+        f.write(",".join(columns) + "\n")
+        for start in range(0, samples, chunk_size):
+            seconds = (
+                np.arange(start, min(start + chunk_size, samples))
+                * sampling_interval_in_seconds
+            )
+            set_temps = np.round(np.interp(seconds, times, temps), 1)
+            actual_temps, zi = lfilter([alpha], [1, alpha - 1], set_temps, zi=zi)
+            actual_temps = np.round(actual_temps, 1)
+            segment = np.clip(
+                np.searchsorted(times, seconds, side="right") - 1,
+                0,
+                len(directions) - 1,
+            )
+            points = np.where(directions[segment] > 0, clears, clouds)
+            transmissions = 100 / (1 + np.exp((points - actual_temps) / widths))
+            transmissions += rng.normal(0, noise, transmissions.shape)
+            transmissions = np.clip(np.round(transmissions), 0, 100).astype(np.int64)
+
+            data = {
+                columns[0]: _format_dates(seconds, start_of_experiment),
+                columns[1]: _format_times(seconds),
+                columns[2]: set_temps,
+                columns[3]: actual_temps,
+            }
+            for i, values in enumerate(transmissions):
+                data[columns[4 + i]] = values
+            data[columns[-1]] = 0
+            pd.DataFrame(data).to_csv(f, header=False, index=False)
+    logger.info(f"Wrote {samples} samples of {len(reactors)} reactors to {path}")
+    return path
+
+
+def _change(
+    setting: TemperatureSettingEnum, to: float, rate: float
+) -> TemperatureChange:
+    """Temperature change step to a temperature in C at a rate in C/min"""
+    return TemperatureChange(
+        setting=setting,
+        to=PropertyValue(name="temperature", unit="°C", value=to),
+        rate=PropertyValue(name="temperature_change_rate", unit="°C/min", value=rate),
+    )
+
+
+def _hold(at: float, seconds: float) -> TemperatureHold:
+    """Temperature hold step at a temperature in C for a number of seconds"""
+    return TemperatureHold(
+        at=PropertyValue(name="temperature", unit="°C", value=at),
+        for_=PropertyValue(name="time", unit="sec", value=seconds),
+    )
+
+
+def _step_seconds(step: Union[TemperatureChange, TemperatureHold], current: float):
+    """Seconds a step takes starting from the current set temperature"""
+    if isinstance(step, TemperatureChange):
+        rate = step.rate.value * per_hour(step.rate.unit.split("/")[-1]) / 3600
+        return abs(step.to.value - current) / rate
+    return step.for_.value * 3600 / per_hour(step.for_.unit)
+
+
+def _step_temperature(step: Union[TemperatureChange, TemperatureHold]) -> float:
+    """Set temperature at the end of a step"""
+    if isinstance(step, TemperatureChange):
+        return step.to.value
+    return step.at.value
+
+
+def _repeat_program(
+    program: TemperatureProgram, start_temperature: float, run_length: Optional[float]
+) -> TemperatureProgram:
+    """Repeat the experiment steps of the program until it lasts run_length seconds"""
+    steps = program.solvent_tune + program.sample_load
+    current, elapsed = start_temperature, 0
+    for step in steps:
+        elapsed += _step_seconds(step, current)
+        current = _step_temperature(step)
+    experiment = list(program.experiment)
+    for step in experiment:
+        elapsed += _step_seconds(step, current)
+        current = _step_temperature(step)
+    if run_length is not None and elapsed < run_length:
+        cycle = 0
+        current_ = current
+        for step in program.experiment:
+            cycle += _step_seconds(step, current_)
+            current_ = _step_temperature(step)
+        if cycle <= 0:
+            raise ValueError("The experiment steps of the program must take time")
+        while elapsed < run_length:
+            for step in program.experiment:
+                experiment.append(step)
+                elapsed += _step_seconds(step, current)
+                current = _step_temperature(step)
+    return TemperatureProgram(
+        block=program.block,
+        solvent_tune=program.solvent_tune,
+        sample_load=program.sample_load,
+        experiment=experiment,
+    )
+
+
+def _program_breakpoints(
+    program: TemperatureProgram, start_temperature: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Times in seconds and set temperatures at the end of every step, with the
+    direction the temperature moves (1 heating, -1 cooling) in each step. Holds keep
+    the direction of the step before them.
+    """
+    times, temps, directions = [0.0], [start_temperature], []
+    direction = 1
+    for step in program.solvent_tune + program.sample_load + program.experiment:
+        temp = _step_temperature(step)
+        if isinstance(step, TemperatureChange) and temp != temps[-1]:
+            direction = 1 if temp > temps[-1] else -1
+        times.append(times[-1] + _step_seconds(step, temps[-1]))
+        temps.append(temp)
+        directions.append(direction)
+    if len(directions) == 0:
+        raise ValueError("The temperature program has no steps")
+    return np.array(times), np.array(temps), np.array(directions)
+
+
+def _format_times(seconds: np.ndarray) -> np.ndarray:
+    """Format seconds since the start like the instrument (H:MM:SS, or D.HH:MM:SS
+    after the first day)
+    """
+    seconds = seconds.astype(np.int64)
+    hours, rem = np.divmod(seconds, 3600)
+    minutes, secs = np.divmod(rem, 60)
+    days, day_hours = np.divmod(hours, 24)
+    clock = ":" + _PADDED[minutes] + ":" + _PADDED[secs]
+    return np.where(
+        days > 0,
+        days.astype(str).astype(object) + "." + _PADDED[day_hours] + clock,
+        hours.astype(str).astype(object) + clock,
+    )
+
+
+def _format_dates(seconds: np.ndarray, start_of_experiment: datetime) -> np.ndarray:
+    """Format the date and time of each sample to the minute (e.g., 8/19/22 13:54)"""
+    offset = start_of_experiment.second + start_of_experiment.minute * 60
+    minutes, inverse = np.unique(
+        (seconds.astype(np.int64) + offset) // 60, return_inverse=True
+    )
+    start = start_of_experiment.replace(minute=0, second=0, microsecond=0)
+    dates = pd.Timestamp(start) + pd.to_timedelta(minutes, unit="min")
+    formatted = np.array(
+        [f"{d.month}/{d.day}/{d:%y} {d.hour}:{d:%M}" for d in dates], dtype=object
+    )
+    return formatted[inverse]
+
+
+def _format_step(step: Union[TemperatureChange, TemperatureHold]) -> str:
+    """Format a step like the temperature program of a report"""
+    if isinstance(step, TemperatureChange):
+        setting = (
+            "Heat to" if step.setting == TemperatureSettingEnum.HEAT else "Cool to"
+        )
+        return f"{setting},{step.to.value:g}, at ,{step.rate.value:g}, {step.rate.unit}"
+    return f"Hold at,{step.at.value:g}, for ,{step.for_.value:g}, {step.for_.unit}"
+
+
+def _header(
+    reactors: List[SyntheticReactor],
+    program: TemperatureProgram,
+    start_of_experiment: datetime,
+) -> str:
+    """Report lines before the data block column names"""
+    lines = [
+        "Crystal16 Data Report File,Version: 1014",
+        "",
+        "Experiment details,synthetic report",
+        "ExperimentNumber,0",
+        "Experimentor,csst",
+        "Project,synthetic",
+    ]
+    for i, reactor in enumerate(reactors):
+        lines.append(
+            f"Reactor{i + 1},{reactor.concentration:g} {reactor.concentration_unit} "
+            + f"{reactor.polymer} in {reactor.solvent}"
+        )
+    lines += ["", "Labjournal", "", "Description,synthetic report"]
+    polymer_ids = {r.polymer: r.polymer_id for r in reactors if r.polymer_id}
+    solvent_ids = {r.solvent: r.solvent_id for r in reactors if r.solvent_id}
+    if polymer_ids:
+        lines.append(
+            "polymer_ids," + ",".join(f"{k}:{v}" for k, v in polymer_ids.items())
+        )
+    if solvent_ids:
+        lines.append(
+            "solvent_ids," + ",".join(f"{k}:{v}" for k, v in solvent_ids.items())
+        )
+    d = start_of_experiment
+    lines += [
+        f"Start of Experiment,{d.month}/{d.day}/{d:%y} {d.hour}:{d:%M}",
+        "",
+        "Temperature Program",
+        f"Block,{program.block}",
+    ]
+    lines += [_format_step(step) for step in program.solvent_tune]
+    lines.append("Tune")
+    lines += [_format_step(step) for step in program.sample_load]
+    lines += ["Stir (Top) at,900, rpm", "Stir (Bottom) at,900, rpm"]
+    lines += [_format_step(step) for step in program.experiment]
+    lines += ["", "Data Block"]
+    return "\n".join(lines) + "\n"
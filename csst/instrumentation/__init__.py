@@ -0,0 +1,277 @@
+"""Timing instrumentation of the csst loading, processing, analyzer and database stages
+
+Stages are wrapped in named spans that record how long they took and how many rows
+and bytes they handled. Spans opened inside another span are recorded under the
+outer span's path (e.g., 'experiment.load_from_file/read_csv'), so the time of an
+entry point can be broken down into its stages.
+
+Instrumentation is off by default and spans cost one flag check while it is off. It
+is switched on by setting the CSST_INSTRUMENTATION environment variable to 1 (or
+true, yes, on) before csst is imported, by calling enable(), or with the instrument
+context manager.
+
+Typical usage example:
+
+    with instrument() as recorder:
+        experiment = Experiment.load_from_file(path)
+        analyzer.add_experiment_reactors(experiment)
+    print(recorder.to_json())
+    print(recorder.to_prometheus())
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR = "CSST_INSTRUMENTATION"
+
+
+class SpanStatistics:
+    """Totals of every span recorded with the same path
+
+    Attributes:
+        calls (int): number of times the span was recorded
+        errors (int): number of times the span exited with an exception
+        seconds (float): total time spent in the span
+        min_seconds (float): fastest time spent in the span
+        max_seconds (float): slowest time spent in the span
+        rows (int): total rows handled in the span
+        nbytes (int): total bytes handled in the span
+    """
+
+    __slots__ = (
+        "calls",
+        "errors",
+        "seconds",
+        "min_seconds",
+        "max_seconds",
+        "rows",
+        "nbytes",
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.min_seconds = float("inf")
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.nbytes = 0
+
+    def dict(self) -> Dict[str, float]:
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+
+class Recorder:
+    """Collects the statistics of finished spans. Safe to use from several threads.
+
+    Attributes:
+        spans (Dict[str, SpanStatistics]): statistics of each span path
+    """
+
+    def __init__(self):
+        self.spans: Dict[str, SpanStatistics] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, path: str, seconds: float, rows: int, nbytes: int, error: bool = False
+    ):
+        """Add a finished span to the statistics of its path"""
+        with self._lock:
+            stats = self.spans.get(path)
+            if stats is None:
+                stats = self.spans[path] = SpanStatistics()
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.seconds += seconds
+            stats.min_seconds = min(stats.min_seconds, seconds)
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows
+            stats.nbytes += nbytes
+
+    def reset(self):
+        """Remove all recorded statistics"""
+        with self._lock:
+            self.spans = {}
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """Statistics of each span path, ordered by path"""
+        with self._lock:
+            return {path: self.spans[path].dict() for path in sorted(self.spans)}
+
+    def to_json(self, **kwargs) -> str:
+        """Statistics of each span path as json
+
+        Args:
+            kwargs: passed to json.dumps (e.g., indent)
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix: str = "csst") -> str:
+        """Statistics of each span path in the Prometheus text exposition format
+
+        Args:
+            prefix: prefix of the metric names
+        """
+        metrics = [
+            ("span_calls_total", "calls", "Number of times the span ran"),
+            ("span_errors_total", "errors", "Number of times the span raised"),
+            ("span_seconds_total", "seconds", "Total seconds spent in the span"),
+            ("span_rows_total", "rows", "Total rows handled in the span"),
+            ("span_bytes_total", "nbytes", "Total bytes handled in the span"),
+        ]
+        spans = self.to_dict()
+        lines = []
+        for metric, attr, help_ in metrics:
+            name = f"{prefix}_{metric}"
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} counter")
+            for path, stats in spans.items():
+                label = path.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{name}{{span="{label}"}} {stats[attr]}')
+        return "\n".join(lines) + "\n"
+
+
+class Span:
+    """A running span. Created with span(), not directly.
+
+    Attributes:
+        name (str): name of the span
+        path (str): names of the spans it runs in and its name joined by '/'
+        rows (int): rows handled in the span so far
+        nbytes (int): bytes handled in the span so far
+    """
+
+    __slots__ = ("name", "path", "rows", "nbytes", "_start")
+
+    def __init__(self, name: str, rows: int = 0, nbytes: int = 0):
+        self.name = name
+        self.path = name
+        self.rows = rows
+        self.nbytes = nbytes
+        self._start = None
+
+    def add(self, rows: int = 0, nbytes: int = 0):
+        """Count rows and bytes handled in the span"""
+        self.rows += int(rows)
+        self.nbytes += int(nbytes)
+
+    def __enter__(self) -> "Span":
+        stack = _stack()
+        if len(stack) > 0:
+            self.path = f"{stack[-1].path}/{self.name}"
+        stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        stack = _stack()
+        if len(stack) > 0 and stack[-1] is self:
+            stack.pop()
+        _recorder.record(
+            self.path, seconds, self.rows, self.nbytes, error=exc_type is not None
+        )
+        return False
+
+
+class _NullSpan:
+    """Span returned while instrumentation is off. Does nothing."""
+
+    __slots__ = ()
+
+    def add(self, rows: int = 0, nbytes: int = 0):
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+def _env_enabled() -> bool:
+    """If the environment variable switches instrumentation on"""
+    return os.environ.get(ENV_VAR, "").strip().lower() in ["1", "true", "yes", "on"]
+
+
+_NULL_SPAN = _NullSpan()
+_recorder = Recorder()
+_local = threading.local()
+_enabled = _env_enabled()
+
+
+def _stack() -> list:
+    """Spans running in the current thread"""
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def span(name: str, rows: int = 0, nbytes: int = 0):
+    """Time a stage. Use as a context manager.
+
+    Args:
+        name: name of the stage
+        rows: rows handled in the stage. More can be added with Span.add.
+        nbytes: bytes handled in the stage. More can be added with Span.add.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, rows, nbytes)
+
+
+def is_enabled() -> bool:
+    """If spans are currently recorded"""
+    return _enabled
+
+
+def enable():
+    """Start recording spans"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Stop recording spans. Recorded statistics are kept."""
+    global _enabled
+    _enabled = False
+
+
+def get_recorder() -> Recorder:
+    """Recorder all spans are recorded to"""
+    return _recorder
+
+
+def reset():
+    """Remove all recorded statistics"""
+    _recorder.reset()
+
+
+@contextmanager
+def instrument(reset_statistics: bool = True) -> Iterator[Recorder]:
+    """Record spans inside the with block
+
+    Instrumentation is switched back to its previous state afterwards.
+
+    Args:
+        reset_statistics: if previously recorded statistics should be removed first
+
+    Yields:
+        the recorder the spans are recorded to
+    """
+    global _enabled
+    previous = _enabled
+    if reset_statistics:
+        _recorder.reset()
+    _enabled = True
+    try:
+        yield _recorder
+    finally:
+        _enabled = previous
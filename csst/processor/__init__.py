@@ -1,12 +1,17 @@
 import logging
-from typing import Union, List
+from typing import Union, List, Optional, Sequence
 from math import floor, ceil
 
 import numpy as np
 
-from csst.processor.models import ProcessedTemperature, ProcessedReactor
-from csst.processor.helpers import find_index_after_x_hours
+from csst.processor.models import (
+    ProcessedTemperature,
+    ProcessedReactor,
+    ProcessedCycle,
+)
+from csst.processor.helpers import find_index_after_x_hours, grouped_statistics
 from csst.experiment.models import Reactor
+from csst.instrumentation import span
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +19,9 @@ logger = logging.getLogger(__name__)
 # reactor values sorted by temp would be
 # temp = [5, 5, 10, 10, 15, 15, 20, 20, 20, 20]
 # trans = [5, 4, 20, 22, 50, 45, 78, 78, 79, 80]
-def process_reactor(reactor: Reactor, temp_range=1) -> ProcessedReactor:
+def process_reactor(
+    reactor: Reactor, temp_range=1, use_temperature_program: bool = False
+) -> ProcessedReactor:
     """Process all reactor transmission data
 
     Find the floor of the min actual temperature and ceil of the max actual temperature,
@@ -22,22 +29,28 @@ def process_reactor(reactor: Reactor, temp_range=1) -> ProcessedReactor:
 
     Args:
         reactor: reactor to process
+        use_temperature_program: see process_reactor_transmission_at_temp
     """
-    min_temp = floor(min(reactor.experiment.actual_temperature.values))
-    max_temp = ceil(max(reactor.experiment.actual_temperature.values))
-    temps = np.arange(min_temp, (max_temp + 1), temp_range)
-    return ProcessedReactor(
-        unprocessed_reactor=reactor,
-        temperatures=process_reactor_transmission_at_temps(
-            reactor, temps, temp_range=temp_range
-        ),
-    )
+    with span("processor.process_reactor", rows=len(reactor.transmission.values)):
+        min_temp = floor(min(reactor.experiment.actual_temperature.values))
+        max_temp = ceil(max(reactor.experiment.actual_temperature.values))
+        temps = np.arange(min_temp, (max_temp + 1), temp_range)
+        return ProcessedReactor(
+            unprocessed_reactor=reactor,
+            temperatures=process_reactor_transmission_at_temps(
+                reactor,
+                temps,
+                temp_range=temp_range,
+                use_temperature_program=use_temperature_program,
+            ),
+        )
 
 
 def process_reactor_transmission_at_temps(
     reactor: Reactor,
     temps: List[float],
     temp_range: float = 1,
+    use_temperature_program: bool = False,
 ) -> List[ProcessedTemperature]:
     """Process the transmission values of the reactor at passed temps.
 
@@ -47,22 +60,33 @@ def process_reactor_transmission_at_temps(
         temp_range: the range of temperatures the transmission is processed from
             (e.g., average_temperature +- (temperature_range / 2)) non-inclusive of
             the upper value.
+        use_temperature_program: see process_reactor_transmission_at_temp
     """
     transmissions = []
     for temp in temps:
-        ptrans = process_reactor_transmission_at_temp(reactor, temp, temp_range)
+        ptrans = process_reactor_transmission_at_temp(
+            reactor, temp, temp_range, use_temperature_program
+        )
         if ptrans is not None:
             transmissions += ptrans
     return transmissions
 
 
 def process_reactor_transmission_at_temp(
-    reactor: Reactor, temp: float, temp_range: float = 1
+    reactor: Reactor,
+    temp: float,
+    temp_range: float = 1,
+    use_temperature_program: bool = False,
 ) -> Union[None, ProcessedTemperature]:
     """Returns the processed transmission values at the set temperature for the reactor
 
-    Data collected from the temperature program solvent tune and sample load stages
-    is skipped, as well as the first two minutes of data collected
+    By default, the data collected in the first minutes of the experiment is skipped
+    (see find_index_after_x_hours) and the ramp state comes from the experiment
+    ramp state. If use_temperature_program is True, only data collected in the
+    temperature program experiment stage is used, and the ramp state comes from the
+    temperature program step each sample was taken in (see
+    csst.experiment.Experiment.get_program_labels), so the solvent tune and sample
+    load stages are skipped.
 
     Args:
         reactor: reactor to process
@@ -70,26 +94,33 @@ def process_reactor_transmission_at_temp(
         temp_range: the range of temperatures the transmission is processed from
             (e.g., average_temperature +- (temperature_range / 2)) non-inclusive of
             the upper value.
+        use_temperature_program: if the temperature program should be used to select
+            the samples to process and their ramp state. Default False.
 
     Returns:
         Process transmission value or None
     """
 
     half_range = temp_range / 2
-    # where returns a tuple but since this is a 1d array, the tuple has one element
-    # that is the list of indices.
     if temp_range == 0:
-        temp_indices = np.where(reactor.experiment.actual_temperature.values == temp)[0]
+        in_range = reactor.experiment.actual_temperature.values == temp
     else:
-        temp_indices = np.where(
-            (
-                (reactor.experiment.actual_temperature.values < temp + half_range)
-                & (reactor.experiment.actual_temperature.values >= temp - half_range)
-            )
-        )[0]
-    start_ind = find_index_after_x_hours(reactor)
-    logger.debug(f"Start index for averaging is {start_ind}")
-    temp_indices = temp_indices[temp_indices >= start_ind]
+        in_range = (
+            reactor.experiment.actual_temperature.values < temp + half_range
+        ) & (reactor.experiment.actual_temperature.values >= temp - half_range)
+    if use_temperature_program:
+        labels = reactor.experiment.program_labels
+        ramp_state = labels.ramp_state
+        in_range &= labels.experiment_mask
+    else:
+        ramp_state = reactor.experiment.ramp_state
+    # where returns a tuple but since this is a 1d array, the tuple has one element
+    # that is the list of indices.
+    temp_indices = np.where(in_range)[0]
+    if not use_temperature_program:
+        start_ind = find_index_after_x_hours(reactor)
+        logger.debug(f"Start index for averaging is {start_ind}")
+        temp_indices = temp_indices[temp_indices >= start_ind]
     logger.debug(f"temp_indices for temp {temp}: {temp_indices}")
     if len(temp_indices) == 0:
         logger.debug(
@@ -98,7 +129,7 @@ def process_reactor_transmission_at_temp(
         return []
     temps = []
     for state in ["heating", "cooling", "holding"]:
-        indices = [x for x in temp_indices if reactor.experiment.ramp_state[x] == state]
+        indices = [x for x in temp_indices if ramp_state[x] == state]
         if len(indices) == 0:
             continue
         transmission = reactor.transmission.values[indices]
@@ -130,3 +161,97 @@ def process_reactor_transmission_at_temp(
             )
         )
     return temps
+
+
+def process_reactor_cycles(
+    reactor: Reactor,
+    temp_range: float = 1,
+    states: Sequence[str] = ("heating", "cooling"),
+    cycles: Optional[Sequence[int]] = None,
+) -> List[ProcessedCycle]:
+    """Process the reactor transmission data of each cycle separately
+
+    Cycles come from the experiment segment table (see
+    csst.experiment.Experiment.get_segments), and each cycle is processed from slice
+    views of the experiment and reactor arrays. Temperatures are binned like
+    process_reactor, so bins line up between cycles, and samples before
+    find_index_after_x_hours are skipped.
+
+    Args:
+        reactor: reactor to process
+        temp_range: the range of temperatures the transmission is processed from
+            (e.g., average_temperature +- (temperature_range / 2)) non-inclusive of
+            the upper value.
+        states: states of the cycles to process. Default heating and cooling.
+        cycles: numbers of the cycles to process. Default None processes all cycles.
+
+    Returns:
+        Processed cycles ordered by when they started in the experiment
+    """
+    experiment = reactor.experiment
+    segments = experiment.segments
+    segments = segments[segments.state.isin(states) & (segments.cycle > 0)]
+    if cycles is not None:
+        segments = segments[segments.cycle.isin(cycles)]
+    actual_temps = np.asarray(experiment.actual_temperature.values)
+    min_temp = floor(actual_temps.min())
+    start_ind = find_index_after_x_hours(reactor)
+    processed = []
+    for (state, cycle), group in segments.groupby(["state", "cycle"], sort=False):
+        start = max(int(group.start.iloc[0]), start_ind)
+        stop = int(group.stop.iloc[-1])
+        if start >= stop:
+            continue
+        s = slice(start, stop)
+        processed.append(
+            ProcessedCycle(
+                state=state,
+                cycle=cycle,
+                start_index=start,
+                stop_index=stop,
+                temperatures=_process_values(
+                    actual_temps[s],
+                    reactor.transmission.values[s],
+                    reactor.filtered_transmission.values[s],
+                    state,
+                    min_temp,
+                    temp_range,
+                ),
+            )
+        )
+    return processed
+
+
+def _process_values(
+    temperatures: np.ndarray,
+    transmission: np.ndarray,
+    filtered_transmission: np.ndarray,
+    state: str,
+    min_temp: float,
+    temp_range: float,
+) -> List[ProcessedTemperature]:
+    """Process transmissions that all have the same ramp state into temperature bins
+    centered on min_temp + n * temp_range
+    """
+    half_range = temp_range / 2
+    bins = np.floor((temperatures - min_temp + half_range) / temp_range).astype(int)
+    keys, _, means, medians, stds = grouped_statistics(
+        bins, [transmission, filtered_transmission]
+    )
+    temps = []
+    for i, key in enumerate(keys):
+        for j, filtered in enumerate([False, True]):
+            temps.append(
+                ProcessedTemperature(
+                    average_temperature=min_temp + key * temp_range,
+                    temperature_range=temp_range,
+                    average_transmission=means[j, i],
+                    median_transmission=medians[j, i],
+                    transmission_std=stds[j, i],
+                    heating=1 if state == "heating" else 0,
+                    cooling=1 if state == "cooling" else 0,
+                    holding=1 if state == "holding" else 0,
+                    filtered=filtered,
+                )
+            )
+    return temps
@@ -1,3 +1,7 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
 from csst.experiment.models import Reactor
 
 
@@ -16,3 +20,49 @@ def find_index_after_x_hours(
     dt = reactor.experiment.get_timestep_of_experiment()
     # (max of 4 used for test cases)
     return max(int(time_to_skip_in_hours / dt), 4)
+
+
+def grouped_statistics(
+    keys: np.ndarray,
+    values: np.ndarray,
+    groups: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Count, mean, median and standard deviation of values grouped by keys
+
+    All groups are computed at once with numpy instead of looping over each group.
+
+    Args:
+        keys: 1d integer array of the group each value belongs to
+        values: 1d array of values or 2d array with one row per set of values. Each
+            row is grouped by the same keys.
+        groups: optional result of
+            np.unique(keys, return_inverse=True, return_counts=True) so the grouping
+            can be reused when the same keys group several sets of values.
+
+    Returns:
+        unique keys, counts, means, medians and standard deviations (np.std, so
+        the population standard deviation). Means, medians and standard deviations
+        have one column per unique key and the same number of rows as values.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    if groups is None:
+        groups = np.unique(keys, return_inverse=True, return_counts=True)
+    unique_keys, inverse, counts = groups
+    means = np.vstack([np.bincount(inverse, weights=row) / counts for row in values])
+    stds = np.sqrt(
+        np.vstack(
+            [
+                np.bincount(inverse, weights=(row - mean[inverse]) ** 2) / counts
+                for row, mean in zip(values, means)
+            ]
+        )
+    )
+    # sort by group then value so the middle of each group is its median
+    ends = np.cumsum(counts)
+    lower = ends - counts + (counts - 1) // 2
+    upper = ends - counts + counts // 2
+    medians = []
+    for row in values:
+        sorted_row = row[np.lexsort((row, inverse))]
+        medians.append((sorted_row[lower] + sorted_row[upper]) / 2)
+    return unique_keys, counts, means, np.vstack(medians), stds
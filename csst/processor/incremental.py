@@ -0,0 +1,303 @@
+"""Incremental processing of reactor transmission data as new samples arrive"""
+import logging
+from typing import Dict, List, Optional, Tuple
+from math import floor
+
+import numpy as np
+
+from csst.processor.models import ProcessedTemperature, ProcessedReactor
+from csst.processor.helpers import find_index_after_x_hours
+from csst.experiment.models import Reactor
+
+logger = logging.getLogger(__name__)
+
+# order states are reported in, matching process_reactor_transmission_at_temp
+STATES = ["heating", "cooling", "holding"]
+# transmissions (%) covered by the median histograms. Values outside are clipped.
+TRANSMISSION_RANGE = (0, 100)
+
+
+class _BinStatistics:
+    """Running statistics of one (temperature bin, ramp state) key
+
+    Index 0 of each array holds the unfiltered transmission statistics and index 1
+    the filtered transmission statistics.
+
+    Attributes:
+        count (int): number of samples added to the bin
+        mean (np.ndarray): running mean of the transmissions
+        m2 (np.ndarray): running sum of squared differences from the mean
+        chunks (List[List[np.ndarray]]): transmissions added to the bin, kept as the
+            chunks they arrived in so exact medians can be computed by merging them.
+            Empty if a histogram is used.
+        histogram (Optional[np.ndarray]): 2 x bins counts of the transmissions in
+            resolution wide bins over TRANSMISSION_RANGE, or None to keep every
+            transmission in chunks
+        resolution (Optional[float]): width of the histogram bins
+    """
+
+    __slots__ = ("count", "mean", "m2", "chunks", "histogram", "resolution", "_median")
+
+    def __init__(self, resolution: Optional[float] = None):
+        self.count = 0
+        self.mean = np.zeros(2)
+        self.m2 = np.zeros(2)
+        self.chunks = [[], []]
+        self.resolution = resolution
+        self.histogram = None
+        if resolution is not None:
+            low, high = TRANSMISSION_RANGE
+            n_bins = int(round((high - low) / resolution)) + 1
+            self.histogram = np.zeros((2, n_bins), dtype=np.int64)
+        self._median = None
+
+    def merge(self, count: int, mean: np.ndarray, m2: np.ndarray, values: np.ndarray):
+        """Merge statistics of a chunk into the bin (Chan et al. parallel update)
+
+        Args:
+            count: number of samples in the chunk
+            mean: mean of the chunk unfiltered and filtered transmissions
+            m2: sum of squared differences from the chunk mean
+            values: 2 x count array of the chunk unfiltered and filtered transmissions
+        """
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta**2 * (self.count * count / total)
+        self.count = total
+        self._median = None
+        if self.histogram is not None:
+            n_bins = self.histogram.shape[1]
+            bins = np.rint((values - TRANSMISSION_RANGE[0]) / self.resolution)
+            bins = np.clip(bins, 0, n_bins - 1).astype(np.int64)
+            for i in range(2):
+                self.histogram[i] += np.bincount(bins[i], minlength=n_bins)
+            return
+        self.chunks[0].append(values[0])
+        self.chunks[1].append(values[1])
+
+    def median(self) -> np.ndarray:
+        """Median of the unfiltered and filtered transmissions in the bin
+
+        Exact if every transmission is kept, otherwise the center of the histogram
+        bin of the middle transmission (averaged over the two middle transmissions of
+        an even count, like np.median).
+        """
+        if self._median is None and self.histogram is not None:
+            ranks = [(self.count - 1) // 2, self.count // 2]
+            bins = np.array(
+                [
+                    np.searchsorted(np.cumsum(row), ranks, side="right")
+                    for row in self.histogram
+                ]
+            )
+            self._median = TRANSMISSION_RANGE[0] + bins.mean(axis=1) * self.resolution
+        if self._median is None:
+            for i in range(2):
+                if len(self.chunks[i]) > 1:
+                    # compact the chunks so repeated queries stay cheap
+                    self.chunks[i] = [np.concatenate(self.chunks[i])]
+            self._median = np.array([np.median(chunk[0]) for chunk in self.chunks])
+        return self._median
+
+    def std(self) -> np.ndarray:
+        """Population standard deviation (same as np.std) of the transmissions"""
+        return np.sqrt(self.m2 / self.count)
+
+
+class IncrementalProcessor:
+    """Processes reactor transmission data incrementally
+
+    Produces the same processed temperatures as csst.processor.process_reactor, but
+    samples can be added in chunks as an experiment runs. Only the temperature bins
+    touched by a chunk are updated, so adding a chunk is O(chunk) no matter how long
+    the experiment has been running.
+
+    Means and standard deviations are merged from per-chunk statistics. Exact medians
+    need every transmission, so by default each bin keeps the transmissions added to
+    it: memory grows with the number of samples and the median of a bin touched by a
+    chunk is recomputed over the whole bin. Set median_resolution to count the
+    transmissions in a fixed-width histogram instead, bounding the memory of each bin
+    and making medians O(histogram bins), at the cost of medians being rounded to the
+    histogram bins.
+
+    Typical usage example:
+
+        processor = IncrementalProcessor.from_reactor(reactor)
+        processor.add_samples(temps, ramp_state, transmission, filtered_transmission)
+        temperatures = processor.processed_temperatures()
+
+    Attributes:
+        temp_range (float): the range of temperatures the transmission is processed
+            from (e.g., average_temperature +- (temperature_range / 2)).
+        origin (Optional[float]): temperature the bins are centered on. Every bin is
+            centered on origin + n * temp_range. If None, the floor of the lowest
+            temperature in the first chunk is used like process_reactor does.
+        start_index (int): samples with an index lower than this in the experiment
+            are skipped (see csst.processor.helpers.find_index_after_x_hours).
+        samples_seen (int): number of samples passed to the processor so far.
+        median_resolution (Optional[float]): width of the histogram bins medians are
+            computed from (e.g., 1 gives exact medians of whole percent
+            transmissions). If None, every transmission is kept and medians are
+            exact.
+    """
+
+    def __init__(
+        self,
+        temp_range: float = 1,
+        origin: Optional[float] = None,
+        start_index=0,
+        median_resolution: Optional[float] = None,
+    ):
+        if temp_range <= 0:
+            raise ValueError(f"temp_range must be greater than 0, not {temp_range}")
+        if median_resolution is not None and median_resolution <= 0:
+            raise ValueError(
+                f"median_resolution must be greater than 0, not {median_resolution}"
+            )
+        self.temp_range = temp_range
+        self.median_resolution = median_resolution
+        self.origin = origin
+        self.start_index = start_index
+        self.samples_seen = 0
+        self._bins: Dict[Tuple[int, int], _BinStatistics] = {}
+
+    @classmethod
+    def from_reactor(
+        cls,
+        reactor: Reactor,
+        temp_range: float = 1,
+        median_resolution: Optional[float] = None,
+    ):
+        """Create a processor and add all samples currently in the reactor
+
+        Args:
+            reactor: reactor to process
+            temp_range: the range of temperatures the transmission is processed from
+            median_resolution: see IncrementalProcessor
+        """
+        obj = cls(
+            temp_range=temp_range,
+            origin=floor(min(reactor.experiment.actual_temperature.values)),
+            start_index=find_index_after_x_hours(reactor),
+            median_resolution=median_resolution,
+        )
+        obj.add_samples(
+            reactor.experiment.actual_temperature.values,
+            reactor.experiment.ramp_state,
+            reactor.transmission.values,
+            reactor.filtered_transmission.values,
+        )
+        return obj
+
+    def add_samples(
+        self,
+        temperatures: np.ndarray,
+        ramp_state: List[str],
+        transmission: np.ndarray,
+        filtered_transmission: np.ndarray,
+    ):
+        """Add the next chunk of samples in the experiment
+
+        Args:
+            temperatures: actual temperatures of the new samples
+            ramp_state: ramp state ('heating', 'cooling' or 'holding') of the new
+                samples
+            transmission: transmissions of the new samples
+            filtered_transmission: filtered transmissions of the new samples
+        """
+        temperatures = np.asarray(temperatures, dtype=np.float64)
+        ramp_state = np.asarray(ramp_state)
+        values = np.vstack(
+            [
+                np.asarray(transmission, dtype=np.float64),
+                np.asarray(filtered_transmission, dtype=np.float64),
+            ]
+        )
+        n = len(temperatures)
+        if not (len(ramp_state) == n and values.shape[1] == n):
+            raise ValueError("All sample arrays must be the same length")
+        skip = min(max(self.start_index - self.samples_seen, 0), n)
+        self.samples_seen += n
+        if skip == n:
+            return
+        temperatures = temperatures[skip:]
+        ramp_state = ramp_state[skip:]
+        values = values[:, skip:]
+        if self.origin is None:
+            self.origin = floor(temperatures.min())
+
+        half_range = self.temp_range / 2
+        bins = np.floor((temperatures - self.origin + half_range) / self.temp_range)
+        states = np.full(len(ramp_state), -1)
+        for i, state in enumerate(STATES):
+            states[ramp_state == state] = i
+        valid = states >= 0
+        if not valid.all():
+            logger.warning(f"Skipping {(~valid).sum()} samples with unknown ramp state")
+            bins, states, values = bins[valid], states[valid], values[:, valid]
+
+        keys = bins.astype(np.int64) * len(STATES) + states
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        means = np.vstack(
+            [np.bincount(inverse, weights=row) / counts for row in values]
+        )
+        m2s = np.vstack(
+            [
+                np.bincount(inverse, weights=(row - mean[inverse]) ** 2)
+                for row, mean in zip(values, means)
+            ]
+        )
+        # group the values of each key together so each bin gets one slice
+        order = np.argsort(inverse, kind="stable")
+        grouped = values[:, order]
+        ends = np.cumsum(counts)
+        for i, key in enumerate(unique_keys):
+            key = (int(key // len(STATES)), int(key % len(STATES)))
+            stats = self._bins.get(key)
+            if stats is None:
+                stats = self._bins[key] = _BinStatistics(self.median_resolution)
+            stats.merge(
+                counts[i],
+                means[:, i],
+                m2s[:, i],
+                grouped[:, ends[i] - counts[i] : ends[i]],
+            )
+
+    def processed_temperatures(self) -> List[ProcessedTemperature]:
+        """Processed temperatures of all samples added so far
+
+        Ordered like csst.processor.process_reactor: by temperature, then by ramp state
+        (heating, cooling, holding) with the unfiltered transmission first.
+        """
+        temps = []
+        for bin_, state in sorted(self._bins):
+            stats = self._bins[(bin_, state)]
+            median = stats.median()
+            std = stats.std()
+            for filtered in [False, True]:
+                temps.append(
+                    ProcessedTemperature(
+                        average_temperature=self.origin + bin_ * self.temp_range,
+                        temperature_range=self.temp_range,
+                        average_transmission=stats.mean[int(filtered)],
+                        median_transmission=median[int(filtered)],
+                        transmission_std=std[int(filtered)],
+                        heating=1 if STATES[state] == "heating" else 0,
+                        cooling=1 if STATES[state] == "cooling" else 0,
+                        holding=1 if STATES[state] == "holding" else 0,
+                        filtered=filtered,
+                    )
+                )
+        return temps
+
+    def processed_reactor(self, reactor: Reactor) -> ProcessedReactor:
+        """Processed reactor of all samples added so far
+
+        Args:
+            reactor: the unprocessed reactor the samples belong to
+        """
+        return ProcessedReactor(
+            unprocessed_reactor=reactor, temperatures=self.processed_temperatures()
+        )
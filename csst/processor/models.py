@@ -42,3 +42,21 @@ class ProcessedReactor(BaseModel):
 
     unprocessed_reactor: Reactor
     temperatures: List[ProcessedTemperature]
+
+
+class ProcessedCycle(BaseModel):
+    """Processed transmission data of one heating, cooling or holding cycle
+
+    Args:
+        state: ramp state of the cycle ('heating', 'cooling' or 'holding')
+        cycle: number of the cycle among cycles with the same state, starting at 1
+        start_index: index of the first sample processed in the cycle
+        stop_index: index after the last sample processed in the cycle
+        temperatures: List of processed temperatures of the cycle.
+    """
+
+    state: str
+    cycle: int
+    start_index: int
+    stop_index: int
+    temperatures: List[ProcessedTemperature]
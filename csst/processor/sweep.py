@@ -0,0 +1,179 @@
+"""Process reactors over grids of processing settings
+
+Sensitivity studies of the processing settings would otherwise call process_reactor
+once per reactor and setting. The sweep instead shares work across the grid:
+
+- the savgol filter is run once per window length for all reactors of an experiment
+- temperature bins are computed once per temperature range for each experiment
+- samples are grouped once per (temperature range, time to skip) and the grouping is
+  reused for every reactor and window length
+"""
+import logging
+from typing import List, Optional, Sequence
+from math import floor, ceil
+
+import numpy as np
+import pandas as pd
+
+from csst.experiment.models import Reactor
+from csst.processor.helpers import find_index_after_x_hours, grouped_statistics
+from csst.processor.models import ProcessedTemperature
+
+logger = logging.getLogger(__name__)
+
+# order states are reported in, matching process_reactor_transmission_at_temp
+STATES = ["heating", "cooling", "holding"]
+
+
+def sweep_reactor_processing(
+    reactors: List[Reactor],
+    temp_ranges: Sequence[float] = (1,),
+    times_to_skip_in_hours: Sequence[float] = (5 / 60,),
+    window_lengths: Sequence[Optional[int]] = (None,),
+) -> pd.DataFrame:
+    """Process reactors for every combination of processing settings
+
+    For every grid point, the rows of a reactor match process_reactor run with the
+    same temperature range, with find_index_after_x_hours using the same time to
+    skip and with the filtered transmission computed with the same window length.
+
+    Args:
+        reactors: reactors to process
+        temp_ranges: temperature ranges to process (see process_reactor)
+        times_to_skip_in_hours: times to skip at the start of the experiment (see
+            csst.processor.helpers.find_index_after_x_hours)
+        window_lengths: savgol_filter window lengths of the filtered transmission.
+            None uses the default window of csst.experiment.Experiment
+            .filter_transmission.
+
+    Returns:
+        Dataframe with one row per processed temperature and grid point. Columns
+        are 'reactor', 'polymer', 'solvent', 'concentration', 'concentration_unit',
+        'temperature_unit', 'time_to_skip_in_hours', 'window_length' and all
+        attributes in csst.processor.models.ProcessedTemperature. Unfiltered rows
+        do not depend on the window length but are repeated for each window length
+        so every grid point is complete.
+    """
+    experiments = {}
+    for reactor in reactors:
+        experiments.setdefault(id(reactor.experiment), []).append(reactor)
+    dfs = []
+    for exp_reactors in experiments.values():
+        dfs += _sweep_experiment(
+            exp_reactors, temp_ranges, times_to_skip_in_hours, window_lengths
+        )
+    columns = [
+        "reactor",
+        "polymer",
+        "solvent",
+        "concentration",
+        "concentration_unit",
+        "temperature_unit",
+        "time_to_skip_in_hours",
+        "window_length",
+    ] + list(ProcessedTemperature.__fields__.keys())
+    if len(dfs) == 0:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(dfs, ignore_index=True)[columns]
+
+
+def _sweep_experiment(
+    reactors: List[Reactor],
+    temp_ranges: Sequence[float],
+    times_to_skip_in_hours: Sequence[float],
+    window_lengths: Sequence[Optional[int]],
+) -> List[pd.DataFrame]:
+    """Sweep reactors that all come from the same experiment"""
+    experiment = reactors[0].experiment
+    temps = np.asarray(experiment.actual_temperature.values, dtype=np.float64)
+    ramp_state = np.asarray(experiment.ramp_state)
+    states = np.full(len(ramp_state), -1)
+    for i, state in enumerate(STATES):
+        states[ramp_state == state] = i
+    indices = np.arange(len(temps))
+    min_temp = floor(temps.min())
+    max_temp = ceil(temps.max())
+    dt = experiment.get_timestep_of_experiment()
+
+    raw = np.vstack([reactor.transmission.values for reactor in reactors]).astype(
+        np.float64
+    )
+    filtered = {}
+    for window_length in window_lengths:
+        # savgol_filter filters each row, so all reactors are filtered at once
+        ftrans = experiment.filter_transmission(raw, dt, window_length)
+        filtered[ftrans.window_length] = np.asarray(ftrans.values, dtype=np.float64)
+
+    metadata = pd.DataFrame(
+        {
+            "reactor": [str(reactor) for reactor in reactors],
+            "polymer": [reactor.polymer for reactor in reactors],
+            "solvent": [reactor.solvent for reactor in reactors],
+            "concentration": [reactor.conc.value for reactor in reactors],
+            "concentration_unit": [reactor.conc.unit for reactor in reactors],
+            "temperature_unit": experiment.actual_temperature.unit,
+        }
+    )
+
+    dfs = []
+    for temp_range in temp_ranges:
+        half_range = temp_range / 2
+        bins = np.floor((temps - min_temp + half_range) / temp_range).astype(np.int64)
+        # process_reactor only processes temperatures in this range
+        n_bins = len(np.arange(min_temp, (max_temp + 1), temp_range))
+        in_bins = (bins >= 0) & (bins < n_bins) & (states >= 0)
+        for time_to_skip in times_to_skip_in_hours:
+            start_ind = find_index_after_x_hours(reactors[0], time_to_skip)
+            mask = in_bins & (indices >= start_ind)
+            if not mask.any():
+                continue
+            keys = bins[mask] * len(STATES) + states[mask]
+            groups = np.unique(keys, return_inverse=True, return_counts=True)
+            raw_stats = grouped_statistics(keys, raw[:, mask], groups)
+            for window_length, values in filtered.items():
+                filtered_stats = grouped_statistics(keys, values[:, mask], groups)
+                df = _stats_to_frame(
+                    groups[0],
+                    raw_stats,
+                    filtered_stats,
+                    metadata,
+                    min_temp,
+                    temp_range,
+                )
+                df["time_to_skip_in_hours"] = time_to_skip
+                df["window_length"] = window_length
+                dfs.append(df)
+    return dfs
+
+
+def _stats_to_frame(
+    keys: np.ndarray,
+    raw_stats: tuple,
+    filtered_stats: tuple,
+    metadata: pd.DataFrame,
+    min_temp: float,
+    temp_range: float,
+) -> pd.DataFrame:
+    """Interleave unfiltered and filtered statistics into rows ordered like
+    process_reactor (by reactor, temperature, state, then unfiltered first)
+    """
+    n_reactors, n_keys = raw_stats[2].shape
+    # (reactor, key, filtered) order
+    means = np.stack([raw_stats[2], filtered_stats[2]], axis=-1).ravel()
+    medians = np.stack([raw_stats[3], filtered_stats[3]], axis=-1).ravel()
+    stds = np.stack([raw_stats[4], filtered_stats[4]], axis=-1).ravel()
+    row_keys = np.tile(np.repeat(keys, 2), n_reactors)
+    row_states = row_keys % len(STATES)
+    df = metadata.iloc[np.repeat(np.arange(n_reactors), 2 * n_keys)].reset_index(
+        drop=True
+    )
+    df["average_temperature"] = min_temp + (row_keys // len(STATES)) * temp_range
+    df["temperature_range"] = temp_range
+    df["average_transmission"] = means
+    df["median_transmission"] = medians
+    df["transmission_std"] = stds
+    df["heating"] = (row_states == 0).astype(int)
+    df["cooling"] = (row_states == 1).astype(int)
+    df["holding"] = (row_states == 2).astype(int)
+    df["filtered"] = np.tile([False, True], n_reactors * n_keys)
+    return df
@@ -0,0 +1,157 @@
+"""Find cloud points and clear points of reactors
+
+The clear point is the temperature the transmission of a reactor rises above a
+threshold while heating (the polymer dissolves), and the cloud point is the
+temperature the transmission falls below the threshold while cooling (the polymer
+precipitates). One transition is found for every heating or cooling cycle of each
+reactor.
+"""
+import logging
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from csst.experiment.models import Reactor
+
+logger = logging.getLogger(__name__)
+
+TRANSITIONS = {"heating": "clear", "cooling": "cloud"}
+COLUMNS = [
+    "reactor",
+    "polymer",
+    "solvent",
+    "concentration",
+    "concentration_unit",
+    "reactor_number",
+    "state",
+    "cycle",
+    "transition",
+    "threshold",
+    "filtered",
+    "index",
+    "temperature",
+    "temperature_unit",
+    "time",
+    "time_unit",
+]
+
+
+def find_transition_temperatures(
+    reactors: List[Reactor],
+    threshold: float = 50,
+    filtered: bool = True,
+    min_cycle_duration_in_hours: float = 1 / 60,
+) -> pd.DataFrame:
+    """Find the clear and cloud point of every heating and cooling cycle of the
+    reactors
+
+    The first time the transmission crosses the threshold in a cycle is used, and the
+    temperature is linearly interpolated between the two samples on either side of the
+    crossing. Reactors from the same experiment share their temperatures and ramp
+    state, so they are all processed at once.
+
+    Args:
+        reactors: reactors to find the transition temperatures of
+        threshold: transmission (in the reactor's transmission unit) that marks the
+            transition
+        filtered: if the filtered transmission should be used instead of the raw
+            transmission. Default True as noise in the raw transmission can cross the
+            threshold several times.
+        min_cycle_duration_in_hours: heating and cooling runs of the ramp state
+            shorter than this are ignored (see
+            csst.experiment.Experiment.get_segments). Default 1 minute.
+
+    Returns:
+        Dataframe with one row per transition found and COLUMNS as columns.
+        'cycle' counts the heating or cooling cycles of the experiment starting at
+        1 and 'index' is the index of the last sample before the crossing.
+    """
+    experiments = {}
+    for reactor in reactors:
+        experiments.setdefault(id(reactor.experiment), []).append(reactor)
+    dfs = [
+        _find_experiment_transitions(
+            exp_reactors, threshold, filtered, min_cycle_duration_in_hours
+        )
+        for exp_reactors in experiments.values()
+    ]
+    if len(dfs) == 0:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(dfs, ignore_index=True)
+
+
+def _find_experiment_transitions(
+    reactors: List[Reactor],
+    threshold: float,
+    filtered: bool,
+    min_cycle_duration_in_hours: float,
+) -> pd.DataFrame:
+    """Find transitions of reactors that all come from the same experiment"""
+    experiment = reactors[0].experiment
+    temps = np.asarray(experiment.actual_temperature.values, dtype=np.float64)
+    times = np.asarray(experiment.time_since_experiment_start.values, dtype=np.float64)
+    ramp_state = np.asarray(experiment.ramp_state)
+    if len(temps) < 2:
+        return pd.DataFrame(columns=COLUMNS)
+
+    segments = experiment.get_segments(min_cycle_duration_in_hours)
+    lengths = (segments.stop - segments.start).to_numpy()
+    cycles = np.repeat(segments.cycle.to_numpy(), lengths)
+    # samples i where i and i + 1 are in the same heating or cooling cycle. Samples
+    # in segments too short to be part of a cycle have cycle 0.
+    pairs = (
+        (cycles[:-1] > 0)
+        & (cycles[:-1] == cycles[1:])
+        & (ramp_state[:-1] == ramp_state[1:])
+    )
+    heating = pairs & (ramp_state[:-1] == "heating")
+    cooling = pairs & (ramp_state[:-1] == "cooling")
+    # unique id of each (state, cycle) so a reactor's crossings can be grouped
+    cycle_ids = np.where(ramp_state == "heating", 2 * cycles, 2 * cycles + 1)
+
+    if filtered:
+        values = np.vstack(
+            [reactor.filtered_transmission.values for reactor in reactors]
+        )
+    else:
+        values = np.vstack([reactor.transmission.values for reactor in reactors])
+    values = values.astype(np.float64, copy=False)
+    left, right = values[:, :-1], values[:, 1:]
+    crossed = (heating & (left < threshold) & (right >= threshold)) | (
+        cooling & (left >= threshold) & (right < threshold)
+    )
+
+    # keep the first crossing of each (reactor, cycle). np.nonzero is ordered by
+    # reactor then sample, so the first occurrence of each key is the first crossing
+    rows, inds = np.nonzero(crossed)
+    keys = rows * (2 * cycles.max() + 2) + cycle_ids[inds]
+    _, first = np.unique(keys, return_index=True)
+    rows, inds = rows[first], inds[first]
+
+    frac = (threshold - values[rows, inds]) / (
+        values[rows, inds + 1] - values[rows, inds]
+    )
+    states = ramp_state[inds]
+    df = pd.DataFrame(
+        {
+            "reactor": [str(reactor) for reactor in reactors],
+            "polymer": [reactor.polymer for reactor in reactors],
+            "solvent": [reactor.solvent for reactor in reactors],
+            "concentration": [reactor.conc.value for reactor in reactors],
+            "concentration_unit": [reactor.conc.unit for reactor in reactors],
+            "reactor_number": [reactor.reactor_number for reactor in reactors],
+        }
+    )
+    df = df.iloc[rows].reset_index(drop=True)
+    df["state"] = states.astype(object)
+    df["cycle"] = cycles[inds]
+    df["transition"] = [TRANSITIONS[state] for state in states]
+    df["threshold"] = np.float64(threshold)
+    df["filtered"] = filtered
+    df["index"] = inds
+    df["temperature"] = temps[inds] + frac * (temps[inds + 1] - temps[inds])
+    df["temperature_unit"] = experiment.actual_temperature.unit
+    df["time"] = times[inds] + frac * (times[inds + 1] - times[inds])
+    df["time_unit"] = experiment.time_since_experiment_start.unit
+    return df
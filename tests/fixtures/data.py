@@ -13,6 +13,7 @@ from csst.experiment.models import (
     TemperatureSettingEnum,
     PropertyValue,
     PropertyValues,
+    FilteredTransmission,
 )
 
 
@@ -198,3 +199,48 @@ def reactor():
         experiment=exp,
     )
     return reactor
+
+
+@pytest.fixture
+def cycling_experiment():
+    """Experiment heating from 10 to 50 C, cooling back to 10 C, then heating again
+
+    Each ramp takes 1 hour. Reactor 1 clears at 30 C and clouds at 20 C. Reactor 2
+    only clears in the second heating cycle (at 40 C).
+    """
+    n = 101
+    up = np.linspace(10, 50, n)
+    down = np.linspace(50, 10, n)[1:]
+    temps = np.concatenate([up, down, up[1:]])
+    times = np.linspace(0, 3, len(temps))
+    ramp_state = ["heating"] * n + ["cooling"] * (n - 1) + ["heating"] * (n - 1)
+    # linear in temperature so the interpolated crossing is exact
+    trans1 = np.concatenate(
+        [(up - 30) * 5 + 50, (down - 20) * 5 + 50, (up[1:] - 30) * 5 + 50]
+    )
+    trans2 = np.concatenate([np.zeros(2 * n - 1), (up[1:] - 40) * 5 + 50])
+
+    exp = Experiment()
+    exp.actual_temperature = PropertyValues(name="temperature", unit="C", values=temps)
+    exp.set_temperature = exp.actual_temperature
+    exp.time_since_experiment_start = PropertyValues(
+        name="time", unit="hour", values=times
+    )
+    exp.ramp_state = ramp_state
+    for i, trans in enumerate([trans1, trans2]):
+        exp.reactors.append(
+            Reactor.construct(
+                solvent="MeOH",
+                polymer="PEG",
+                reactor_number=i + 1,
+                conc=PropertyValue(name="concentration", value=i + 1, unit="mg/ml"),
+                transmission=PropertyValues(
+                    name="transmission", unit="%", values=trans
+                ),
+                filtered_transmission=FilteredTransmission(
+                    window_length=3, polyorder=1, values=trans
+                ),
+                experiment=exp,
+            )
+        )
+    return exp
@@ -1,7 +1,21 @@
+import gc
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
 from csst.analyzer import Analyzer
+from csst.analyzer.retention import experiment_nbytes
+from csst.experiment import Experiment
+from csst.experiment.synthetic import SyntheticReactor, write_synthetic_report
 
 from .fixtures.data import csste_1014, reactor  # noqa: F401
 
+TEST_DATA = Path(__file__).parent.absolute() / "test_data"
+
 
 def test_analyzer_add_reactor(reactor):  # noqa: F811
     analyzer = Analyzer()
@@ -49,3 +63,513 @@ def test_analyzer_add_experiment_reactors(csste_1014):  # noqa: F811
         "MeOH",
     ]
     assert list(analyzer.df.concentration_unit.unique()) == ["mg/ml"]
+
+
+def test_analyzer_add_experiments(csste_1014):  # noqa: F811
+    expected = Analyzer()
+    for exp_reactor in csste_1014.reactors:
+        expected.add_reactor(exp_reactor)
+    analyzer = Analyzer()
+    # reloading the same file gives duplicate reactors that are skipped
+    duplicate = Experiment.load_from_file(TEST_DATA / csste_1014.file_name)
+    analyzer.add_experiments([csste_1014, duplicate])
+    assert len(analyzer.processed_reactors) == 3
+    pd.testing.assert_frame_equal(analyzer.df, expected.df)
+    pd.testing.assert_frame_equal(analyzer.unprocessed_df, expected.unprocessed_df)
+    analyzer.add_reactors(duplicate.reactors)
+    assert len(analyzer.processed_reactors) == 3
+
+
+@pytest.mark.parametrize("layout", ["long", "normalized"])
+def test_analyzer_experiments_without_metadata(tmp_path, layout):
+    # experiments differing only in their data are not duplicates
+    experiments = []
+    for seed in range(2):
+        experiment = Experiment.load_from_file(
+            write_synthetic_report(
+                tmp_path / f"report_{seed}.csv", duration_in_hours=1, seed=seed
+            )
+        )
+        experiment.file_name = None
+        experiment.start_of_experiment = None
+        experiment.experiment_number = None
+        experiments.append(experiment)
+    n_reactors = len(experiments[0].reactors)
+    analyzer = Analyzer(layout=layout, retention="processed")
+    analyzer.add_experiments(experiments)
+    assert len(analyzer.processed_reactors) == 2 * n_reactors
+    # each reactor's samples are its own experiment's
+    df = analyzer.unprocessed_df
+    n = len(experiments[0].actual_temperature.values)
+    for i, experiment in enumerate(experiments):
+        for j, exp_reactor in enumerate(experiment.reactors):
+            start = (i * n_reactors + j) * n
+            assert np.array_equal(
+                df.transmission.to_numpy()[start : start + n],
+                exp_reactor.transmission.values,
+            )
+            # and released raw data is reloaded from its own file
+            processed = analyzer.processed_reactors[i * n_reactors + j]
+            assert np.array_equal(
+                processed.unprocessed_reactor.transmission.values,
+                exp_reactor.transmission.values,
+            )
+    if layout == "normalized":
+        assert analyzer.experiment_samples.experiment.unique().tolist() == [0, 1]
+    # the same experiment added again is still a duplicate
+    analyzer.add_experiment_reactors(experiments[1])
+    assert len(analyzer.processed_reactors) == 2 * n_reactors
+
+
+def test_analyzer_frames_built_on_access(csste_1014):  # noqa: F811
+    analyzer = Analyzer()
+    analyzer.add_reactor(csste_1014.reactors[0])
+    n = len(analyzer.df)
+    assert n > 0
+    analyzer.add_reactors(csste_1014.reactors[1:])
+    # buffered reactors are added on the next access
+    assert len(analyzer._df) == n
+    assert analyzer.df.reactor.nunique() == 3
+    assert len(analyzer.unprocessed_df) == 3 * len(csste_1014.actual_temperature.values)
+
+
+def test_analyzer_unprocessed_df_columns(csste_1014):  # noqa: F811
+    analyzer = Analyzer()
+    analyzer.add_experiment_reactors(csste_1014)
+    df = analyzer.unprocessed_df
+    exp_reactor = csste_1014.reactors[1]
+    rdf = df.loc[df.reactor == str(exp_reactor)]
+    assert rdf.transmission.to_list() == list(exp_reactor.transmission.values)
+    assert rdf.filtered_transmission.to_list() == list(
+        exp_reactor.filtered_transmission.values
+    )
+    assert rdf.time.to_list() == list(csste_1014.time_since_experiment_start.values)
+    assert rdf.ramp_state.to_list() == list(csste_1014.ramp_state)
+    assert list(rdf.polymer.unique()) == [exp_reactor.polymer]
+    assert list(rdf.top_stir_rate.unique()) == [csste_1014.top_stir_rate.value]
+    assert list(rdf.bottom_stir_rate_unit.unique()) == [
+        csste_1014.bottom_stir_rate.unit
+    ]
+
+
+def test_analyzer_schema(csste_1014):  # noqa: F811
+    analyzer = Analyzer()
+    # empty frames have the schema types too
+    assert analyzer.df.filtered.dtype == bool
+    assert analyzer.unprocessed_df.ramp_state.dtype == "category"
+    analyzer.add_experiment_reactors(csste_1014)
+    df, udf = analyzer.df, analyzer.unprocessed_df
+    assert df.reactor.dtype == "category"
+    assert list(df.reactor.cat.categories) == [
+        str(exp_reactor) for exp_reactor in csste_1014.reactors
+    ]
+    assert df.heating.dtype == "int8"
+    assert df.filtered.dtype == bool
+    assert df.average_transmission.dtype == "float64"
+    assert udf.polymer.dtype == "category"
+    assert list(udf.ramp_state.cat.categories) == ["cooling", "heating", "holding"]
+    assert udf.transmission.dtype == "float32"
+    assert udf.time.dtype == "float64"
+
+
+def test_analyzer_pyarrow_backend(csste_1014):  # noqa: F811
+    pytest.importorskip("pyarrow")
+    analyzer = Analyzer(dtype_backend="pyarrow")
+    analyzer.add_experiment_reactors(csste_1014)
+    expected = Analyzer()
+    expected.add_experiment_reactors(csste_1014)
+    assert str(analyzer.df.polymer.dtype) == "string[pyarrow]"
+    assert str(analyzer.unprocessed_df.transmission.dtype) == "float[pyarrow]"
+    assert analyzer.df.average_transmission.to_list() == (
+        expected.df.average_transmission.to_list()
+    )
+    assert analyzer.unprocessed_df.ramp_state.to_list() == (
+        expected.unprocessed_df.ramp_state.to_list()
+    )
+    with pytest.raises(ValueError, match="dtype_backend"):
+        Analyzer(dtype_backend="polars")
+
+
+def test_analyzer_normalized_layout(csste_1014, tmp_path):  # noqa: F811
+    analyzer = Analyzer(layout="normalized")
+    analyzer.add_experiment_reactors(csste_1014)
+    expected = Analyzer()
+    expected.add_experiment_reactors(csste_1014)
+    n = len(csste_1014.actual_temperature.values)
+    # samples are stored once per experiment, transmissions once per reactor
+    assert len(analyzer.experiment_samples) == n
+    assert len(analyzer.reactor_transmissions) == n * len(csste_1014.reactors)
+    assert analyzer.experiment_samples.experiment.unique().tolist() == [0]
+    df = analyzer.unprocessed_df
+    pd.testing.assert_frame_equal(df, expected.unprocessed_df)
+    # the joined dataframe is reused while it is referenced
+    assert analyzer.unprocessed_df is df
+    ref = weakref.ref(df)
+    del df
+    gc.collect()
+    assert ref() is None
+    assert analyzer.df.equals(expected.df)
+    assert (
+        analyzer.experiment_samples.memory_usage(deep=True).sum()
+        + analyzer.reactor_transmissions.memory_usage(deep=True).sum()
+        < expected.unprocessed_df.memory_usage(deep=True).sum()
+    )
+
+    # a second experiment is joined to its own samples
+    second = Experiment.load_from_file(
+        write_synthetic_report(tmp_path / "report.csv", duration_in_hours=1)
+    )
+    # held while reactors are added, but not reused
+    previous = analyzer.unprocessed_df
+    analyzer.add_experiment_reactors(second)
+    expected.add_experiment_reactors(second)
+    assert analyzer.experiment_samples.experiment.unique().tolist() == [0, 1]
+    df = analyzer.unprocessed_df
+    assert df is not previous
+    pd.testing.assert_frame_equal(df, expected.unprocessed_df)
+    assert analyzer.unprocessed_df is df
+
+    with pytest.raises(ValueError, match="normalized"):
+        analyzer.unprocessed_df = expected.unprocessed_df
+    with pytest.raises(ValueError, match="normalized"):
+        expected.experiment_samples
+    with pytest.raises(ValueError, match="layout"):
+        Analyzer(layout="wide")
+
+
+def test_analyzer_save_load(csste_1014, tmp_path):  # noqa: F811
+    pytest.importorskip("pyarrow")
+    analyzer = Analyzer()
+    analyzer.add_experiment_reactors(csste_1014)
+    analyzer.add_experiment_reactors(
+        Experiment.load_from_file(
+            write_synthetic_report(tmp_path / "report.csv", duration_in_hours=1)
+        )
+    )
+    analyzer.save(tmp_path / "results")
+    pairs = analyzer.df[["polymer", "solvent"]].drop_duplicates()
+    assert len(list((tmp_path / "results" / "processed").glob("*/*"))) == len(pairs)
+
+    def sort(df):
+        return df.sort_values(["reactor", "time"]).reset_index(drop=True)
+
+    loaded = Analyzer.load(tmp_path / "results")
+    assert loaded.df.dtypes.equals(analyzer.df.dtypes)
+    assert len(loaded.df) == len(analyzer.df)
+    pd.testing.assert_frame_equal(
+        sort(loaded.unprocessed_df.astype({"reactor": str})),
+        sort(analyzer.unprocessed_df.astype({"reactor": str})),
+        check_categorical=False,
+    )
+
+    # only the selected partition and columns are read
+    polymer, solvent = pairs.iloc[0]
+    loaded = Analyzer.load(
+        tmp_path / "results",
+        polymer=polymer,
+        solvent=solvent,
+        columns=["reactor", "polymer", "average_temperature", "transmission"],
+        filters=[("concentration", ">", 0)],
+    )
+    selected = analyzer.df[
+        (analyzer.df.polymer == polymer) & (analyzer.df.solvent == solvent)
+    ]
+    assert list(loaded.df.columns) == ["reactor", "polymer", "average_temperature"]
+    assert list(loaded.unprocessed_df.columns) == ["reactor", "polymer", "transmission"]
+    assert len(loaded.df) == len(selected)
+    assert loaded.df.polymer.unique().tolist() == [polymer]
+    assert (
+        len(Analyzer.load(tmp_path / "results", unprocessed=False).unprocessed_df) == 0
+    )
+
+    with pytest.raises(FileExistsError):
+        analyzer.save(tmp_path / "results")
+    Analyzer().save(tmp_path / "results", overwrite=True)
+    assert len(Analyzer.load(tmp_path / "results").df) == 0
+    with pytest.raises(LookupError):
+        Analyzer.load(tmp_path / "missing")
+
+
+def test_analyzer_query(csste_1014, tmp_path):  # noqa: F811
+    analyzer = Analyzer()
+    analyzer.add_experiment_reactors(csste_1014)
+    exp_reactor = csste_1014.reactors[0]
+    polymer, solvent = exp_reactor.polymer, exp_reactor.solvent
+    conc = exp_reactor.conc.value
+
+    def expected(df):
+        return df[
+            (df.polymer == polymer)
+            & (df.solvent == solvent)
+            & (df.concentration >= conc)
+            & (df.concentration <= conc)
+        ]
+
+    df = analyzer.df
+    assert analyzer.query().equals(df)
+    assert analyzer.query(
+        polymer=polymer, solvent=solvent, conc_range=(conc, conc)
+    ).equals(expected(df))
+    selected = analyzer.query(polymer=polymer, state="heating", filtered=False)
+    assert selected.equals(
+        df[(df.polymer == polymer) & (df.heating == 1) & ~df.filtered]
+    )
+    assert len(analyzer.query(polymer="missing")) == 0
+    assert len(analyzer.query(conc_range=(None, -1))) == 0
+
+    # the index is updated as reactors are added
+    analyzer.add_experiment_reactors(
+        Experiment.load_from_file(
+            write_synthetic_report(tmp_path / "report.csv", duration_in_hours=1)
+        )
+    )
+    df = analyzer.df
+    assert analyzer.query(conc_range=(10, 20)).equals(
+        df[(df.concentration >= 10) & (df.concentration <= 20)]
+    )
+    assert analyzer.query(polymer=polymer, conc_range=(conc, conc)).equals(expected(df))
+    # and rebuilt when df is set
+    analyzer.df = df.iloc[::-1]
+    assert analyzer.query(polymer=polymer).equals(
+        analyzer.df[analyzer.df.polymer == polymer]
+    )
+
+    with pytest.raises(ValueError, match="state"):
+        analyzer.query(state="melting")
+
+
+def test_analyzer_out_of_core(csste_1014, tmp_path):  # noqa: F811
+    pytest.importorskip("pyarrow")
+    experiments = [
+        csste_1014,
+        Experiment.load_from_file(
+            write_synthetic_report(tmp_path / "report.csv", duration_in_hours=1)
+        ),
+    ]
+    expected = Analyzer()
+    expected.add_experiments(experiments)
+    n = len(csste_1014.actual_temperature.values)
+    analyzer = Analyzer(store=tmp_path / "store", chunk_rows=2 * n)
+    analyzer.add_experiments(experiments)
+    # rows are written to the store while reactors are added
+    assert len(analyzer._unprocessed_df_buffer) < len(
+        csste_1014.reactors + experiments[1].reactors
+    )
+    assert len(list((tmp_path / "store" / "unprocessed").rglob("chunk-*"))) > 1
+
+    def sort(df):
+        return (
+            df.astype({"reactor": str})
+            .sort_values(["reactor", "time"])
+            .reset_index(drop=True)
+        )
+
+    pd.testing.assert_frame_equal(
+        sort(analyzer.unprocessed_df),
+        sort(expected.unprocessed_df),
+        check_categorical=False,
+    )
+    assert len(analyzer.df) == len(expected.df)
+
+    exp_reactor = csste_1014.reactors[0]
+    selected = analyzer.query(
+        polymer=exp_reactor.polymer,
+        conc_range=(exp_reactor.conc.value, None),
+        state="cooling",
+        filtered=False,
+    )
+    assert len(selected) == len(
+        expected.query(
+            polymer=exp_reactor.polymer,
+            conc_range=(exp_reactor.conc.value, None),
+            state="cooling",
+            filtered=False,
+        )
+    )
+    batches = list(
+        analyzer.iter_frames(unprocessed=True, columns=["transmission"], batch_rows=n)
+    )
+    assert all(len(batch) <= n for batch in batches)
+    assert list(batches[0].columns) == ["transmission"]
+    assert sum(len(batch) for batch in batches) == len(expected.unprocessed_df)
+
+    analyzer.save(tmp_path / "results")
+    assert len(Analyzer.load(tmp_path / "results").df) == len(expected.df)
+
+    # the raw data of added experiments is released by default
+    assert analyzer.processed_reactors.policy == "processed"
+    experiment = Experiment.load_from_file(
+        write_synthetic_report(tmp_path / "released.csv", duration_in_hours=1, seed=1)
+    )
+    analyzer.add_experiment_reactors(experiment)
+    ref = weakref.ref(experiment)
+    del experiment
+    gc.collect()
+    assert ref() is None
+
+    with pytest.raises(ValueError, match="out-of-core"):
+        analyzer.df = expected.df
+    with pytest.raises(ValueError, match="out-of-core"):
+        expected.select()
+    with pytest.raises(FileExistsError):
+        Analyzer(store=tmp_path / "store")
+
+
+def test_analyzer_retention(csste_1014, tmp_path, monkeypatch):  # noqa: F811
+    path = TEST_DATA / csste_1014.file_name
+    analyzer = Analyzer(retention="processed")
+    experiment = Experiment.load_from_file(path)
+    analyzer.add_experiment_reactors(experiment)
+    temperatures = analyzer.processed_reactors[0].temperatures
+    # the experiment is released once the caller drops it
+    ref = weakref.ref(experiment)
+    del experiment
+    gc.collect()
+    assert ref() is None
+    assert analyzer.processed_reactors.nbytes == 0
+    # and reloaded from its file when accessed
+    processed = analyzer.processed_reactors[1]
+    assert processed.temperatures is analyzer.processed_reactors[1].temperatures
+    assert processed.unprocessed_reactor.reactor_number == 2
+    assert np.array_equal(
+        processed.unprocessed_reactor.transmission.values,
+        csste_1014.reactors[1].transmission.values,
+    )
+    assert analyzer.processed_reactors[0].temperatures is temperatures
+    # iterating reloads each experiment once, not once per reactor
+    loads = []
+    load_from_file = Experiment.load_from_file
+
+    def counted_load(*args, **kwargs):
+        loads.append(args)
+        return load_from_file(*args, **kwargs)
+
+    monkeypatch.setattr(Experiment, "load_from_file", counted_load)
+    reactors = list(analyzer.processed_reactors)
+    assert len(loads) == 1
+    assert len({id(r.unprocessed_reactor.experiment) for r in reactors}) == 1
+    assert len(analyzer.processed_reactors[1:]) == 2
+    assert len(analyzer.get_transition_temperatures()) > 0
+    assert len(loads) == 3
+    monkeypatch.undo()
+
+    # least recently used experiments are released over the budget
+    synthetic = Experiment.load_from_file(
+        write_synthetic_report(tmp_path / "report.csv", duration_in_hours=1)
+    )
+    budget = max(experiment_nbytes(csste_1014), experiment_nbytes(synthetic))
+    analyzer = Analyzer(retention="lru", raw_budget_bytes=budget)
+    analyzer.add_experiment_reactors(Experiment.load_from_file(path))
+    analyzer.add_experiment_reactors(synthetic)
+    reactors = analyzer.processed_reactors
+    assert reactors.nbytes == experiment_nbytes(synthetic)
+    assert reactors[-1].unprocessed_reactor.experiment is synthetic
+    first = reactors[0].unprocessed_reactor
+    assert first.experiment.file_name == csste_1014.file_name
+    assert reactors.nbytes <= budget
+    assert reactors[1].unprocessed_reactor.experiment is first.experiment
+    assert reactors[-1].unprocessed_reactor.experiment is not synthetic
+
+    # experiments without a file or database id are kept
+    analyzer = Analyzer(retention="processed")
+    unsourced = Experiment.load_from_file(path)
+    unsourced.file_path = None
+    analyzer.add_experiment_reactors(unsourced)
+    assert analyzer.processed_reactors[0].unprocessed_reactor.experiment is unsourced
+
+    with pytest.raises(ValueError, match="retention"):
+        Analyzer(retention="none")
+    with pytest.raises(ValueError, match="budget"):
+        Analyzer(retention="lru")
+
+
+def test_analyzer_phase_diagram(tmp_path):
+    reactors = [
+        SyntheticReactor(polymer="PEG", solvent="TOL", concentration=5, cloud_point=25),
+        SyntheticReactor(
+            polymer="PEG", solvent="TOL", concentration=10, cloud_point=35
+        ),
+        SyntheticReactor(
+            polymer="PVP",
+            solvent="MeOH",
+            concentration=5,
+            cloud_point=30,
+            clear_point=33,
+        ),
+    ]
+    analyzer = Analyzer()
+    assert len(analyzer.phase_diagram()) == 0
+    analyzer.add_experiment_reactors(
+        Experiment.load_from_file(
+            write_synthetic_report(
+                tmp_path / "first.csv", reactors=reactors, duration_in_hours=6
+            )
+        )
+    )
+    diagram = analyzer.phase_diagram()
+    # cached until reactors are added
+    cached = analyzer._phase_diagrams[(50, True)]
+    analyzer.phase_diagram(polymer="PEG")
+    assert analyzer._phase_diagrams[(50, True)] is cached
+    points = diagram.set_index(["polymer", "concentration", "transition"])
+    assert points.temperature[("PEG", 5, "cloud")] == pytest.approx(25, abs=0.5)
+    assert points.temperature[("PEG", 5, "clear")] == pytest.approx(30, abs=0.5)
+    assert points.temperature[("PEG", 10, "cloud")] == pytest.approx(35, abs=0.5)
+    assert points.temperature[("PVP", 5, "clear")] == pytest.approx(33, abs=0.5)
+    assert (diagram["count"] == 1).all()
+
+    analyzer.add_experiment_reactors(
+        Experiment.load_from_file(
+            write_synthetic_report(
+                tmp_path / "second.csv", reactors=reactors, duration_in_hours=6, seed=1
+            )
+        )
+    )
+    diagram = analyzer.phase_diagram(polymer="PEG", solvent="TOL")
+    assert list(diagram.concentration) == [5, 5, 10, 10]
+    assert list(diagram.transition) == ["clear", "cloud", "clear", "cloud"]
+    assert (diagram["count"] == 2).all()
+    assert (diagram.temperature_max - diagram.temperature_min < 0.5).all()
+    assert (diagram.temperature_std > 0).all()
+    assert len(analyzer.phase_diagram(threshold=101)) == 0
+
+
+@pytest.mark.parametrize("layout", ["long", "normalized"])
+def test_analyzer_concurrent_ingestion(csste_1014, tmp_path, layout):  # noqa: F811
+    experiments = [
+        csste_1014,
+        Experiment.load_from_file(
+            write_synthetic_report(tmp_path / "report.csv", duration_in_hours=2)
+        ),
+    ]
+    reactors = [
+        exp_reactor for experiment in experiments for exp_reactor in experiment.reactors
+    ]
+    expected = Analyzer(layout=layout)
+    expected.add_reactors(reactors)
+
+    analyzer = Analyzer(layout=layout)
+    # every reactor is added twice, from different threads
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(analyzer.add_reactor, reactors + reactors[::-1]))
+    assert len(analyzer.processed_reactors) == len(reactors)
+
+    def sort(df):
+        return (
+            df.astype({"reactor": str, "polymer": str, "solvent": str})
+            .sort_values(["reactor", "polymer", "solvent"], kind="stable")
+            .reset_index(drop=True)
+        )
+
+    pd.testing.assert_frame_equal(
+        sort(analyzer.df), sort(expected.df), check_categorical=False
+    )
+    pd.testing.assert_frame_equal(
+        sort(analyzer.unprocessed_df),
+        sort(expected.unprocessed_df),
+        check_categorical=False,
+    )
+    exp_reactor = reactors[0]
+    assert len(analyzer.query(polymer=exp_reactor.polymer)) == len(
+        expected.query(polymer=exp_reactor.polymer)
+    )
@@ -0,0 +1,247 @@
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from csst.analyzer import Analyzer  # noqa: E402
+from csst.analyzer.plotter import (  # noqa: E402
+    ExperimentPlot,
+    decimate,
+    plot_experiment,
+    plot_processed,
+    reactor_colors,
+)
+from csst.analyzer.render import render_experiments  # noqa: E402
+from csst.experiment import Experiment  # noqa: E402
+from csst.experiment.synthetic import (  # noqa: E402
+    SyntheticReactor,
+    write_synthetic_report,
+)
+
+from .fixtures.data import csste_1014  # noqa: F401, E402
+
+TEST_DATA = Path(__file__).parent.absolute() / "test_data"
+
+
+def test_decimate():
+    x = np.arange(10_001, dtype=float)
+    ys = np.vstack([np.sin(x / 100), np.zeros_like(x)])
+    ys[1, 1234] = 5
+    ys[1, 9876] = -5
+    ys[0, 5000] = np.nan
+    dx, dys = decimate(x, ys, 100)
+    assert dx.shape == dys.shape == (2, 100)
+    assert (np.diff(dx, axis=1) >= 0).all()
+    # every extreme is kept
+    assert np.nanmax(dys[0]) == np.nanmax(ys[0])
+    assert np.nanmin(dys[0]) == np.nanmin(ys[0])
+    assert 1234 in dx[1] and 9876 in dx[1]
+    assert dys[1].max() == 5 and dys[1].min() == -5
+    # short series are unchanged
+    dx, dys = decimate(x[:50], ys[:, :50], 100)
+    assert np.array_equal(dys, ys[:, :50])
+    assert np.array_equal(dx[0], x[:50])
+    for max_points in [1, 0, -4]:
+        with pytest.raises(ValueError, match="max_points must be at least 2"):
+            decimate(x, ys, max_points)
+    dx, dys = decimate(x, ys, 2)
+    assert dys.shape == (2, 2)
+
+
+def test_plot_experiment_max_points(csste_1014):  # noqa: F811
+    fig = plot_experiment(csste_1014)
+    n = len(csste_1014.time_since_experiment_start.values)
+    lines = fig.axes[0].get_lines()
+    assert [len(line.get_xdata()) for line in lines] == [n] * len(lines)
+    plt.close(fig)
+
+    fig = plot_experiment(csste_1014, max_points=200)
+    transmission_lines = fig.axes[0].get_lines()
+    temperature_lines = fig.axes[1].get_lines()
+    assert len(transmission_lines) == len(csste_1014.reactors)
+    for line, exp_reactor in zip(transmission_lines, csste_1014.reactors):
+        assert len(line.get_ydata()) <= 200
+        assert max(line.get_ydata()) == max(exp_reactor.transmission.values)
+        assert min(line.get_ydata()) == min(exp_reactor.transmission.values)
+    assert len(temperature_lines[0].get_xdata()) <= 200
+    plt.close(fig)
+
+
+def test_reactor_colors():
+    assert len(set(reactor_colors(4))) == 4
+    assert len(set(reactor_colors(10))) == 10
+    assert len(set(reactor_colors(16))) == 16
+
+
+def test_render_experiments(tmp_path, csste_1014):  # noqa: F811
+    reactors = [
+        SyntheticReactor(concentration=i + 1, cloud_point=20 + i) for i in range(16)
+    ]
+    report = write_synthetic_report(
+        tmp_path / "sixteen.csv", reactors=reactors, samples=2000
+    )
+    rendered = render_experiments(
+        [report, csste_1014, TEST_DATA / "non_csst_file.csv", report],
+        tmp_path / "plots",
+        max_points=500,
+        processes=2,
+    )
+    assert [figure.source for figure in rendered] == [
+        str(report),
+        csste_1014.file_name,
+        str(TEST_DATA / "non_csst_file.csv"),
+        str(report),
+    ]
+    assert [figure.path for figure in rendered] == [
+        tmp_path / "plots" / "sixteen.png",
+        tmp_path / "plots" / f"{Path(csste_1014.file_name).stem}.png",
+        None,
+        tmp_path / "plots" / "sixteen_3.png",
+    ]
+    for figure in rendered[:2] + rendered[3:]:
+        assert figure.error is None
+        assert figure.path.stat().st_size > 0
+        assert figure.seconds >= figure.load_seconds
+    assert rendered[0].load_seconds > 0
+    assert rendered[1].load_seconds == 0
+    assert rendered[2].error is not None
+
+    # one process renders in the current process
+    rendered = render_experiments([report], tmp_path / "serial", processes=1)
+    assert rendered[0].path.stat().st_size > 0
+
+
+def test_render_experiments_repeated_names(tmp_path):
+    reports = []
+    for folder, stem in [("a", "report"), ("b", "report_2"), ("c", "report")]:
+        (tmp_path / folder).mkdir()
+        path = tmp_path / folder / f"{stem}.csv"
+        reports.append(write_synthetic_report(path, samples=200))
+    reports.append(write_synthetic_report(tmp_path / "report_3.csv", samples=200))
+    rendered = render_experiments(reports, tmp_path / "plots", processes=1)
+    # the third report would be report_2, which the second report already uses
+    assert [figure.path.name for figure in rendered] == [
+        "report.png",
+        "report_2.png",
+        "report_3.png",
+        "report_3_3.png",
+    ]
+    assert len(list((tmp_path / "plots").iterdir())) == 4
+
+
+def test_experiment_plot_update(tmp_path, csste_1014):  # noqa: F811
+    # a live experiment: the same reactors with more samples
+    earlier = Experiment.load_from_file(
+        write_synthetic_report(tmp_path / "earlier.csv", samples=1000)
+    )
+    later = Experiment.load_from_file(
+        write_synthetic_report(tmp_path / "later.csv", samples=3000)
+    )
+    fig = plt.figure(figsize=(8, 6), tight_layout=True)
+    plot = ExperimentPlot(fig, earlier, max_points=200)
+    plot.draw()
+    axes = fig.axes
+    lines = axes[0].get_lines()
+
+    # the same reactors only update the lines
+    plot.update(later)
+    plot.draw()
+    assert fig.axes == axes
+    assert axes[0].get_lines() == lines
+    times = later.time_since_experiment_start.values
+    assert axes[0].get_xlim() == (0, max(times))
+    # decimation keeps extremes, not necessarily the last sample
+    earlier_end = max(earlier.time_since_experiment_start.values)
+    assert axes[1].get_lines()[0].get_xdata().max() > earlier_end
+    for line, reactor in zip(lines, later.reactors):
+        assert len(line.get_xdata()) <= 200
+        assert max(line.get_xdata()) > earlier_end
+        assert max(line.get_ydata()) == max(reactor.transmission.values)
+    fig.savefig(tmp_path / "later.png")
+
+    # other reactors rebuild the plot
+    plot.update(csste_1014)
+    assert len(fig.axes) == 2
+    assert len(fig.axes[0].get_lines()) == len(csste_1014.reactors)
+    assert len(fig.axes[0].get_legend().get_texts()) == len(csste_1014.reactors)
+    plt.close(fig)
+
+
+def test_plot_processed(csste_1014):  # noqa: F811
+    analyzer = Analyzer()
+    analyzer.add_experiment_reactors(csste_1014)
+    df = analyzer.df
+    n_reactors = len(csste_1014.reactors)
+
+    fig = plot_processed(df, filtered=None)
+    axes = np.array(fig.axes).reshape(2, 2)
+    assert [[ax.get_title() for ax in row] for row in axes] == [
+        ["Unfiltered, Heating", "Unfiltered, Cooling"],
+        ["Filtered, Heating", "Filtered, Cooling"],
+    ]
+    lines, bands = axes[1][1].collections
+    assert len(lines.get_segments()) == n_reactors
+    assert len(bands.get_paths()) == n_reactors
+    # the curves are the precomputed values in temperature order
+    first = df.loc[
+        (df.reactor == str(csste_1014.reactors[0])) & (df.cooling == 1) & df.filtered
+    ].sort_values("average_temperature")
+    segment = lines.get_segments()[0]
+    assert np.array_equal(segment[:, 0], first.average_temperature)
+    assert np.array_equal(segment[:, 1], first.average_transmission)
+    band = bands.get_paths()[0].vertices
+    assert band[:, 1].max() == pytest.approx(
+        (first.average_transmission + first.transmission_std).max()
+    )
+    assert len(axes[0][1].get_legend().get_texts()) == n_reactors
+    plt.close(fig)
+
+    fig = plot_processed(
+        df,
+        y="median_transmission",
+        error=None,
+        ramps=["heating", "cooling", "holding"],
+        facet_ramps=False,
+        legend=False,
+    )
+    (ax,) = fig.axes
+    assert ax.get_title() == "Heating, cooling and holding"
+    assert ax.get_ylabel().startswith("Median transmission")
+    (lines,) = ax.collections
+    assert len(lines.get_segments()) == 3 * n_reactors
+    assert ax.get_legend() is None
+    plt.close(fig)
+
+    with pytest.raises(ValueError):
+        plot_processed(df, ramps=["stirring"])
+
+
+def test_plot_processed_experiments(tmp_path):
+    # experiments with the same reactors have the same reactor labels
+    analyzer = Analyzer()
+    for seed in range(2):
+        analyzer.add_experiment_reactors(
+            Experiment.load_from_file(
+                write_synthetic_report(
+                    tmp_path / f"report_{seed}.csv", duration_in_hours=2, seed=seed
+                )
+            )
+        )
+    n_reactors = len(analyzer.processed_reactors)
+    assert analyzer.df.reactor.nunique() == n_reactors // 2
+
+    fig = plot_processed(analyzer.df, error=None, ramps=["cooling"])
+    (ax,) = fig.axes
+    (lines,) = ax.collections
+    # one curve per reactor, each in increasing temperature order
+    assert len(lines.get_segments()) == n_reactors
+    for segment in lines.get_segments():
+        assert (np.diff(segment[:, 0]) > 0).all()
+    assert len(ax.get_legend().get_texts()) == n_reactors
+    assert len(set(map(tuple, lines.get_colors()))) == n_reactors
+    plt.close(fig)
@@ -7,6 +7,7 @@ from csst.db.orm.csst import (
     CSSTTemperatureProgram,
     CSSTProperty,
     CSSTReactorPropertyValues,
+    CSSTReactorPropertyArray,
     CSSTExperimentPropertyValue,
     CSSTReactor,
     CSSTReactorProcessedTemperature,
@@ -192,22 +193,57 @@ def test_add_reactor_property_values(session, manual_1014):  # noqa: F811
     )
     assert prop_query.count() == 1
     db_prop = prop_query.first()
-    values = (
-        session.query(CSSTReactorPropertyValues)
+    # one row per array
+    rows = (
+        session.query(CSSTReactorPropertyArray)
         .filter(
-            CSSTReactorPropertyValues.csst_reactor_id == reactor_id,
-            CSSTReactorPropertyValues.csst_property_id == db_prop.id,
+            CSSTReactorPropertyArray.csst_reactor_id == reactor_id,
+            CSSTReactorPropertyArray.csst_property_id == db_prop.id,
         )
         .all()
     )
-    for value in values:
-        assert value.csst_reactor_id == reactor_id
-        assert value.csst_property_id == db_prop.id
-        assert value.array_index == value.value
-    assert len(values) == 4
+    assert len(rows) == 1
+    assert rows[0].values == [0, 1, 2, 3]
     with pytest.raises(LookupError, match=r"already added"):
         db.adder.add_reactor_property_values(reactor_id, prop, session)
     assert prop_query.count() == 1
+    # values added to the one row per value table are duplicates too
+    prop = PropertyValues(name="transmission", unit="test", values=np.array([1, 2]))
+    with pytest.raises(LookupError, match=r"already added"):
+        db.adder.add_reactor_property_values(reactor_id, prop, session)
+
+
+@pytest.mark.parametrize("use_copy", [True, False])
+def test_insert_property_array(session, use_copy):
+    reactor_id = 10001  # from database seed function in conftest
+    prop_data = {"name": "temperature", "unit": "K"}
+    db.adder.add_property(prop_data, session)
+    prop_id = db.getter.get_property_id(prop_data, session)
+    # values that are not exact in text
+    values = np.arange(20_005) / 3
+    savepoint = session.begin_nested()
+    db.adder.insert_property_array(
+        CSSTReactorPropertyArray,
+        {"csst_property_id": prop_id, "csst_reactor_id": reactor_id},
+        values,
+        session,
+        use_copy=use_copy,
+    )
+    rows = (
+        session.query(CSSTReactorPropertyArray)
+        .filter_by(csst_reactor_id=reactor_id, csst_property_id=prop_id)
+        .all()
+    )
+    assert len(rows) == 1
+    assert np.array_equal(rows[0].values, values)
+    # the row is part of the session's transaction
+    savepoint.rollback()
+    assert (
+        session.query(CSSTReactorPropertyArray)
+        .filter_by(csst_reactor_id=reactor_id, csst_property_id=prop_id)
+        .count()
+        == 0
+    )
 
 
 def test_add_experiment_property_value(session, manual_1014):  # noqa: F811
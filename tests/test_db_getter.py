@@ -1,11 +1,16 @@
 import pytest
 import numpy as np
 
-from csst.db.orm.csst import CSSTExperiment, CSSTTemperatureProgram
+from csst.db.orm.csst import CSSTExperiment, CSSTReactor, CSSTTemperatureProgram
 from csst import db
+from csst.db import adder
 
 from csst.experiment import Experiment
-from csst.experiment.models import PropertyNameEnum, TemperatureSettingEnum
+from csst.experiment.models import (
+    PropertyNameEnum,
+    PropertyValues,
+    TemperatureSettingEnum,
+)
 from .fixtures.data import csste_1014, manual_1014  # noqa: F401
 
 
@@ -141,6 +146,36 @@ def test_get_reactor_property_values_by_experiment_id(session):
             assert prop_values.name == prop
 
 
+def test_get_property_values_from_arrays(session):
+    # experiment 10001 and reactor 10000 have one row per value properties in the
+    # seed. Arrays added to them are read alongside those.
+    values = np.linspace(0, 1, 1001)
+    temperature = PropertyValues(name="temperature", unit="K", values=values)
+    rate = PropertyValues(name="temperature_change_rate", unit="K/min", values=values)
+    adder.add_property({"name": temperature.name, "unit": temperature.unit}, session)
+    adder.add_property({"name": rate.name, "unit": rate.unit}, session)
+    adder.add_reactor_property_values(10000, temperature, session)
+    adder.add_experiment_property_values(10001, rate, session)
+    session.commit()
+
+    props = db.getter.get_reactor_property_values_by_reactor_id(10000, session)
+    assert set(props) == {PropertyNameEnum.TRANS, PropertyNameEnum.TEMP}
+    assert np.array_equal(props[PropertyNameEnum.TEMP].values, values)
+    assert props[PropertyNameEnum.TEMP].unit == "K"
+    assert np.array_equal(
+        props[PropertyNameEnum.TRANS].values, list(range(100000, 100010))
+    )
+
+    props = db.getter.get_experiment_property_values_by_experiment_id(10001, session)
+    assert len(props) == 5
+    prop = props[PropertyNameEnum.TEMPERATURE_CHANGE_RATE]
+    assert np.array_equal(prop.values, values)
+    assert prop.unit == "K/min"
+    assert np.array_equal(
+        props[PropertyNameEnum.TIME].values, list(range(100010, 100020))
+    )
+
+
 def test_get_temperature_program_by_id(session):
     temperature_program = db.getter.get_temperature_program_by_id(10000, session)
     assert temperature_program.solvent_tune[0].setting == TemperatureSettingEnum.HEAT
@@ -151,3 +186,82 @@ def test_get_temperature_program_by_id(session):
 def test_get_experiments(session):
     exps = db.getter.get_experiments(Experiment(), session)
     assert len(exps) == 2
+
+
+def test_get_experiment_by_id(session):
+    exp = db.getter.get_experiment_by_id(10001, session)
+    assert exp.database_id == 10001
+    assert exp.experimenter == "Joe"
+    exps = db.getter.get_experiments(Experiment(), session)
+    assert sorted(exp.database_id for exp in exps) == [10000, 10001]
+    with pytest.raises(LookupError, match="No experiment with id"):
+        db.getter.get_experiment_by_id(1, session)
+
+
+def test_get_experiment_by_id_without_unique_metadata(session, monkeypatch):
+    # experiment 10002 has the number and start of 10000, 10003 has neither
+    seeded = session.query(CSSTExperiment).filter_by(id=10000).first()
+    experiments = {
+        10002: (seeded.experiment_number, seeded.start_of_experiment),
+        10003: (None, None),
+    }
+    values = np.arange(10, dtype=float)
+    for i, (number, start) in experiments.items():
+        session.add(
+            CSSTExperiment(
+                id=i,
+                file_name=f"test{i}.csv",
+                version="test",
+                experiment_number=number,
+                description="test",
+                start_of_experiment=start,
+            )
+        )
+        session.add(
+            CSSTReactor(
+                id=i + 2,  # after the seeded reactors
+                lab_sol_id=3,
+                lab_pol_id=41,
+                csst_temperature_program_id=10000,
+                csst_experiment_id=i,
+                conc=i,
+                conc_unit="test",
+                reactor_number=1,
+            )
+        )
+        session.flush()
+        for name in [PropertyNameEnum.TEMP, PropertyNameEnum.STIR_RATE]:
+            prop = PropertyValues(name=name, unit="test", values=values + i)
+            adder.add_experiment_property_values(i, prop, session)
+        prop = PropertyValues(name=PropertyNameEnum.TIME, unit="test", values=values)
+        adder.add_experiment_property_values(i, prop, session)
+        prop = PropertyValues(name=PropertyNameEnum.TEMP, unit="test", values=values)
+        adder.add_experiment_property_values(
+            i, prop, session, prop_name="set_temperature"
+        )
+        prop = PropertyValues(name=PropertyNameEnum.TRANS, unit="test", values=values)
+        adder.add_reactor_property_values(i + 2, prop, session)
+    session.commit()
+
+    # only the reactors of the requested experiment are loaded
+    loaded = []
+    get_reactors = db.getter.get_csst_reactors_by_experiment_id
+
+    def get_csst_reactors_by_experiment_id(experiment_id, session):
+        loaded.append(experiment_id)
+        return get_reactors(experiment_id, session)
+
+    monkeypatch.setattr(
+        db.getter,
+        "get_csst_reactors_by_experiment_id",
+        get_csst_reactors_by_experiment_id,
+    )
+    for i in [10000, 10002, 10003]:
+        loaded.clear()
+        exp = db.getter.get_experiment_by_id(i, session)
+        assert exp.database_id == i
+        assert loaded == [i]
+    assert exp.experiment_number is None
+    assert exp.start_of_experiment is None
+    assert np.array_equal(exp.actual_temperature.values, values + 10003)
+    assert [reactor.conc.value for reactor in exp.reactors] == [10003]
@@ -1,10 +1,11 @@
 from pathlib import Path
 
 import numpy as np
+import pytest
 
 from csst.experiment.models import PropertyValue
 from csst.experiment import load_experiments_from_folder
-from .fixtures.data import csste_1014, manual_1014  # noqa: F401
+from .fixtures.data import csste_1014, manual_1014, cycling_experiment  # noqa: F401
 
 
 def test_experiment_init_from_file_version_1014(csste_1014, manual_1014):  # noqa: F811
@@ -112,3 +113,91 @@ def test_load_experiments_from_folder():
     folder = str(Path(__file__).parent.absolute() / "test_data")
     assert len(load_experiments_from_folder(folder)) == 2
     assert len(load_experiments_from_folder(folder, recursive=True)) == 3
+
+
+def test_experiment_segments(cycling_experiment):  # noqa: F811
+    segments = cycling_experiment.segments
+    assert segments.start.to_list() == [0, 101, 201]
+    assert segments.stop.to_list() == [101, 201, 301]
+    assert segments.state.to_list() == ["heating", "cooling", "heating"]
+    assert segments.cycle.to_list() == [1, 1, 2]
+    assert segments.mean_rate.to_list() == pytest.approx([40, -40, 40])
+    # computed once
+    assert cycling_experiment.segments is segments
+    assert cycling_experiment.get_cycle_slice("heating", 2) == slice(201, 301)
+    with pytest.raises(LookupError):
+        cycling_experiment.get_cycle_slice("heating", 3)
+
+    # recomputed when the temperatures or times are replaced
+    temps = cycling_experiment.actual_temperature
+    cycling_experiment.actual_temperature = temps.copy(
+        update={"values": [2 * t for t in temps.values]}
+    )
+    assert cycling_experiment.segments.mean_rate.to_list() == pytest.approx(
+        [80, -80, 80]
+    )
+    times = cycling_experiment.time_since_experiment_start
+    cycling_experiment.time_since_experiment_start = times.copy(
+        update={"values": [2 * t for t in times.values]}
+    )
+    assert cycling_experiment.segments.mean_rate.to_list() == pytest.approx(
+        [40, -40, 40]
+    )
+    cycling_experiment.actual_temperature = temps
+    cycling_experiment.time_since_experiment_start = times
+
+    # short segments are not cycles and do not split the cycle around them
+    ramp_state = list(cycling_experiment.ramp_state)
+    ramp_state[150:152] = ["heating"] * 2
+    cycling_experiment.ramp_state = ramp_state
+    segments = cycling_experiment.segments
+    assert segments.state.to_list() == [
+        "heating",
+        "cooling",
+        "heating",
+        "cooling",
+        "heating",
+    ]
+    assert segments.cycle.to_list() == [1, 1, 0, 1, 2]
+    assert cycling_experiment.get_cycle_slice("cooling", 1) == slice(101, 201)
+
+
+def test_experiment_segments_from_file(csste_1014):  # noqa: F811
+    segments = csste_1014.segments
+    assert segments.start.iloc[0] == 0
+    assert segments.stop.iloc[-1] == len(csste_1014.ramp_state)
+    assert (segments.start.to_numpy()[1:] == segments.stop.to_numpy()[:-1]).all()
+    cycles = segments[segments.cycle > 0].drop_duplicates(["state", "cycle"])
+    # tuning cool down plus two cooling ramps, and three heating ramps
+    assert len(cycles[cycles.state == "cooling"]) == 3
+    assert len(cycles[cycles.state == "heating"]) == 3
+    s = csste_1014.get_cycle_slice("cooling", 3)
+    assert set(csste_1014.ramp_state[s][:10]) == {"cooling"}
+
+
+def test_experiment_program_labels(csste_1014):  # noqa: F811
+    labels = csste_1014.program_labels
+    assert labels is csste_1014.program_labels
+    n = len(csste_1014.set_temperature.values)
+    assert len(labels.stage) == n
+    # tuning starts by cooling from room temperature down to 20 C
+    assert labels.stage[0] == "solvent_tune"
+    assert labels.step_index[0] == 0
+    assert labels.ramp_state[0] == "cooling"
+    # the sample load hold lasts until the set temperature starts increasing
+    load = np.flatnonzero(labels.stage == "sample_load")
+    assert (csste_1014.set_temperature.values[load] == 20).all()
+    assert csste_1014.set_temperature.values[load[-1] + 1] > 20
+    experiment = labels.experiment_mask
+    assert experiment[load[-1] + 1 :].all()
+    steps = labels.step_index[experiment]
+    assert (np.diff(steps) >= 0).all()
+    assert np.unique(steps).tolist() == list(range(10))
+    states = [labels.ramp_state[experiment][steps == i][0] for i in range(10)]
+    assert states == ["heating", "holding", "cooling", "holding"] * 2 + [
+        "heating",
+        "holding",
+    ]
+    # the program follows the set temperature to within a few tenths of a degree
+    diff = labels.expected_set_temperature - csste_1014.set_temperature.values
+    assert np.abs(diff).max() < 0.5
@@ -5,6 +5,7 @@ from csst.experiment.helpers import (
     try_parsing_date,
     json_dumps,
     remove_keys_with_null_values_in_dict,
+    per_hour,
 )
 
 
@@ -42,3 +43,11 @@ def test_remove_keys_with_null_values_in_dict():
     assert "test3" not in clean_data
     assert data["test2"] == clean_data["test2"]
     assert data["test5"] == clean_data["test5"]
+
+
+def test_per_hour():
+    assert per_hour("sec") == 3600
+    assert per_hour(" min") == 60
+    assert per_hour("Hours") == 1
+    with pytest.raises(ValueError):
+        per_hour("day")
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from csst.experiment import Experiment
+from csst.experiment.synthetic import (
+    SyntheticReactor,
+    default_reactors,
+    default_temperature_program,
+    write_synthetic_report,
+)
+from csst.processor.transitions import find_transition_temperatures
+
+
+def test_write_synthetic_report_round_trip(tmp_path):
+    reactors = [
+        SyntheticReactor(polymer="PEG", solvent="TOL", concentration=5, cloud_point=25),
+        SyntheticReactor(
+            polymer="PVP",
+            solvent="MeOH",
+            concentration=10.5,
+            cloud_point=40,
+            clear_point=42,
+            polymer_id=41,
+            solvent_id=3,
+        ),
+    ]
+    program = default_temperature_program()
+    path = write_synthetic_report(
+        tmp_path / "report.csv",
+        reactors=reactors,
+        temperature_program=program,
+        start_of_experiment=datetime(2023, 1, 2, 3, 4),
+        chunk_size=1000,
+    )
+    experiment = Experiment.load_from_file(path)
+    assert experiment.version == "1014"
+    assert experiment.start_of_experiment == datetime(2023, 1, 2, 3, 4)
+    assert experiment.temperature_program == program
+    # program runs once: tune and load holds, 80 minutes heating from 20 to 60 C,
+    # 100 minutes cooling to 10 C and 2 10 minute holds
+    n = (30 + 60 + 4800 + 6000 + 2 * 600) // 2 + 1
+    times = np.asarray(experiment.time_since_experiment_start.values)
+    assert len(times) == n
+    assert np.allclose(np.diff(times), 2 / 3600)
+    assert experiment.set_temperature.values.max() == 60
+    assert experiment.set_temperature.values.min() == 10
+
+    assert [reactor.reactor_number for reactor in experiment.reactors] == [1, 2]
+    assert [reactor.polymer for reactor in experiment.reactors] == ["PEG", "PVP"]
+    assert experiment.reactors[1].conc.value == 10.5
+    assert experiment.reactors[1].polymer_id == 41
+    assert experiment.reactors[1].solvent_id == 3
+    assert experiment.reactors[0].polymer_id is None
+
+    df = find_transition_temperatures(experiment.reactors)
+    points = df.set_index(["reactor_number", "transition"]).temperature
+    assert points[(1, "cloud")] == pytest.approx(25, abs=1)
+    assert points[(1, "clear")] == pytest.approx(30, abs=1)
+    assert points[(2, "cloud")] == pytest.approx(40, abs=1)
+    assert points[(2, "clear")] == pytest.approx(42, abs=1)
+
+
+# the ramp state window is empty when samples are more than a minute apart
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_write_synthetic_report_long_runs(tmp_path):
+    """Runs longer than a month with more than 9 reactors load"""
+    path = write_synthetic_report(
+        tmp_path / "report.csv",
+        reactors=default_reactors(12),
+        duration_in_hours=800,
+        sampling_interval_in_seconds=600,
+    )
+    experiment = Experiment.load_from_file(path)
+    times = experiment.time_since_experiment_start.values
+    assert len(times) == 800 * 6 + 1
+    assert times[-1] == pytest.approx(800)
+    # the experiment steps are repeated until the report is long enough
+    assert len(experiment.temperature_program.experiment) > 4
+    assert [reactor.reactor_number for reactor in experiment.reactors] == list(
+        range(1, 13)
+    )
+    assert [reactor.conc.value for reactor in experiment.reactors] == [
+        5 * (i + 1) for i in range(12)
+    ]
+
+
+def test_write_synthetic_report_errors(tmp_path):
+    with pytest.raises(ValueError, match="sampling_interval_in_seconds"):
+        write_synthetic_report(tmp_path / "report.csv", sampling_interval_in_seconds=0)
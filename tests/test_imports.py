@@ -0,0 +1,48 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.absolute()
+HEAVY = ["pandas", "scipy", "matplotlib", "sqlalchemy"]
+
+
+def loaded(code: str) -> list:
+    """Heavy dependencies loaded after running code in a fresh interpreter"""
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            code + f"\nimport sys\nprint([m for m in {HEAVY} if m in sys.modules])",
+        ],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        check=True,
+    )
+    return eval(process.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    "code,expected",
+    [
+        ("import csst", []),
+        ("import csst.experiment", []),
+        ("from csst.experiment import Experiment", []),
+        ("import csst.processor", []),
+        ("import csst.db.getter", ["sqlalchemy"]),
+        ("import csst\ncsst.experiment.Experiment", []),
+    ],
+)
+def test_lazy_imports(code, expected):
+    assert loaded(code) == expected
+
+
+def test_lazy_imports_on_use():
+    code = (
+        "from csst.experiment import Experiment\n"
+        "experiment = Experiment.load_from_file("
+        "'tests/test_data/example_data_version_1014.csv')"
+    )
+    assert loaded(code) == ["pandas", "scipy"]
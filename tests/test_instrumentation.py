@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from csst import instrumentation
+from csst.instrumentation import instrument, span
+from csst.analyzer import Analyzer
+from csst.experiment import Experiment
+from csst.experiment.synthetic import write_synthetic_report
+
+
+def test_spans_off_by_default():
+    assert not instrumentation.is_enabled()
+    instrumentation.reset()
+    with span("stage") as s:
+        s.add(rows=10)
+    assert instrumentation.get_recorder().to_dict() == {}
+
+
+def test_instrument_load_and_analyze(tmp_path):
+    path = write_synthetic_report(tmp_path / "report.csv", samples=1000)
+    with instrument() as recorder:
+        experiment = Experiment.load_from_file(path)
+        Analyzer().add_reactor(experiment.reactors[0])
+    assert not instrumentation.is_enabled()
+    spans = recorder.to_dict()
+    n = len(experiment.actual_temperature.values)
+
+    load = spans["experiment.load_from_file"]
+    assert load["calls"] == 1
+    assert load["rows"] == n
+    assert load["nbytes"] > 0
+    assert spans["experiment.load_from_file/read_csv"]["rows"] == n
+    assert spans["experiment.load_from_file/create_ramp_state"]["rows"] == n
+    # one filter per reactor in the file
+    filters = spans["experiment.load_from_file/filter_transmission"]
+    assert filters["calls"] == len(experiment.reactors)
+    assert filters["rows"] == n * len(experiment.reactors)
+    process = spans["analyzer.add_reactor/processor.process_reactor"]
+    assert process["calls"] == 1
+    assert process["seconds"] <= spans["analyzer.add_reactor"]["seconds"]
+    assert load["seconds"] >= spans["experiment.load_from_file/read_csv"]["seconds"]
+
+    assert json.loads(recorder.to_json()) == spans
+    prometheus = recorder.to_prometheus()
+    assert "# TYPE csst_span_seconds_total counter" in prometheus
+    assert f'csst_span_rows_total{{span="experiment.load_from_file"}} {n}' in (
+        prometheus
+    )
+
+
+def test_instrument_errors():
+    with instrument() as recorder:
+        with pytest.raises(ValueError):
+            with span("outer"):
+                with span("inner", nbytes=5):
+                    raise ValueError("failed")
+        with span("outer"):
+            pass
+    spans = recorder.to_dict()
+    assert spans["outer"]["calls"] == 2
+    assert spans["outer"]["errors"] == 1
+    assert spans["outer/inner"]["errors"] == 1
+    assert spans["outer/inner"]["nbytes"] == 5
+
+
+def test_instrumentation_env_var(monkeypatch):
+    monkeypatch.setenv(instrumentation.ENV_VAR, "true")
+    assert instrumentation._env_enabled()
+    monkeypatch.setenv(instrumentation.ENV_VAR, "0")
+    assert not instrumentation._env_enabled()
@@ -1,9 +1,13 @@
+import numpy as np
+import pytest
+
 from csst.processor import (
     process_reactor_transmission_at_temp,
     process_reactor_transmission_at_temps,
     process_reactor,
+    process_reactor_cycles,
 )
-from .fixtures.data import reactor  # noqa: F401
+from .fixtures.data import reactor, csste_1014  # noqa: F401
 
 
 def test_process_reactor_transmission_at_temp(reactor):  # noqa: F811
@@ -83,3 +87,63 @@ def test_process_ractor_data(reactor):  # noqa: F811
     ]
     assert averages == expected_averages
     assert temps == [5, 10, 15, 20]
+
+
+def test_process_reactor_cycles(csste_1014):  # noqa: F811
+    exp_reactor = csste_1014.reactors[1]
+    cycles = process_reactor_cycles(exp_reactor)
+    segments = csste_1014.segments
+    expected = segments[
+        segments.state.isin(["heating", "cooling"]) & (segments.cycle > 0)
+    ].drop_duplicates(["state", "cycle"])
+    # the first cooling cycle is the solvent tune, which is skipped like in
+    # process_reactor
+    assert [(c.state, c.cycle) for c in cycles] == list(
+        zip(expected.state, expected.cycle)
+    )[1:]
+    assert [c.cycle for c in process_reactor_cycles(exp_reactor, cycles=[2])] == [2, 2]
+    cooling = process_reactor_cycles(exp_reactor, states=["cooling"], cycles=[3])[0]
+    s = slice(cooling.start_index, cooling.stop_index)
+    assert s == csste_1014.get_cycle_slice("cooling", 3)
+    temps = csste_1014.actual_temperature.values[s]
+    trans = exp_reactor.transmission.values[s]
+    for ptemp in cooling.temperatures:
+        assert ptemp.cooling == 1
+        mask = (temps >= ptemp.average_temperature - 0.5) & (
+            temps < ptemp.average_temperature + 0.5
+        )
+        if not ptemp.filtered:
+            assert ptemp.average_transmission == pytest.approx(trans[mask].mean())
+            assert ptemp.median_transmission == np.median(trans[mask])
+            assert ptemp.transmission_std == pytest.approx(trans[mask].std())
+
+
+def test_process_reactor_use_temperature_program(csste_1014):  # noqa: F811
+    exp_reactor = csste_1014.reactors[1]
+    labels = csste_1014.program_labels
+    preactor = process_reactor(exp_reactor, use_temperature_program=True)
+    temps = csste_1014.actual_temperature.values
+    trans = exp_reactor.transmission.values
+    ptemps = [
+        ptemp
+        for ptemp in preactor.temperatures
+        if ptemp.average_temperature == 30 and not ptemp.filtered
+    ]
+    assert [(p.heating, p.cooling, p.holding) for p in ptemps] == [
+        (1, 0, 0),
+        (0, 1, 0),
+    ]
+    for ptemp, state in zip(ptemps, ["heating", "cooling"]):
+        mask = (
+            (temps >= 29.5)
+            & (temps < 30.5)
+            & labels.experiment_mask
+            & (labels.ramp_state == state)
+        )
+        assert ptemp.average_transmission == pytest.approx(trans[mask].mean())
+        assert ptemp.median_transmission == np.median(trans[mask])
+    # the only holds in the experiment stage are at 10, 25 and 60 C
+    holds = {
+        ptemp.average_temperature for ptemp in preactor.temperatures if ptemp.holding
+    }
+    assert holds == {10, 25, 60}
@@ -1,3 +1,5 @@
+import numpy as np
+
 from csst.processor import helpers
 from .fixtures.data import reactor  # noqa: F401
 
@@ -9,3 +11,15 @@ def test_find_index_after_sample_tune_and_load(reactor):  # noqa: F811
     assert ind == 4
     ind = helpers.find_index_after_x_hours(reactor, time_to_skip_in_hours=30 / 60)
     assert ind == 6
+
+
+def test_grouped_statistics():
+    keys = np.array([3, 1, 3, 1, 1, 7])
+    values = np.array([[1, 2, 3, 4, 10, 5], [0, 0, 0, 0, 0, 0]])
+    unique_keys, counts, means, medians, stds = helpers.grouped_statistics(keys, values)
+    assert unique_keys.tolist() == [1, 3, 7]
+    assert counts.tolist() == [3, 2, 1]
+    assert means.tolist() == [[16 / 3, 2, 5], [0, 0, 0]]
+    assert medians.tolist() == [[4, 2, 5], [0, 0, 0]]
+    assert np.allclose(stds[0], [np.std([2, 4, 10]), np.std([1, 3]), 0])
+    assert stds[1].tolist() == [0, 0, 0]
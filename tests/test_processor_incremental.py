@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from csst.processor import process_reactor
+from csst.processor.incremental import IncrementalProcessor
+from csst.processor.helpers import find_index_after_x_hours
+from .fixtures.data import csste_1014, reactor  # noqa: F401
+
+
+def assert_same_temperatures(temps, expected):
+    assert len(temps) == len(expected)
+    for temp, etemp in zip(temps, expected):
+        assert temp.average_temperature == etemp.average_temperature
+        assert (temp.heating, temp.cooling, temp.holding, temp.filtered) == (
+            etemp.heating,
+            etemp.cooling,
+            etemp.holding,
+            etemp.filtered,
+        )
+        assert temp.average_transmission == pytest.approx(etemp.average_transmission)
+        assert temp.median_transmission == pytest.approx(etemp.median_transmission)
+        assert temp.transmission_std == pytest.approx(etemp.transmission_std)
+
+
+def test_incremental_processor_from_reactor(reactor):  # noqa: F811
+    processor = IncrementalProcessor.from_reactor(reactor)
+    assert_same_temperatures(
+        processor.processed_temperatures(), process_reactor(reactor).temperatures
+    )
+    preactor = processor.processed_reactor(reactor)
+    assert preactor.unprocessed_reactor == reactor
+
+
+def test_incremental_processor_add_chunks(csste_1014):  # noqa: F811
+    exp_reactor = csste_1014.reactors[0]
+    expected = process_reactor(exp_reactor).temperatures
+    processor = IncrementalProcessor(
+        origin=10, start_index=find_index_after_x_hours(exp_reactor)
+    )
+    n = len(csste_1014.actual_temperature.values)
+    # uneven chunks, including ones that fall entirely in the skipped samples
+    bounds = [0, 50, 100, 1000, 1001, 15000, n]
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        processor.add_samples(
+            csste_1014.actual_temperature.values[start:stop],
+            csste_1014.ramp_state[start:stop],
+            exp_reactor.transmission.values[start:stop],
+            exp_reactor.filtered_transmission.values[start:stop],
+        )
+    assert processor.samples_seen == n
+    assert_same_temperatures(processor.processed_temperatures(), expected)
+
+
+def test_incremental_processor_histogram_medians(reactor):  # noqa: F811
+    expected = process_reactor(reactor).temperatures
+    processor = IncrementalProcessor.from_reactor(reactor, median_resolution=1)
+    temps = processor.processed_temperatures()
+    assert len(temps) == len(expected)
+    for temp, etemp in zip(temps, expected):
+        assert temp.average_transmission == pytest.approx(etemp.average_transmission)
+        if temp.filtered:
+            # filtered transmissions are rounded to the histogram bins
+            assert abs(temp.median_transmission - etemp.median_transmission) <= 0.5
+        else:
+            # raw transmissions are whole percents, so their medians are exact
+            assert temp.median_transmission == etemp.median_transmission
+    for stats in processor._bins.values():
+        assert stats.chunks == [[], []]
+        assert stats.histogram.shape == (2, 101)
+
+
+def test_incremental_processor_errors():
+    with pytest.raises(ValueError, match="temp_range"):
+        IncrementalProcessor(temp_range=0)
+    with pytest.raises(ValueError, match="median_resolution"):
+        IncrementalProcessor(median_resolution=0)
+    processor = IncrementalProcessor()
+    with pytest.raises(ValueError, match="same length"):
+        processor.add_samples(np.zeros(3), ["holding"] * 2, np.zeros(3), np.zeros(3))
@@ -0,0 +1,69 @@
+import pytest
+
+from csst import processor
+from csst.processor import process_reactor
+from csst.processor.helpers import find_index_after_x_hours
+from csst.processor.sweep import sweep_reactor_processing
+from .fixtures.data import csste_1014, reactor  # noqa: F401
+
+
+def assert_matches_process_reactor(df, reactor, temp_range):  # noqa: F811
+    expected = process_reactor(reactor, temp_range=temp_range).temperatures
+    df = df[df.reactor == str(reactor)]
+    assert len(df) == len(expected)
+    for field in ["average_temperature", "heating", "cooling", "holding", "filtered"]:
+        assert df[field].to_list() == [getattr(t, field) for t in expected]
+    for field in ["average_transmission", "median_transmission", "transmission_std"]:
+        assert df[field].to_list() == pytest.approx(
+            [getattr(t, field) for t in expected]
+        )
+
+
+def test_sweep_reactor_processing(csste_1014):  # noqa: F811
+    df = sweep_reactor_processing(
+        csste_1014.reactors, temp_ranges=[1, 2, 0.5], window_lengths=[None, 11]
+    )
+    dt = csste_1014.get_timestep_of_experiment()
+    default_window = csste_1014.reactors[0].filtered_transmission.window_length
+    assert set(df.window_length) == {default_window, 11}
+    for temp_range in [1, 2, 0.5]:
+        for reactor in csste_1014.reactors:  # noqa: F402
+            assert_matches_process_reactor(
+                df[
+                    (df.temperature_range == temp_range)
+                    & (df.window_length == default_window)
+                ],
+                reactor,
+                temp_range,
+            )
+            reactor = reactor.copy()
+            reactor.filtered_transmission = csste_1014.filter_transmission(
+                reactor.transmission.values, dt, 11
+            )
+            assert_matches_process_reactor(
+                df[(df.temperature_range == temp_range) & (df.window_length == 11)],
+                reactor,
+                temp_range,
+            )
+
+
+def test_sweep_reactor_processing_time_to_skip(csste_1014, monkeypatch):  # noqa: F811
+    df = sweep_reactor_processing(
+        csste_1014.reactors, times_to_skip_in_hours=[5 / 60, 3]
+    )
+    assert df.time_to_skip_in_hours.unique().tolist() == [5 / 60, 3]
+    monkeypatch.setattr(
+        processor,
+        "find_index_after_x_hours",
+        lambda reactor: find_index_after_x_hours(reactor, 3),
+    )
+    for reactor in csste_1014.reactors:  # noqa: F402
+        assert_matches_process_reactor(
+            df[df.time_to_skip_in_hours == 3], reactor, temp_range=1
+        )
+
+
+def test_sweep_reactor_processing_no_reactors():
+    df = sweep_reactor_processing([])
+    assert len(df) == 0
+    assert "window_length" in df.columns
@@ -0,0 +1,47 @@
+import pytest
+
+from csst.processor.transitions import find_transition_temperatures
+from csst.analyzer import Analyzer
+from .fixtures.data import csste_1014, cycling_experiment  # noqa: F401
+
+
+def test_find_transition_temperatures(cycling_experiment):  # noqa: F811
+    df = find_transition_temperatures(cycling_experiment.reactors)
+    assert df.reactor_number.to_list() == [1, 1, 1, 2]
+    assert df.state.to_list() == ["heating", "cooling", "heating", "heating"]
+    assert df.transition.to_list() == ["clear", "cloud", "clear", "clear"]
+    assert df.cycle.to_list() == [1, 1, 2, 2]
+    assert df.temperature.to_list() == pytest.approx([30, 20, 30, 40])
+    assert df.time.to_list() == pytest.approx([0.5, 1.75, 2.5, 2.75])
+    assert list(df.concentration) == [1, 1, 1, 2]
+
+    df = find_transition_temperatures(cycling_experiment.reactors, threshold=75)
+    assert df.temperature.to_list() == pytest.approx([35, 25, 35, 45])
+
+
+def test_find_transition_temperatures_ignores_short_cycles(
+    cycling_experiment,  # noqa: F811
+):
+    # a short heating blip in the middle of the cooling ramp
+    cycling_experiment.ramp_state[150:152] = ["heating"] * 2
+    df = find_transition_temperatures(cycling_experiment.reactors[:1])
+    assert df.cycle.to_list() == [1, 1, 2]
+    assert df.temperature.to_list() == pytest.approx([30, 20, 30])
+
+
+def test_find_transition_temperatures_no_reactors():
+    df = find_transition_temperatures([])
+    assert len(df) == 0
+    assert "temperature" in df.columns
+
+
+def test_find_transition_temperatures_experiment(csste_1014):  # noqa: F811
+    df = find_transition_temperatures(csste_1014.reactors)
+    assert len(df) > 0
+    assert set(df.transition) <= {"clear", "cloud"}
+    assert (df.temperature >= csste_1014.actual_temperature.values.min()).all()
+    assert (df.temperature <= csste_1014.actual_temperature.values.max()).all()
+    # the analyzer finds the same transitions from its processed reactors
+    analyzer = Analyzer()
+    analyzer.add_experiment_reactors(csste_1014)
+    assert analyzer.get_transition_temperatures().equals(df)